@@ -3,27 +3,43 @@ Caption/Transcription API Endpoints
 Auto-caption generation using Whisper API.
 """
 
-from typing import Annotated, Optional
+from datetime import datetime
+from typing import Annotated, List, Optional
+from urllib.parse import quote
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, BackgroundTasks, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.orm import noload, selectinload
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.core.security import get_current_user
 from app.core.config import settings
 from app.models.user import User
-from app.models.caption import Caption, TranscriptionStatus, CaptionFormat
+from app.models.caption import Caption, CaptionSegment, CaptionBurnJob, CaptionBatch, CaptionBatchItem, BatchItemStatus, BurnJobStatus, KaraokeMode, TranscriptionStatus, CaptionFormat
 from app.schemas.caption import (
     CaptionGenerateRequest,
     CaptionResponse,
     CaptionListResponse,
     CaptionUpdateRequest,
+    CaptionSegmentUpdateRequest,
+    CaptionSegmentSchema,
+    CaptionSegmentListResponse,
+    CaptionRetimeRequest,
     CaptionExportRequest,
     CaptionExportResponse,
+    CaptionBurnJobResponse,
+    CaptionBatchCreateRequest,
+    CaptionBatchItemResponse,
+    CaptionBatchResponse,
 )
 from app.services.caption_service import CaptionService
+from app.services.burn_queue import burn_queue, is_stale, stale_cutoff
+from app.services.caption_ingest_queue import ingest_queue
+from app.services.caption_timing import RetimeOptions
+from app.services.job_events import sse_response, channel_name
 
 router = APIRouter()
 
@@ -155,11 +171,120 @@ async def upload_and_generate_captions(
     return caption
 
 
+@router.post(
+    "/batches",
+    response_model=CaptionBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Bulk-generate captions from a URL manifest",
+    description="Queue caption generation for many source URLs at once (e.g. a back-catalogue). Duplicate URLs are skipped; items run on a bounded worker pool shared fairly between users.",
+)
+async def create_caption_batch(
+    request: CaptionBatchCreateRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """
+    Create a bulk caption batch.
+    
+    - Up to CAPTION_BATCH_MAX_ITEMS URLs per manifest
+    - URLs repeated in the manifest, or already captioned, are not re-processed
+    - Credits are checked for every manifest entry; only new items are charged
+    
+    Poll GET /captions/batches/{batch_id} for progress and throughput.
+    """
+    if current_user.credits_remaining < 2 * len(request.items):
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail="Insufficient credits. Please upgrade your plan.",
+        )
+    
+    caption_service = CaptionService(db)
+    try:
+        batch, new_count = await caption_service.create_caption_batch(
+            user_id=current_user.id,
+            request=request,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    
+    # Deduct credits for the captions actually queued
+    current_user.credits_remaining -= 2 * new_count
+    current_user.total_captions_generated += new_count
+    await db.commit()
+    
+    if new_count:
+        ingest_queue.wake()
+    
+    return await caption_service.get_batch_progress(batch)
+
+
+async def _get_user_batch(db: AsyncSession, batch_id: UUID, user_id: UUID) -> CaptionBatch:
+    result = await db.execute(
+        select(CaptionBatch).where(
+            CaptionBatch.id == batch_id,
+            CaptionBatch.user_id == user_id,
+        )
+    )
+    batch = result.scalar_one_or_none()
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found",
+        )
+    return batch
+
+
+@router.get(
+    "/batches/{batch_id}",
+    response_model=CaptionBatchResponse,
+    summary="Get bulk caption batch progress",
+    description="Item counts per status, aggregate progress, throughput and ETA for a batch.",
+)
+async def get_caption_batch(
+    batch_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Get aggregate progress of a batch."""
+    batch = await _get_user_batch(db, batch_id, current_user.id)
+    return await CaptionService(db).get_batch_progress(batch)
+
+
+@router.get(
+    "/batches/{batch_id}/items",
+    response_model=List[CaptionBatchItemResponse],
+    summary="List bulk caption batch items",
+    description="Items of a batch in manifest order, with the caption each produced.",
+)
+async def list_caption_batch_items(
+    batch_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=50, ge=1, le=500),
+    status_filter: Optional[BatchItemStatus] = Query(None, alias="status"),
+):
+    """List a batch's items."""
+    await _get_user_batch(db, batch_id, current_user.id)
+    
+    query = select(CaptionBatchItem).where(CaptionBatchItem.batch_id == batch_id)
+    if status_filter:
+        query = query.where(CaptionBatchItem.status == status_filter)
+    query = query.order_by(CaptionBatchItem.position)
+    query = query.offset((page - 1) * page_size).limit(page_size)
+    
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
 @router.get(
     "",
     response_model=CaptionListResponse,
     summary="List user captions",
-    description="Get paginated list of user's caption jobs.",
+    description="Get paginated list of user's caption jobs (segments omitted; see GET /captions/{id}).",
 )
 async def list_captions(
     current_user: Annotated[User, Depends(get_current_user)],
@@ -169,7 +294,8 @@ async def list_captions(
     status_filter: Optional[TranscriptionStatus] = Query(None, alias="status"),
 ):
     """List user's caption jobs."""
-    query = select(Caption).where(Caption.user_id == current_user.id)
+    # Segments are not part of list items (GET /captions/{id} has them)
+    query = select(Caption).where(Caption.user_id == current_user.id).options(noload(Caption.segment_rows))
     
     if status_filter:
         query = query.where(Caption.status == status_filter)
@@ -186,7 +312,7 @@ async def list_captions(
     captions = result.scalars().all()
     
     return CaptionListResponse(
-        items=captions,
+        items=[CaptionResponse.model_validate(c).model_copy(update={"segments": None}) for c in captions],
         total=total,
         page=page,
         page_size=page_size,
@@ -207,10 +333,12 @@ async def get_caption(
 ):
     """Get caption job details."""
     result = await db.execute(
-        select(Caption).where(
+        select(Caption)
+        .where(
             Caption.id == caption_id,
             Caption.user_id == current_user.id,
         )
+        .options(selectinload(Caption.segment_rows))
     )
     caption = result.scalar_one_or_none()
     
@@ -223,6 +351,78 @@ async def get_caption(
     return caption
 
 
+async def _caption_status_snapshot(db: AsyncSession, caption_id: UUID, user_id: UUID) -> Optional[tuple]:
+    """(event, data) for a caption's current status without loading its segments."""
+    segment_count = (
+        select(func.count(CaptionSegment.id))
+        .where(CaptionSegment.caption_id == Caption.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            Caption.status,
+            Caption.error_message,
+            Caption.detected_language,
+            Caption.legacy_segments,
+            segment_count,
+            Caption.source_duration_seconds,
+            Caption.silence_trimmed_seconds,
+        ).where(
+            Caption.id == caption_id,
+            Caption.user_id == user_id,
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    status_value = row[0].value
+    return status_value, {
+        "status": status_value,
+        "error_message": row[1],
+        "detected_language": row[2],
+        "segment_count": row[4] or len(row[3] or []),
+        "source_duration_seconds": row[5],
+        "silence_trimmed_seconds": row[6],
+    }
+
+
+@router.get(
+    "/{caption_id}/events",
+    summary="Stream caption progress",
+    description=(
+        "Server-Sent Events stream of transcription status changes and partial segments "
+        "(`segments` events). Ends when transcription completes or fails; burn-in jobs "
+        "have their own stream at `/captions/{id}/burn/{job_id}/events`."
+    ),
+)
+async def stream_caption_events(
+    caption_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """
+    Replace polling GET /captions/{id} with a push stream.
+    
+    The first event is the current status; status events are named after
+    the status (processing, completed, failed).
+    """
+    snapshot = await _caption_status_snapshot(db, caption_id, current_user.id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caption not found",
+        )
+    # Release the connection; the stream may stay open for minutes
+    await db.commit()
+    user_id = current_user.id
+    
+    async def load_snapshot():
+        async with AsyncSessionLocal() as session:
+            return await _caption_status_snapshot(session, caption_id, user_id)
+    
+    return sse_response(channel_name("caption", caption_id), [snapshot], load_snapshot)
+
+
 @router.patch(
     "/{caption_id}",
     response_model=CaptionResponse,
@@ -243,10 +443,12 @@ async def update_caption(
     - Change caption style
     """
     result = await db.execute(
-        select(Caption).where(
+        select(Caption)
+        .where(
             Caption.id == caption_id,
             Caption.user_id == current_user.id,
         )
+        .options(selectinload(Caption.segment_rows))
     )
     caption = result.scalar_one_or_none()
     
@@ -265,17 +467,211 @@ async def update_caption(
     update_dict = update_data.model_dump(exclude_unset=True)
     for field, value in update_dict.items():
         if field == "segments" and value:
-            caption.segments = [s.model_dump() for s in value]
+            caption.segments = value
             caption.is_edited = True
         else:
             setattr(caption, field, value)
     
+    # Any content/style change makes previously exported files stale
+    if update_dict.keys() & {"segments", "title", "caption_style", "style_settings"}:
+        caption.invalidate_exports()
+    
     await db.commit()
     await db.refresh(caption)
+    await db.refresh(caption, ["segment_rows"])
+    
+    return caption
+
+
+@router.get(
+    "/{caption_id}/segments",
+    response_model=CaptionSegmentListResponse,
+    summary="Read caption segments",
+    description="Read a window of segments by index and/or time range.",
+)
+async def list_caption_segments(
+    caption_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    start_index: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    start_time: Optional[float] = Query(None, ge=0, description="Only segments ending after this time"),
+    end_time: Optional[float] = Query(None, ge=0, description="Only segments starting before this time"),
+):
+    """
+    Read part of a transcript without loading every segment.
+    
+    Useful for editors that page through long (1-2 hour) transcripts.
+    """
+    caption_service = CaptionService(db)
+    segments = await caption_service.get_segment_range(
+        caption_id=caption_id,
+        user_id=current_user.id,
+        start_index=start_index,
+        limit=limit,
+        start_time=start_time,
+        end_time=end_time,
+    )
+    
+    if segments is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caption not found",
+        )
+    
+    return CaptionSegmentListResponse(
+        caption_id=caption_id,
+        items=[s.to_dict() for s in segments[:limit]],
+        start_index=start_index,
+        limit=limit,
+        has_more=len(segments) > limit,
+    )
+
+
+@router.get(
+    "/{caption_id}/segments/at",
+    response_model=CaptionSegmentSchema,
+    summary="Caption at time",
+    description="Get the segment on screen at a given playback time (for live preview players).",
+)
+async def get_caption_segment_at(
+    caption_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    time: float = Query(..., ge=0, description="Playback time in seconds"),
+):
+    """Binary-search lookup of the segment covering `time`."""
+    caption_service = CaptionService(db)
+    found = await caption_service.get_segment_at(
+        caption_id=caption_id,
+        user_id=current_user.id,
+        time_seconds=time,
+    )
+    
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caption not found",
+        )
+    
+    segment, _ = found
+    if segment is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No caption at this time",
+        )
+    
+    return segment.to_dict()
+
+
+@router.post(
+    "/{caption_id}/retime",
+    response_model=CaptionResponse,
+    summary="Re-time captions",
+    description="Fix overlaps and gaps, merge/split segments to line limits and snap to shot changes.",
+)
+async def retime_caption(
+    caption_id: UUID,
+    options: CaptionRetimeRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """
+    Normalise segment timing.
+    
+    - Overlapping segments are trimmed, short gaps closed
+    - Fragments are merged and long lines split at word boundaries
+    - Boundaries near a shot change are moved onto it
+    """
+    result = await db.execute(
+        select(Caption)
+        .where(
+            Caption.id == caption_id,
+            Caption.user_id == current_user.id,
+        )
+        .options(selectinload(Caption.segment_rows))
+    )
+    caption = result.scalar_one_or_none()
+    
+    if not caption:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caption not found",
+        )
+    
+    if caption.status != TranscriptionStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Can only edit completed captions",
+        )
+    
+    retime_options = RetimeOptions(**options.model_dump(exclude={"shot_changes"}))
+    # Default to the shot changes detected for the source video
+    if options.shot_changes is not None:
+        retime_options.shot_changes = options.shot_changes
+    else:
+        retime_options.shot_changes = caption.scene_cuts or []
+    
+    caption_service = CaptionService(db)
+    caption = await caption_service.retime_caption(caption, retime_options)
+    await db.refresh(caption)
+    await db.refresh(caption, ["segment_rows"])
     
     return caption
 
 
+@router.patch(
+    "/{caption_id}/segments/{segment_index}",
+    response_model=CaptionSegmentSchema,
+    summary="Update one caption segment",
+    description="Edit text or timing of a single segment.",
+)
+async def update_caption_segment(
+    caption_id: UUID,
+    segment_index: int,
+    update_data: CaptionSegmentUpdateRequest,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """
+    Update a single caption segment.
+    
+    Only the edited segment row is written, regardless of transcript length.
+    """
+    caption_service = CaptionService(db)
+    found = await caption_service.get_segment(
+        caption_id=caption_id,
+        user_id=current_user.id,
+        segment_index=segment_index,
+    )
+    
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Segment not found",
+        )
+    
+    segment, caption_status = found
+    if caption_status != TranscriptionStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Can only edit completed captions",
+        )
+    
+    try:
+        segment = await caption_service.update_segment(
+            segment=segment,
+            changes=update_data.model_dump(exclude_unset=True),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    
+    return segment.to_dict()
+
+
 @router.get(
     "/styles",
     summary="Get caption styles",
@@ -308,9 +704,14 @@ async def export_caption(
     - ASS: Advanced SubStation Alpha (styled)
     - JSON: Raw segment data
     - TXT: Plain text transcription
+    
+    Repeated exports of an unchanged caption return the cached file.
     """
+    # Segments are loaded by the service only on a cache miss
     result = await db.execute(
-        select(Caption).where(
+        select(Caption)
+        .options(noload(Caption.segment_rows))
+        .where(
             Caption.id == caption_id,
             Caption.user_id == current_user.id,
         )
@@ -340,10 +741,67 @@ async def export_caption(
     return export_result
 
 
+@router.get(
+    "/{caption_id}/download",
+    summary="Download captions",
+    description="Stream a caption file directly without uploading it to storage.",
+)
+async def download_caption(
+    caption_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    format: CaptionFormat = Query(default=CaptionFormat.SRT),
+    include_translation: bool = Query(default=False),
+):
+    """
+    Download captions as a file.
+    
+    The file is generated while it is sent, so long transcripts
+    download at flat server memory.
+    """
+    result = await db.execute(
+        select(Caption)
+        .where(
+            Caption.id == caption_id,
+            Caption.user_id == current_user.id,
+        )
+        .options(selectinload(Caption.segment_rows))
+    )
+    caption = result.scalar_one_or_none()
+
+    if not caption:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caption not found",
+        )
+    
+    if caption.status != TranscriptionStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Caption transcription not completed",
+        )
+    
+    caption_service = CaptionService(db)
+    chunks, extension, content_type = caption_service.iter_export(
+        caption=caption,
+        format=format,
+        include_translation=include_translation,
+    )
+    
+    filename = f"{caption.title.replace(' ', '_')}{extension}"
+    return StreamingResponse(
+        chunks,
+        media_type=content_type,
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"},
+    )
+
+
 @router.post(
     "/{caption_id}/burn",
+    response_model=CaptionBurnJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Burn captions into video",
-    description="Hardcode captions into the source video using FFmpeg + ASS styles (supports karaoke word highlighting).",
+    description="Queue a job that hardcodes captions into the source video using FFmpeg + ASS styles (supports karaoke word highlighting). One pass produces a 1080x1920 video, a 720p preview and an audio-only track.",
 )
 async def burn_captions_into_video(
     caption_id: UUID,
@@ -351,12 +809,26 @@ async def burn_captions_into_video(
     db: Annotated[AsyncSession, Depends(get_db)],
     style_preset_id: str = Query(default="minimal_chic"),
     karaoke: bool = Query(default=True),
+    karaoke_mode: KaraokeMode = Query(
+        default=KaraokeMode.LINE,
+        description="line: \\k sweep per segment; word: per-word pop/highlight events in short lines",
+    ),
 ):
+    """
+    Queue a burn-in render and return the job.
+    
+    Poll `GET /captions/{id}/burn/{job_id}` for progress, or stream it from
+    `GET /captions/{id}/burn/{job_id}/events`. If this caption
+    revision was already burned with the same options, a completed job
+    pointing at the existing file is returned immediately.
+    """
     result = await db.execute(
-        select(Caption).where(
+        select(Caption)
+        .where(
             Caption.id == caption_id,
             Caption.user_id == current_user.id,
         )
+        .options(noload(Caption.segment_rows))
     )
     caption = result.scalar_one_or_none()
 
@@ -372,27 +844,205 @@ async def burn_captions_into_video(
             detail="Caption transcription not completed",
         )
 
-    caption_service = CaptionService(db)
-    try:
-        url = await caption_service.burn_captions_to_video(
-            caption=caption,
-            style_preset_id=style_preset_id,
-            karaoke=karaoke,
+    if not caption.source_file_url:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Caption has no source video",
+        )
+
+    # Identical job already in flight for this revision (jobs of a dead worker are not)
+    result = await db.execute(
+        select(CaptionBurnJob)
+        .where(
+            CaptionBurnJob.caption_id == caption.id,
+            CaptionBurnJob.caption_revision == caption.revision,
+            CaptionBurnJob.style_preset_id == style_preset_id,
+            CaptionBurnJob.karaoke == karaoke,
+            CaptionBurnJob.karaoke_mode == karaoke_mode,
+            CaptionBurnJob.status.in_([BurnJobStatus.QUEUED, BurnJobStatus.RUNNING]),
+            CaptionBurnJob.heartbeat_at >= stale_cutoff(),
+        )
+        .order_by(CaptionBurnJob.created_at.desc())
+        .limit(1)
+    )
+    job = result.scalar_one_or_none()
+    if job:
+        return job
+
+    job = CaptionBurnJob(
+        caption_id=caption.id,
+        user_id=current_user.id,
+        style_preset_id=style_preset_id,
+        karaoke=karaoke,
+        karaoke_mode=karaoke_mode,
+        caption_revision=caption.revision,
+        progress=0,
+    )
+
+    cache_key = CaptionService(db).burn_cache_key(caption, style_preset_id, karaoke, karaoke_mode)
+    cached = (caption.export_cache or {}).get(cache_key)
+    if cached:
+        job.status = BurnJobStatus.COMPLETED
+        job.progress = 100
+        job.download_url = cached["url"]
+        job.outputs = cached.get("outputs")
+        job.finished_at = datetime.utcnow()
+    else:
+        job.status = BurnJobStatus.QUEUED
+        job.worker_id = burn_queue.worker_id
+        job.heartbeat_at = datetime.utcnow()
+
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    if job.status == BurnJobStatus.QUEUED:
+        burn_queue.submit(job.id)
+
+    return job
+
+
+@router.get(
+    "/{caption_id}/burn/{job_id}",
+    response_model=CaptionBurnJobResponse,
+    summary="Get burn job status",
+    description="Get status, progress and encode speed of a caption burn-in job.",
+)
+async def get_burn_job(
+    caption_id: UUID,
+    job_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Get burn job status."""
+    result = await db.execute(
+        select(CaptionBurnJob).where(
+            CaptionBurnJob.id == job_id,
+            CaptionBurnJob.caption_id == caption_id,
+            CaptionBurnJob.user_id == current_user.id,
         )
-    except Exception as e:
+    )
+    job = result.scalar_one_or_none()
+
+    if not job:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to burn captions: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Burn job not found",
         )
 
-    return {
-        "caption_id": str(caption.id),
-        "download_url": url,
-        "style_preset_id": style_preset_id,
-        "karaoke": karaoke,
+    return job
+
+
+async def _burn_job_snapshot(db: AsyncSession, caption_id: UUID, job_id: UUID, user_id: UUID) -> Optional[tuple]:
+    """(event, data) for a burn job's current state, matching BurnQueue's events."""
+    result = await db.execute(
+        select(
+            CaptionBurnJob.status,
+            CaptionBurnJob.progress,
+            CaptionBurnJob.encode_fps,
+            CaptionBurnJob.download_url,
+            CaptionBurnJob.outputs,
+            CaptionBurnJob.error_message,
+        ).where(
+            CaptionBurnJob.id == job_id,
+            CaptionBurnJob.caption_id == caption_id,
+            CaptionBurnJob.user_id == user_id,
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    terminal = (BurnJobStatus.COMPLETED, BurnJobStatus.FAILED, BurnJobStatus.CANCELLED)
+    event = row[0].value if row[0] in terminal else "progress"
+    return event, {
+        "job_id": str(job_id),
+        "status": row[0].value,
+        "progress": row[1],
+        "encode_fps": row[2],
+        "download_url": row[3],
+        "outputs": row[4],
+        "error_message": row[5],
     }
 
 
+@router.get(
+    "/{caption_id}/burn/{job_id}/events",
+    summary="Stream burn job progress",
+    description=(
+        "Server-Sent Events stream of a burn-in job: `progress` events while it renders, "
+        "an `output` event per uploaded rendition, then `completed`, `failed` or `cancelled`."
+    ),
+)
+async def stream_burn_job_events(
+    caption_id: UUID,
+    job_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Push alternative to polling GET /captions/{id}/burn/{job_id}."""
+    snapshot = await _burn_job_snapshot(db, caption_id, job_id, current_user.id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Burn job not found",
+        )
+    await db.commit()
+    user_id = current_user.id
+    
+    async def load_snapshot():
+        async with AsyncSessionLocal() as session:
+            return await _burn_job_snapshot(session, caption_id, job_id, user_id)
+    
+    return sse_response(channel_name("burn", job_id), [snapshot], load_snapshot)
+
+
+@router.delete(
+    "/{caption_id}/burn/{job_id}",
+    response_model=CaptionBurnJobResponse,
+    summary="Cancel burn job",
+    description="Cancel a queued or running caption burn-in job.",
+)
+async def cancel_burn_job(
+    caption_id: UUID,
+    job_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Cancel burn job."""
+    result = await db.execute(
+        select(CaptionBurnJob).where(
+            CaptionBurnJob.id == job_id,
+            CaptionBurnJob.caption_id == caption_id,
+            CaptionBurnJob.user_id == current_user.id,
+        )
+    )
+    job = result.scalar_one_or_none()
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Burn job not found",
+        )
+
+    if job.status not in (BurnJobStatus.QUEUED, BurnJobStatus.RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Burn job already {job.status.value}",
+        )
+
+    job.cancel_requested = True
+    # Queued, or running on a worker that stopped heartbeating: nobody will see the flag
+    if job.status == BurnJobStatus.QUEUED or is_stale(job.heartbeat_at):
+        job.status = BurnJobStatus.CANCELLED
+        job.finished_at = datetime.utcnow()
+    await db.commit()
+
+    # Running on this process: stop FFmpeg now; other nodes see the flag on their next heartbeat
+    burn_queue.cancel_local(job.id)
+
+    return job
+
+
 @router.delete(
     "/{caption_id}",
     status_code=status.HTTP_204_NO_CONTENT,
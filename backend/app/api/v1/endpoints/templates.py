@@ -3,15 +3,16 @@ Template API Endpoints
 Reel templates for Indian content creators.
 """
 
-from typing import Annotated, Optional
+from datetime import datetime, timedelta
+from typing import Annotated, Dict, List, Optional, Tuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.security import get_current_user, get_current_active_superuser
 from app.models.user import User
 from app.models.template import Template, UserTemplate, TemplateCategory, TemplateType, AspectRatio
 from app.schemas.template import (
@@ -24,9 +25,15 @@ from app.schemas.template import (
     RenderStatusResponse,
     TemplateDefinitionResponse,
     TemplateAssetUploadResponse,
+    TemplateRenderMetrics,
+    RenderMetricsResponse,
 )
-from app.services.template_service import TemplateService
+from app.services.template_service import preview_cache_key
+from app.services import render_metrics
+from app.services.render_queue import active_render_job, enqueue_render, render_queue
 from app.services.storage_service import StorageService
+from app.services.template_catalogue import template_catalogue
+from app.services.job_events import sse_response, channel_name
 
 router = APIRouter()
 
@@ -74,7 +81,8 @@ async def upload_template_asset(
     description="Browse available video/reel templates.",
 )
 async def list_templates(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    response: Response,
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
     category: Optional[TemplateCategory] = None,
@@ -85,7 +93,7 @@ async def list_templates(
     festival_name: Optional[str] = None,
     search: Optional[str] = Query(
         None,
-        description="Search in name, description, tags (Hindi/English)",
+        description="Search in name, description, tags (Hindi/English, any spelling: diwali / दिवाली)",
     ),
 ):
     """
@@ -102,48 +110,28 @@ async def list_templates(
     - fashion: Indian fashion
     - tech: Tech reviews
     - lifestyle: Daily life
-    """
-    query = select(Template).where(Template.is_active == True)
-    
-    # Apply filters
-    if category:
-        query = query.where(Template.category == category)
-    if template_type:
-        query = query.where(Template.template_type == template_type)
-    if aspect_ratio:
-        query = query.where(Template.aspect_ratio == aspect_ratio)
-    if is_premium is not None:
-        query = query.where(Template.is_premium == is_premium)
-    if is_featured is not None:
-        query = query.where(Template.is_featured == is_featured)
-    if festival_name:
-        query = query.where(Template.festival_name.ilike(f"%{festival_name}%"))
-    if search:
-        query = query.where(
-            or_(
-                Template.name.ilike(f"%{search}%"),
-                Template.name_hindi.ilike(f"%{search}%"),
-                Template.description.ilike(f"%{search}%"),
-                Template.tags.any(search),
-            )
-        )
-    
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_query)).scalar()
     
-    # Apply pagination and ordering
-    query = query.order_by(
-        Template.is_featured.desc(),
-        Template.usage_count.desc(),
+    Served from the in-memory template catalogue; send the returned ETag
+    as If-None-Match to get 304 Not Modified until the catalogue changes.
+    """
+    templates = await template_catalogue.search(
+        category=category,
+        template_type=template_type,
+        aspect_ratio=aspect_ratio,
+        is_premium=is_premium,
+        is_featured=is_featured,
+        festival_name=festival_name,
+        search=search,
     )
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    not_modified = _check_etag(request, response, template_catalogue.etag)
+    if not_modified:
+        return not_modified
     
-    result = await db.execute(query)
-    templates = result.scalars().all()
+    total = len(templates)
+    offset = (page - 1) * page_size
     
     return TemplateListResponse(
-        items=templates,
+        items=templates[offset:offset + page_size],
         total=total,
         page=page,
         page_size=page_size,
@@ -157,26 +145,23 @@ async def list_templates(
     description="Get list of template categories with counts.",
 )
 async def get_template_categories(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    response: Response,
 ):
     """Get template categories with template counts."""
-    result = await db.execute(
-        select(
-            Template.category,
-            func.count(Template.id).label("count"),
-        )
-        .where(Template.is_active == True)
-        .group_by(Template.category)
-    )
+    counts = await template_catalogue.categories()
+    not_modified = _check_etag(request, response, template_catalogue.etag)
+    if not_modified:
+        return not_modified
     
     categories = []
-    for row in result:
+    for category, count in counts:
         categories.append({
-            "category": row.category.value,
-            "count": row.count,
+            "category": category.value,
+            "count": count,
             "label": {
-                "en": row.category.value.title(),
-                "hi": get_hindi_category_name(row.category),
+                "en": category.value.title(),
+                "hi": get_hindi_category_name(category),
             },
         })
     
@@ -190,19 +175,15 @@ async def get_template_categories(
     description="Get featured/trending templates.",
 )
 async def get_featured_templates(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    response: Response,
     limit: int = Query(default=10, ge=1, le=50),
 ):
     """Get featured and trending templates."""
-    query = (
-        select(Template)
-        .where(Template.is_active == True, Template.is_featured == True)
-        .order_by(Template.usage_count.desc())
-        .limit(limit)
-    )
-    
-    result = await db.execute(query)
-    templates = result.scalars().all()
+    templates = await template_catalogue.featured(limit)
+    not_modified = _check_etag(request, response, template_catalogue.etag)
+    if not_modified:
+        return not_modified
     
     return TemplateListResponse(
         items=templates,
@@ -219,7 +200,8 @@ async def get_featured_templates(
     description="Get templates for upcoming Indian festivals.",
 )
 async def get_festival_templates(
-    db: Annotated[AsyncSession, Depends(get_db)],
+    request: Request,
+    response: Response,
 ):
     """
     Get templates for Indian festivals.
@@ -234,25 +216,16 @@ async def get_festival_templates(
     - Ganesh Chaturthi (गणेश चतुर्थी)
     - And more...
     """
-    from datetime import datetime, timedelta
-    
     # Get upcoming festivals (next 60 days)
     now = datetime.utcnow()
     upcoming = now + timedelta(days=60)
     
-    query = (
-        select(Template)
-        .where(
-            Template.is_active == True,
-            Template.category == TemplateCategory.FESTIVAL,
-            Template.festival_date >= now,
-            Template.festival_date <= upcoming,
-        )
-        .order_by(Template.festival_date)
-    )
-    
-    result = await db.execute(query)
-    templates = result.scalars().all()
+    templates = await template_catalogue.festivals(now, upcoming)
+    # The 60-day window moves, so the ETag also changes daily
+    etag = template_catalogue.etag.rstrip('"') + f'-{now:%Y%m%d}"'
+    not_modified = _check_etag(request, response, etag)
+    if not_modified:
+        return not_modified
     
     # Group by festival
     festivals = {}
@@ -268,6 +241,47 @@ async def get_festival_templates(
     return {"festivals": list(festivals.values())}
 
 
+@router.get(
+    "/render-metrics",
+    response_model=RenderMetricsResponse,
+    summary="Template render metrics",
+    description="Per-template render stage timings, encode speed and failures (superusers only).",
+)
+async def get_render_metrics(
+    current_user: Annotated[User, Depends(get_current_active_superuser)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    days: int = Query(default=7, ge=1, le=90),
+    include_previews: bool = Query(default=False),
+):
+    """
+    Aggregate the ``render_metrics`` stored with each customised template's
+    last render, per base template, to show which templates (and which
+    stages and layer mixes) dominate render time.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+    result = await db.execute(
+        select(UserTemplate.template_id, Template.name, UserTemplate.render_metrics)
+        .join(Template, Template.id == UserTemplate.template_id)
+        .where(
+            UserTemplate.render_metrics.isnot(None),
+            UserTemplate.updated_at >= since,
+        )
+    )
+    
+    by_template: Dict[UUID, Tuple[str, List[dict]]] = {}
+    for template_id, name, metrics in result:
+        if metrics.get("preview") and not include_previews:
+            continue
+        by_template.setdefault(template_id, (name, []))[1].append(metrics)
+    
+    templates = [
+        TemplateRenderMetrics(template_id=template_id, template_name=name, **render_metrics.aggregate(metrics))
+        for template_id, (name, metrics) in by_template.items()
+    ]
+    templates.sort(key=lambda m: m.avg_total_seconds or 0, reverse=True)
+    return RenderMetricsResponse(since=since, templates=templates)
+
+
 @router.get(
     "/{template_id}",
     response_model=TemplateResponse,
@@ -372,6 +386,8 @@ async def use_template(
     template.usage_count += 1
     
     await db.commit()
+    # Usage reorders the browse catalogue
+    template_catalogue.request_refresh()
     await db.refresh(user_template)
     
     return user_template
@@ -386,15 +402,19 @@ async def use_template(
 )
 async def render_template(
     request: RenderTemplateRequest,
-    background_tasks: BackgroundTasks,
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ):
     """
     Start rendering a customized template.
     
-    This is an async operation. Poll the status using
+    The render is queued for the render workers. Follow progress with
+    GET /templates/render/{user_template_id}/events (SSE) or poll
     GET /templates/render/{user_template_id}/status
+    
+    With ``preview`` a fast low-resolution render is produced instead
+    (``preview_url``); previews are free and return immediately when the
+    customisations have not changed since the last one.
     """
     # Verify user template exists
     result = await db.execute(
@@ -411,6 +431,28 @@ async def render_template(
             detail="Template not found",
         )
     
+    if request.preview:
+        template = await db.get(Template, user_template.template_id)
+        if template is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Template not found",
+            )
+        key = preview_cache_key(template, user_template.customizations, request.preview_scale)
+        if user_template.preview_key == key and user_template.preview_url:
+            return RenderStatusResponse(
+                user_template_id=user_template.id,
+                status="completed",
+                progress=100,
+                preview_url=user_template.preview_url,
+            )
+    
+    if await active_render_job(db, user_template.id) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A render of this template is already in progress",
+        )
+    
     # Check credits
     if current_user.credits_remaining <= 0:
         raise HTTPException(
@@ -418,23 +460,24 @@ async def render_template(
             detail="Insufficient credits",
         )
     
-    # Update status
+    # Queue the render; any render worker node picks it up
     user_template.status = "rendering"
-    await db.commit()
-    
-    # Start rendering in background
-    template_service = TemplateService(db)
-    background_tasks.add_task(
-        template_service.render_template,
-        user_template_id=user_template.id,
+    user_template.render_progress = 0
+    user_template.error_message = None
+    enqueue_render(
+        db,
+        user_template,
         output_format=request.output_format,
         quality=request.quality,
         watermark=request.watermark,
+        preview_scale=request.preview_scale if request.preview else None,
     )
     
-    # Deduct credits
-    current_user.credits_remaining -= 1
+    # Deduct credits (previews are free)
+    if not request.preview:
+        current_user.credits_remaining -= 1
     await db.commit()
+    render_queue.wake()
     
     return RenderStatusResponse(
         user_template_id=user_template.id,
@@ -476,10 +519,80 @@ async def get_render_status(
         progress=user_template.render_progress,
         output_url=user_template.output_url,
         thumbnail_url=user_template.thumbnail_url,
+        preview_url=user_template.preview_url,
         error_message=user_template.error_message,
     )
 
 
+async def _render_status_snapshot(db: AsyncSession, user_template_id: UUID, user_id: UUID) -> Optional[tuple]:
+    """(event, data) for a render's current state, matching TemplateService._publish_status."""
+    result = await db.execute(
+        select(
+            UserTemplate.status,
+            UserTemplate.render_progress,
+            UserTemplate.output_url,
+            UserTemplate.thumbnail_url,
+            UserTemplate.preview_url,
+            UserTemplate.error_message,
+        ).where(
+            UserTemplate.id == user_template_id,
+            UserTemplate.user_id == user_id,
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    event = row[0] if row[0] in ("completed", "failed") else "progress"
+    return event, {
+        "status": row[0],
+        "progress": row[1],
+        "output_url": row[2],
+        "thumbnail_url": row[3],
+        "preview_url": row[4],
+        "error_message": row[5],
+    }
+
+
+@router.get(
+    "/render/{user_template_id}/events",
+    summary="Stream render progress",
+    description="Server-Sent Events stream of render progress; ends when the render completes or fails.",
+)
+async def stream_render_events(
+    user_template_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Push alternative to polling GET /templates/render/{id}/status."""
+    snapshot = await _render_status_snapshot(db, user_template_id, current_user.id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Template not found",
+        )
+    await db.commit()
+    user_id = current_user.id
+
+    async def load_snapshot():
+        async with AsyncSessionLocal() as session:
+            return await _render_status_snapshot(session, user_template_id, user_id)
+
+    return sse_response(channel_name("template", user_template_id), [snapshot], load_snapshot)
+
+
+def _check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Tag a catalogue response with ``etag``; returns a 304 response to send
+    instead when the client's If-None-Match already names it.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    sent = request.headers.get("if-none-match", "")
+    if sent.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in sent.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
 def get_hindi_category_name(category: TemplateCategory) -> str:
     """Get Hindi name for category."""
     names = {
@@ -10,7 +10,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.thumbnail import Thumbnail, ThumbnailStatus, ThumbnailStyle
@@ -28,6 +28,7 @@ from app.schemas.thumbnail import (
 )
 from app.services.thumbnail_service import ThumbnailService, THUMBNAIL_FORMULAS
 from app.services.font_service import list_fonts, ensure_core_fonts
+from app.services.job_events import sse_response, channel_name
 
 router = APIRouter()
 
@@ -199,6 +200,58 @@ async def get_thumbnail(
     return thumbnail
 
 
+async def _thumbnail_status_snapshot(db: AsyncSession, thumbnail_id: UUID, user_id: UUID) -> Optional[tuple]:
+    """(event, data) for a thumbnail's current generation status."""
+    result = await db.execute(
+        select(
+            Thumbnail.status,
+            Thumbnail.output_url,
+            Thumbnail.output_variants,
+            Thumbnail.error_message,
+        ).where(
+            Thumbnail.id == thumbnail_id,
+            Thumbnail.user_id == user_id,
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    status_value = row[0].value
+    return status_value, {
+        "status": status_value,
+        "output_url": row[1],
+        "output_variants": row[2],
+        "error_message": row[3],
+    }
+
+
+@router.get(
+    "/{thumbnail_id}/events",
+    summary="Stream thumbnail progress",
+    description="Server-Sent Events stream of generation status and each variant as it is uploaded.",
+)
+async def stream_thumbnail_events(
+    thumbnail_id: UUID,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+):
+    """Push stream replacing polling of GET /thumbnails/{id}."""
+    snapshot = await _thumbnail_status_snapshot(db, thumbnail_id, current_user.id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Thumbnail not found",
+        )
+    await db.commit()
+    user_id = current_user.id
+
+    async def load_snapshot():
+        async with AsyncSessionLocal() as session:
+            return await _thumbnail_status_snapshot(session, thumbnail_id, user_id)
+
+    return sse_response(channel_name("thumbnail", thumbnail_id), [snapshot], load_snapshot)
+
+
 @router.patch(
     "/{thumbnail_id}",
     response_model=ThumbnailResponse,
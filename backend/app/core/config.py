@@ -43,6 +43,13 @@ class Settings(BaseSettings):
     
     # Whisper API Settings
     WHISPER_MODEL: str = "whisper-1"
+
+    # Caption Translation Settings
+    TRANSLATION_MODEL: str = "gpt-4-turbo-preview"
+    TRANSLATION_BATCH_MAX_TOKENS: int = 1500  # estimated input tokens per request
+    TRANSLATION_BATCH_MAX_SEGMENTS: int = 40
+    TRANSLATION_MAX_CONCURRENCY: int = 4
+    TRANSLATION_CACHE_SIZE: int = 20000  # normalised phrases kept per process
     
     # AWS S3 Settings (if using S3)
     AWS_ACCESS_KEY_ID: Optional[str] = None
@@ -61,7 +68,64 @@ class Settings(BaseSettings):
     # FFmpeg Settings
     FFMPEG_PATH: str = "/usr/bin/ffmpeg"
     FFPROBE_PATH: str = "/usr/bin/ffprobe"
-    
+    FFMPEG_MAX_CONCURRENT: int = 0  # 0 = one FFmpeg process per CPU core
+    FFMPEG_TIMEOUT_SECONDS: int = 900
+    FFMPEG_STDERR_MAX_BYTES: int = 64 * 1024  # stderr tail kept for error messages
+    
+    # Caption Burn-in Queue
+    BURN_MAX_CONCURRENT_JOBS: int = 0  # 0 = auto: one encode per 4 CPU cores
+    BURN_TIMEOUT_SECONDS: int = 1800
+    BURN_JOB_STALE_SECONDS: int = 120  # running jobs without a heartbeat this long are resumed
+    
+    # Bulk Caption Ingest
+    CAPTION_INGEST_WORKERS: int = 2  # transcriptions running at once per API process
+    CAPTION_INGEST_POLL_SECONDS: float = 5.0  # idle workers look for queued items this often
+    CAPTION_INGEST_STALE_SECONDS: int = 300  # running items without a heartbeat this long are re-queued
+    CAPTION_BATCH_MAX_ITEMS: int = 500  # URLs per manifest
+    
+    # Template Render Workers
+    RENDER_WORKER_EMBEDDED: bool = True  # API processes render too; disable when running app.render_worker
+    RENDER_WORKER_CONCURRENCY: int = 0  # renders at once per node; 0 = auto: one per 4 CPU cores
+    RENDER_WORKER_POLL_SECONDS: float = 2.0  # idle workers look for queued jobs this often
+    RENDER_WORKER_DRAIN_SECONDS: float = 600.0  # on shutdown, running renders get this long before being re-queued
+    RENDER_JOB_STALE_SECONDS: int = 120  # running jobs without a heartbeat this long are re-queued
+    RENDER_JOB_MAX_ATTEMPTS: int = 3
+    RENDER_JOB_RETRY_BACKOFF_SECONDS: float = 30.0  # doubled after every failed attempt
+    
+    # Encoder Profiles (x264 preset per quality tier, measured per machine)
+    ENCODER_PROFILE_PATH: str = "/tmp/contentkaro-encoder-profiles.json"
+    ENCODER_BENCHMARK_ON_STARTUP: bool = True  # benchmark in the background when nothing is stored for this machine (one process per host)
+    ENCODER_BENCHMARK_SECONDS: float = 2.0
+    
+    # Segmented Encoding (parallel time ranges, concatenated losslessly)
+    SEGMENTED_ENCODE_ENABLED: bool = True
+    SEGMENTED_ENCODE_MIN_SECONDS: float = 120.0  # shorter encodes run as a single process
+    SEGMENTED_ENCODE_MIN_SEGMENT_SECONDS: float = 20.0
+    SEGMENTED_ENCODE_WORKERS: int = 0  # 0 = auto: one segment per 2 CPU cores
+    
+    # Scene Detection
+    SCENE_CUT_THRESHOLD: float = 0.3  # FFmpeg scene score (0-1) that counts as a cut
+    SCENE_SNAP_TOLERANCE: float = 0.25  # seconds; caption boundaries this close to a cut snap to it
+    
+    # Silence Trimming (voice activity detection before transcription)
+    VAD_ENABLED: bool = True
+    VAD_NOISE_DB: int = -35  # audio below this level counts as silence
+    VAD_MIN_SILENCE_SECONDS: float = 1.0  # shorter pauses are kept
+    VAD_PADDING_SECONDS: float = 0.25  # kept on each side of a cut so words are not clipped
+    VAD_MIN_SAVED_SECONDS: float = 2.0  # skip trimming when it would save less than this
+
+    # Karaoke Captions
+    KARAOKE_MAX_WORDS_PER_LINE: int = 4  # word mode: words shown per caption line
+    KARAOKE_CACHE_SIZE: int = 64  # compiled ASS event lists kept per process
+    
+    # Job Progress Streaming (Server-Sent Events)
+    SSE_RECHECK_SECONDS: float = 15.0  # idle streams re-read job status this often
+    SSE_SEGMENT_BATCH_SIZE: int = 20  # caption segments per partial-result event
+    JOB_EVENTS_RELAY: bool = True  # share job events between API and worker processes over Redis (REDIS_URL)
+    JOB_EVENTS_REDIS_CHANNEL: str = "contentkaro:job-events"
+    JOB_EVENTS_OUTBOX_SIZE: int = 1024  # events waiting for Redis; the oldest are dropped beyond this
+    JOB_EVENTS_RETRY_SECONDS: float = 2.0  # reconnect delay after losing Redis
+
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
@@ -84,6 +148,18 @@ class Settings(BaseSettings):
     
     # Template Settings
     TEMPLATES_PER_CATEGORY: int = 10
+    TEMPLATE_PLAN_CACHE_SIZE: int = 256  # compiled render plans kept per process
+    TEMPLATE_ASSET_CONCURRENCY: int = 4  # parallel asset downloads per render
+    TEMPLATE_ASSET_TIMEOUT_SECONDS: float = 60.0
+    TEMPLATE_ASSET_MAX_VIDEO_MB: int = 300
+    TEMPLATE_ASSET_MAX_IMAGE_MB: int = 20
+    TEMPLATE_ASSET_CACHE_DIR: str = "/tmp/contentkaro-asset-cache"
+    TEMPLATE_ASSET_CACHE_MAX_MB: int = 2048  # least-recently-used files evicted beyond this
+    TEMPLATE_PREVIEW_FPS: int = 15  # preview renders never exceed this frame rate
+    TEMPLATE_PREVIEW_CRF: int = 30
+    TEMPLATE_RENDER_CACHE_TTL_DAYS: int = 30  # reuse identical finished renders this long
+    TEMPLATE_POSTER_CANDIDATES: int = 4  # frames captured during the render; the best becomes the thumbnail
+    TEMPLATE_CATALOGUE_REFRESH_SECONDS: float = 30.0  # browse catalogue checks the templates table this often
     TEMPLATE_CATEGORIES: List[str] = [
         "festival",
         "food",
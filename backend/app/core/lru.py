@@ -0,0 +1,38 @@
+"""
+Bounded LRU Cache
+Process-wide, size-limited caches for values keyed by content or revision.
+
+Used for translations, compiled karaoke lines, caption time indexes and
+template render plans: lookups refresh an entry, and the least recently
+used entries are evicted once ``max_size`` is exceeded.
+"""
+
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded LRU mapping; ``get`` returns None for a missing key."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data: "OrderedDict[K, V]" = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
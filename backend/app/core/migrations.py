@@ -0,0 +1,47 @@
+"""
+Schema Migrations
+Bring an existing database up to the current models at startup.
+
+``create_all`` only creates missing tables; it never adds columns or
+indexes to tables that already exist. The statements below cover every
+column and index added to an existing table since the first release, are
+idempotent (``IF NOT EXISTS``) and run after ``create_all`` under an
+advisory lock, so API processes and render workers starting together
+apply them once. Add new entries at the end when a model gains a column.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.database import Base
+
+
+# Arbitrary application-wide key for pg_advisory_xact_lock
+SCHEMA_LOCK_KEY = 0x636B5F736368  # "ck_sch"
+
+SCHEMA_UPGRADES = [
+    # Caption segments in rows, export cache per revision
+    "ALTER TABLE captions ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE captions ADD COLUMN IF NOT EXISTS export_cache JSONB",
+    "CREATE INDEX IF NOT EXISTS ix_caption_segments_caption_id_segment_index "
+    "ON caption_segments (caption_id, segment_index)",
+    # Scene detection and silence trimming
+    "ALTER TABLE captions ADD COLUMN IF NOT EXISTS scene_cuts JSONB",
+    "ALTER TABLE captions ADD COLUMN IF NOT EXISTS silence_trimmed_seconds FLOAT",
+    # Template render plans, previews, encoder profiles and metrics
+    "ALTER TABLE templates ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE user_templates ADD COLUMN IF NOT EXISTS preview_url VARCHAR(1000)",
+    "ALTER TABLE user_templates ADD COLUMN IF NOT EXISTS preview_key VARCHAR(64)",
+    "ALTER TABLE user_templates ADD COLUMN IF NOT EXISTS encoder_profile VARCHAR(100)",
+    "ALTER TABLE user_templates ADD COLUMN IF NOT EXISTS encode_fps FLOAT",
+    "ALTER TABLE user_templates ADD COLUMN IF NOT EXISTS render_metrics JSONB",
+]
+
+
+async def init_schema(conn: AsyncConnection):
+    """Create missing tables, then apply SCHEMA_UPGRADES (one process at a time)."""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+    await conn.run_sync(Base.metadata.create_all)
+    for statement in SCHEMA_UPGRADES:
+        await conn.execute(text(statement))
@@ -10,8 +10,15 @@ from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.v1.router import api_router
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine
+from app.core.migrations import init_schema
 from app.core.middleware import RateLimitMiddleware, RequestLoggingMiddleware
+from app.services.burn_queue import burn_queue
+from app.services.caption_ingest_queue import ingest_queue
+from app.services.render_queue import render_queue
+from app.services.encoder_profiles import encoder_profiles
+from app.services.job_events import job_events
+from app.services.template_catalogue import template_catalogue
 
 
 @asynccontextmanager
@@ -20,17 +27,44 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting ContentKaro API...")
     
-    # Create database tables
+    # Create database tables and add columns introduced since they were created
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await init_schema(conn)
     
     print("✅ Database tables created")
+    
+    # Job progress from render workers and other replicas reaches this API's streams
+    job_events.start()
+    
+    # Pick up burn-in jobs orphaned by a previous run
+    resumed = await burn_queue.resume_stale_jobs()
+    if resumed:
+        print(f"🎬 Resumed {len(resumed)} caption burn job(s)")
+    # ...and keep sweeping for jobs left by nodes that die while we run
+    burn_queue.start()
+    
+    # Bulk caption batches are drained by a bounded worker pool
+    ingest_queue.start()
+    
+    # Template browse/search is served from memory, refreshed when the table changes
+    await template_catalogue.refresh()
+    template_catalogue.start()
+    
+    # Template renders: standalone render workers, plus this process unless disabled
+    if settings.RENDER_WORKER_EMBEDDED:
+        encoder_profiles.ensure()
+        render_queue.start()
     print(f"📍 API running at: http://localhost:{settings.PORT}")
     
     yield
     
     # Shutdown
     print("👋 Shutting down ContentKaro API...")
+    await burn_queue.shutdown()
+    await ingest_queue.shutdown()
+    await render_queue.shutdown()
+    await template_catalogue.shutdown()
+    await job_events.shutdown()
     await engine.dispose()
 
 
@@ -4,8 +4,29 @@ Models module - exports all database models.
 
 from app.models.user import User, SubscriptionTier
 from app.models.script import Script, ContentLanguage, ScriptType, ContentCategory
-from app.models.caption import Caption, CaptionSegment, CaptionFormat, CaptionStyle, TranscriptionStatus
-from app.models.template import Template, UserTemplate, TemplateCategory, TemplateType, AspectRatio
+from app.models.caption import (
+    Caption,
+    CaptionSegment,
+    CaptionBurnJob,
+    CaptionBatch,
+    CaptionBatchItem,
+    CaptionFormat,
+    CaptionStyle,
+    TranscriptionStatus,
+    BurnJobStatus,
+    BatchItemStatus,
+    KaraokeMode,
+)
+from app.models.template import (
+    Template,
+    UserTemplate,
+    RenderCacheEntry,
+    TemplateRenderJob,
+    TemplateCategory,
+    TemplateType,
+    AspectRatio,
+    RenderJobStatus,
+)
 from app.models.thumbnail import Thumbnail, ThumbnailStyle, ThumbnailStatus
 from app.models.project import Project, Hook
 
@@ -21,15 +42,24 @@ __all__ = [
     # Caption
     "Caption",
     "CaptionSegment",
+    "CaptionBurnJob",
+    "CaptionBatch",
+    "CaptionBatchItem",
     "CaptionFormat",
     "CaptionStyle",
     "TranscriptionStatus",
+    "BurnJobStatus",
+    "BatchItemStatus",
+    "KaraokeMode",
     # Template
     "Template",
     "UserTemplate",
+    "RenderCacheEntry",
+    "TemplateRenderJob",
     "TemplateCategory",
     "TemplateType",
     "AspectRatio",
+    "RenderJobStatus",
     # Thumbnail
     "Thumbnail",
     "ThumbnailStyle",
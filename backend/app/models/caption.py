@@ -5,8 +5,8 @@ Handles auto-generated video captions using Whisper API.
 
 import uuid
 from datetime import datetime
-from typing import Optional, List
-from sqlalchemy import String, Text, DateTime, Integer, Float, ForeignKey, Enum as SQLEnum
+from typing import Optional, List, Iterator
+from sqlalchemy import String, Text, DateTime, Integer, Float, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import enum
@@ -21,6 +21,10 @@ class CaptionFormat(str, enum.Enum):
     ASS = "ass"
     JSON = "json"
     TXT = "txt"
+    TTML = "ttml"
+    DFXP = "dfxp"
+    JSONL = "jsonl"
+    COLUMNAR = "columnar"
 
 
 class CaptionStyle(str, enum.Enum):
@@ -41,6 +45,30 @@ class TranscriptionStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class KaraokeMode(str, enum.Enum):
+    """How word timestamps are turned into ASS events."""
+    LINE = "line"  # one Dialogue per segment with \k sweep tags
+    WORD = "word"  # pre-baked per-word highlight events, short lines
+
+
+class BurnJobStatus(str, enum.Enum):
+    """Status of a caption burn-in render job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class BatchItemStatus(str, enum.Enum):
+    """Status of one URL in a bulk caption batch."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    DUPLICATE = "duplicate"  # already captioned; linked to the existing caption
+
+
 class Caption(Base):
     """
     Caption model for auto-generated video subtitles.
@@ -94,10 +122,11 @@ class Caption(Base):
         nullable=True,
         comment="Full transcription text with Hindi Unicode support",
     )
-    segments: Mapped[Optional[dict]] = mapped_column(
+    legacy_segments: Mapped[Optional[list]] = mapped_column(
+        "segments",
         JSONB,
         default=[],
-        comment="Timestamped segments array",
+        comment="Deprecated: segments array from before caption_segments; read-only fallback",
     )
     word_timestamps: Mapped[Optional[dict]] = mapped_column(
         JSONB,
@@ -117,6 +146,13 @@ class Caption(Base):
         comment="Language detection confidence 0-1",
     )
     
+    # Scene analysis (computed once per source video)
+    scene_cuts: Mapped[Optional[list]] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Shot change timestamps in seconds; NULL until the source is analysed",
+    )
+    
     # Processing status
     status: Mapped[TranscriptionStatus] = mapped_column(
         SQLEnum(TranscriptionStatus),
@@ -128,6 +164,11 @@ class Caption(Base):
         nullable=True,
         comment="Time taken to process",
     )
+    silence_trimmed_seconds: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+        comment="Non-speech audio cut before transcription",
+    )
     
     # Styling
     caption_style: Mapped[CaptionStyle] = mapped_column(
@@ -146,6 +187,16 @@ class Caption(Base):
         default={},
         comment="URLs to exported caption files by format",
     )
+    revision: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        comment="Bumped on every segment/style edit; part of the export cache key",
+    )
+    export_cache: Mapped[Optional[dict]] = mapped_column(
+        JSONB,
+        default={},
+        comment="Export cache: key (revision, format, options) -> {url, size_bytes}",
+    )
     
     # AI Enhancement
     is_edited: Mapped[bool] = mapped_column(default=False)
@@ -175,6 +226,54 @@ class Caption(Base):
         "Project",
         back_populates="captions",
     )
+    segment_rows: Mapped[List["CaptionSegment"]] = relationship(
+        "CaptionSegment",
+        order_by="CaptionSegment.segment_index",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        # Never loaded implicitly: list endpoints must not pay for every segment
+        lazy="raise",
+    )
+    
+    @property
+    def segments(self) -> List[dict]:
+        """Segments as plain dicts, ordered by segment_index."""
+        if self.segment_rows:
+            return [row.to_dict() for row in self.segment_rows]
+        return list(self.legacy_segments or [])
+    
+    @segments.setter
+    def segments(self, value: Optional[List[dict]]):
+        """
+        Replace all segments.
+        
+        Existing rows are updated in place so only segments that actually
+        changed are written; surplus rows are deleted.
+        """
+        value = value or []
+        rows = self.segment_rows
+        for i, data in enumerate(value):
+            if i < len(rows):
+                rows[i].apply_dict(data, segment_index=i)
+            else:
+                row = CaptionSegment()
+                row.apply_dict(data, segment_index=i)
+                rows.append(row)
+        del rows[len(value):]
+        self.legacy_segments = []
+    
+    def iter_segments(self) -> Iterator[dict]:
+        """Yield segment dicts one at a time (for streaming exporters)."""
+        if self.segment_rows:
+            for row in self.segment_rows:
+                yield row.to_dict()
+        else:
+            yield from self.legacy_segments or []
+    
+    def invalidate_exports(self):
+        """Bump the revision and drop cached exports after an edit."""
+        self.revision = (self.revision or 0) + 1
+        self.export_cache = {}
     
     def __repr__(self) -> str:
         return f"<Caption {self.title} - {self.status.value}>"
@@ -187,6 +286,9 @@ class CaptionSegment(Base):
     """
     
     __tablename__ = "caption_segments"
+    __table_args__ = (
+        Index("ix_caption_segments_caption_id_segment_index", "caption_id", "segment_index"),
+    )
     
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -196,7 +298,6 @@ class CaptionSegment(Base):
     caption_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("captions.id", ondelete="CASCADE"),
-        index=True,
     )
     
     # Timing
@@ -234,3 +335,231 @@ class CaptionSegment(Base):
         DateTime(timezone=True),
         default=datetime.utcnow,
     )
+    
+    def to_dict(self) -> dict:
+        """Serialize in the segment dict shape used by exporters and the API."""
+        return {
+            "segment_index": self.segment_index,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "text": self.text,
+            "text_english": self.text_english,
+            "confidence": self.confidence,
+            "words": self.words or None,
+        }
+    
+    def apply_dict(self, data: dict, segment_index: int):
+        """Copy segment dict fields onto this row."""
+        self.segment_index = segment_index
+        self.start_time = float(data.get("start_time") or 0)
+        self.end_time = float(data.get("end_time") or 0)
+        self.text = data.get("text") or ""
+        self.text_english = data.get("text_english")
+        self.confidence = data.get("confidence")
+        self.words = data.get("words") or []
+    
+    def __repr__(self) -> str:
+        return f"<CaptionSegment {self.caption_id}#{self.segment_index}>"
+
+
+class CaptionBurnJob(Base):
+    """
+    Queued FFmpeg job that burns captions into the source video.
+    
+    Progress and heartbeats are persisted so any API worker can report
+    status, and jobs orphaned by a restart can be resumed.
+    """
+    
+    __tablename__ = "caption_burn_jobs"
+    
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    caption_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("captions.id", ondelete="CASCADE"),
+        index=True,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+    )
+    
+    # Render options
+    style_preset_id: Mapped[str] = mapped_column(String(50), nullable=False)
+    karaoke: Mapped[bool] = mapped_column(Boolean, default=True)
+    karaoke_mode: Mapped[KaraokeMode] = mapped_column(
+        SQLEnum(KaraokeMode),
+        default=KaraokeMode.LINE,
+    )
+    caption_revision: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        comment="Caption revision the job renders",
+    )
+    
+    # Status
+    status: Mapped[BurnJobStatus] = mapped_column(
+        SQLEnum(BurnJobStatus),
+        default=BurnJobStatus.QUEUED,
+        index=True,
+    )
+    progress: Mapped[float] = mapped_column(Float, default=0, comment="0-100")
+    encode_fps: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    encode_speed: Mapped[Optional[float]] = mapped_column(
+        Float,
+        nullable=True,
+        comment="Encode speed as a multiple of realtime",
+    )
+    download_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
+    outputs: Mapped[Optional[dict]] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment="Rendition name -> URL, filled in as each output is uploaded",
+    )
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False)
+    
+    # Ownership / liveness
+    worker_id: Mapped[Optional[str]] = mapped_column(
+        String(100),
+        nullable=True,
+        comment="host:pid of the API process running the job",
+    )
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<CaptionBurnJob {self.id} - {self.status.value}>"
+
+
+class CaptionBatch(Base):
+    """
+    Bulk caption ingest: one manifest of source URLs.
+    
+    Each URL becomes a CaptionBatchItem that the ingest queue transcribes;
+    progress and throughput are aggregated from the items.
+    """
+    
+    __tablename__ = "caption_batches"
+    
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+    )
+    title: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    
+    # Options applied to every item
+    language_hint: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    word_timestamps: Mapped[bool] = mapped_column(Boolean, default=False)
+    translate_to_english: Mapped[bool] = mapped_column(Boolean, default=False)
+    
+    # Manifest accounting
+    submitted_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        comment="URLs in the manifest, before de-duplication",
+    )
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Set when the last item finishes",
+    )
+    
+    def __repr__(self) -> str:
+        return f"<CaptionBatch {self.id}>"
+
+
+class CaptionBatchItem(Base):
+    """One unique source URL of a CaptionBatch and the caption it produced."""
+    
+    __tablename__ = "caption_batch_items"
+    __table_args__ = (
+        Index("ix_caption_batch_items_status_created_at", "status", "created_at"),
+    )
+    
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    batch_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("caption_batches.id", ondelete="CASCADE"),
+        index=True,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        comment="Denormalised from the batch for per-user fair scheduling",
+    )
+    caption_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("captions.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    position: Mapped[int] = mapped_column(Integer, default=0, comment="Order in the manifest")
+    source_file_url: Mapped[str] = mapped_column(String(1000), nullable=False)
+    
+    status: Mapped[BatchItemStatus] = mapped_column(
+        SQLEnum(BatchItemStatus),
+        default=BatchItemStatus.QUEUED,
+    )
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    # Ownership / liveness
+    worker_id: Mapped[Optional[str]] = mapped_column(
+        String(100),
+        nullable=True,
+        comment="host:pid of the API process transcribing the item",
+    )
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<CaptionBatchItem {self.batch_id}#{self.position} - {self.status.value}>"
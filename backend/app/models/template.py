@@ -6,7 +6,7 @@ Handles reel/video templates for different content categories.
 import uuid
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import String, Text, DateTime, Integer, Float, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import String, Text, DateTime, Integer, Float, Boolean, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
 import enum
@@ -45,6 +45,14 @@ class AspectRatio(str, enum.Enum):
     LANDSCAPE_4_3 = "4:3"  # Traditional
 
 
+class RenderJobStatus(str, enum.Enum):
+    """Template render job states."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class Template(Base):
     """
     Video/Reel template model.
@@ -118,6 +126,12 @@ class Template(Base):
         comment="Template definition JSON with layers, animations, etc.",
     )
     
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        comment="Bumped whenever template_data changes; part of the render plan cache key",
+    )
+    
     # Customization options
     customizable_fields: Mapped[Optional[dict]] = mapped_column(
         JSONB,
@@ -213,6 +227,21 @@ class UserTemplate(Base):
     output_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
     thumbnail_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
     
+    # Latest low-resolution preview and the customisation hash it was rendered from
+    preview_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
+    preview_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    
+    # Encoder used for the last final render and how fast it went
+    encoder_profile: Mapped[Optional[str]] = mapped_column(
+        String(100),
+        nullable=True,
+        comment="e.g. 'libx264 veryfast crf18' (see encoder_profiles)",
+    )
+    encode_fps: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    
+    # Stage timings and encode/upload stats of the last render (see render_metrics)
+    render_metrics: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    
     # Status
     status: Mapped[str] = mapped_column(
         String(20),
@@ -239,3 +268,100 @@ class UserTemplate(Base):
     
     # Relationships
     template: Mapped["Template"] = relationship("Template")
+
+
+class RenderCacheEntry(Base):
+    """
+    A finished template render, shared across users.
+    
+    Keyed by a hash of everything the output depends on (template version,
+    resolved customisations, asset content hashes, quality and format), so
+    an identical render is served from ``output_url`` instead of encoded
+    again.
+    """
+    
+    __tablename__ = "template_render_cache"
+    
+    render_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    template_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("templates.id", ondelete="CASCADE"),
+        index=True,
+    )
+    output_url: Mapped[str] = mapped_column(String(1000), nullable=False)
+    thumbnail_url: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
+    
+    hit_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+    )
+    last_hit_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<RenderCacheEntry {self.render_key[:12]}>"
+
+
+class TemplateRenderJob(Base):
+    """
+    A queued template render.
+    
+    Render workers (``python -m app.render_worker``, or the pool embedded in
+    the API) claim jobs with ``FOR UPDATE SKIP LOCKED``, heartbeat while
+    rendering and retry transient failures with backoff.
+    """
+    
+    __tablename__ = "template_render_jobs"
+    __table_args__ = (
+        Index("ix_template_render_jobs_status_available_at", "status", "available_at"),
+    )
+    
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+    user_template_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("user_templates.id", ondelete="CASCADE"),
+        index=True,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        index=True,
+    )
+    
+    # render_template arguments
+    output_format: Mapped[str] = mapped_column(String(10), default="mp4")
+    quality: Mapped[str] = mapped_column(String(20), default="high")
+    watermark: Mapped[bool] = mapped_column(Boolean, default=False)
+    preview_scale: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    
+    # Queue state
+    status: Mapped[RenderJobStatus] = mapped_column(
+        SQLEnum(RenderJobStatus),
+        default=RenderJobStatus.QUEUED,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        comment="Not claimed before this time (retry backoff)",
+    )
+    worker_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<TemplateRenderJob {self.id} - {self.status.value}>"
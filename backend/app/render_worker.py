@@ -0,0 +1,64 @@
+"""
+ContentKaro Render Worker
+Standalone process that renders queued template videos.
+
+Run one per render node (from backend/):
+    python -m app.render_worker [--concurrency N]
+
+Workers share the Postgres queue with every other node, so render
+capacity scales independently of API replicas. SIGTERM/SIGINT drains:
+no new jobs are claimed, running renders get RENDER_WORKER_DRAIN_SECONDS
+to finish, and anything left is re-queued for another node. Set
+RENDER_WORKER_EMBEDDED=false on the API when dedicated workers run.
+Render progress reaches the API's event streams through Redis (REDIS_URL).
+"""
+
+import argparse
+import asyncio
+import signal
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.migrations import init_schema
+from app.services.encoder_profiles import encoder_profiles
+from app.services.job_events import job_events
+from app.services.render_queue import RenderQueue
+
+
+async def main(concurrency: int):
+    async with engine.begin() as conn:
+        await init_schema(conn)
+
+    queue = RenderQueue(concurrency or None)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Render progress is streamed by the API processes, relayed through Redis
+    job_events.start(listen=False)
+
+    # x264 presets measured for this machine (benchmarked in the background on first start)
+    encoder_profiles.ensure()
+    requeued = await queue.requeue_stale_jobs()
+    queue.start()
+    print(f"🎬 Render worker {queue.worker_id} running {queue.concurrency} job(s) at a time"
+          + (f", re-queued {requeued} stale job(s)" if requeued else ""))
+
+    await stop.wait()
+    print(f"👋 Draining render worker (up to {settings.RENDER_WORKER_DRAIN_SECONDS:.0f}s)...")
+    await queue.shutdown()
+    await job_events.shutdown()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="renders at once on this node (default: RENDER_WORKER_CONCURRENCY)",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency))
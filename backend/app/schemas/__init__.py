@@ -26,8 +26,16 @@ from app.schemas.caption import (
     CaptionResponse,
     CaptionListResponse,
     CaptionUpdateRequest,
+    CaptionSegmentUpdateRequest,
+    CaptionSegmentListResponse,
+    CaptionRetimeRequest,
     CaptionExportRequest,
     CaptionExportResponse,
+    CaptionBurnJobResponse,
+    CaptionBatchManifestItem,
+    CaptionBatchCreateRequest,
+    CaptionBatchItemResponse,
+    CaptionBatchResponse,
 )
 from app.schemas.template import (
     TemplateCustomizationField,
@@ -72,8 +80,16 @@ __all__ = [
     "CaptionResponse",
     "CaptionListResponse",
     "CaptionUpdateRequest",
+    "CaptionSegmentUpdateRequest",
+    "CaptionSegmentListResponse",
+    "CaptionRetimeRequest",
     "CaptionExportRequest",
     "CaptionExportResponse",
+    "CaptionBurnJobResponse",
+    "CaptionBatchManifestItem",
+    "CaptionBatchCreateRequest",
+    "CaptionBatchItemResponse",
+    "CaptionBatchResponse",
     # Template
     "TemplateCustomizationField",
     "ColorScheme",
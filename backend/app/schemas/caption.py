@@ -4,11 +4,11 @@ Request/Response validation for caption generation endpoints.
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from uuid import UUID
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 
-from app.models.caption import CaptionFormat, CaptionStyle, TranscriptionStatus
+from app.models.caption import CaptionFormat, CaptionStyle, TranscriptionStatus, BurnJobStatus, BatchItemStatus, KaraokeMode
 
 
 class CaptionSegmentSchema(BaseModel):
@@ -93,9 +93,11 @@ class CaptionResponse(BaseModel):
     segments: Optional[List[CaptionSegmentSchema]] = None
     detected_language: Optional[str] = None
     language_confidence: Optional[float] = None
+    scene_cuts: Optional[List[float]] = Field(None, description="Detected shot changes (seconds)")
     status: TranscriptionStatus
     error_message: Optional[str] = None
     processing_time_seconds: Optional[float] = None
+    silence_trimmed_seconds: Optional[float] = Field(None, description="Silence cut before transcription (seconds)")
     caption_style: CaptionStyle
     style_settings: Optional[dict] = None
     exported_formats: Optional[dict] = None
@@ -127,6 +129,52 @@ class CaptionUpdateRequest(BaseModel):
     style_settings: Optional[CaptionStyleSettings] = None
 
 
+class CaptionSegmentUpdateRequest(BaseModel):
+    """Request schema for editing a single caption segment."""
+    
+    text: Optional[str] = Field(None, description="Segment text - supports Hindi Unicode")
+    text_english: Optional[str] = None
+    start_time: Optional[float] = Field(None, ge=0, description="Start time in seconds")
+    end_time: Optional[float] = Field(None, ge=0, description="End time in seconds")
+    words: Optional[List[dict]] = Field(
+        None,
+        description="Word-level timestamps for karaoke style",
+    )
+    
+    @field_validator("text", "start_time", "end_time")
+    @classmethod
+    def reject_null(cls, v):
+        """These columns are NOT NULL: omit a field to keep it, null is not a value."""
+        if v is None:
+            raise ValueError("may be omitted but not null")
+        return v
+
+
+class CaptionRetimeRequest(BaseModel):
+    """Limits for re-timing a caption's segments."""
+    
+    max_chars_per_line: int = Field(default=42, ge=10, le=200)
+    max_duration: float = Field(default=7.0, gt=0, le=30, description="Max seconds per segment")
+    min_duration: float = Field(default=0.7, ge=0, le=10, description="Min seconds per segment")
+    min_gap: float = Field(default=0.08, ge=0, le=2, description="Gap kept between consecutive segments")
+    close_gap_under: float = Field(default=0.5, ge=0, le=5, description="Close gaps shorter than this")
+    snap_tolerance: float = Field(default=0.25, ge=0, le=2, description="Max distance to snap to a shot change")
+    shot_changes: Optional[List[float]] = Field(
+        None,
+        description="Shot change timestamps (seconds) to snap to; defaults to the detected scene cuts",
+    )
+
+
+class CaptionSegmentListResponse(BaseModel):
+    """A window of caption segments."""
+    
+    caption_id: UUID
+    items: List[CaptionSegmentSchema]
+    start_index: int
+    limit: int
+    has_more: bool
+
+
 class CaptionExportRequest(BaseModel):
     """Request schema for exporting captions."""
     
@@ -150,3 +198,92 @@ class CaptionExportResponse(BaseModel):
     download_url: str
     expires_at: datetime
     file_size_bytes: int
+
+
+class CaptionBurnJobResponse(BaseModel):
+    """Status of a caption burn-in render job."""
+    
+    id: UUID
+    caption_id: UUID
+    style_preset_id: str
+    karaoke: bool
+    karaoke_mode: KaraokeMode
+    status: BurnJobStatus
+    progress: float = Field(..., description="Render progress percentage (0-100)")
+    encode_fps: Optional[float] = None
+    encode_speed: Optional[float] = Field(None, description="Encode speed relative to realtime")
+    download_url: Optional[str] = None
+    outputs: Optional[Dict[str, str]] = Field(
+        None,
+        description="Uploaded renditions by name (1080p, 720p_preview, audio)",
+    )
+    error_message: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CaptionBatchManifestItem(BaseModel):
+    """One source in a bulk caption manifest."""
+    
+    source_file_url: str = Field(..., max_length=1000, description="URL to the video/audio file")
+    title: Optional[str] = Field(
+        None,
+        max_length=500,
+        description="Caption job title (defaults to the file name)",
+    )
+
+
+class CaptionBatchCreateRequest(BaseModel):
+    """Manifest for bulk caption generation (e.g. a creator's back-catalogue)."""
+    
+    items: List[CaptionBatchManifestItem] = Field(..., min_length=1)
+    title: Optional[str] = Field(None, max_length=500, description="Batch label")
+    language_hint: Optional[str] = Field(
+        default="auto",
+        description="Language hint: auto, hi, en, or hinglish",
+    )
+    caption_style: CaptionStyle = Field(default=CaptionStyle.DEFAULT)
+    translate_to_english: bool = False
+    word_timestamps: bool = False
+    project_id: Optional[UUID] = None
+
+
+class CaptionBatchItemResponse(BaseModel):
+    """One URL of a batch and its caption."""
+    
+    id: UUID
+    position: int
+    source_file_url: str
+    caption_id: Optional[UUID] = None
+    status: BatchItemStatus
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class CaptionBatchResponse(BaseModel):
+    """Aggregate progress and throughput of a bulk caption batch."""
+    
+    id: UUID
+    title: Optional[str] = None
+    submitted_count: int = Field(..., description="URLs in the manifest")
+    total: int = Field(..., description="Unique URLs after de-duplication")
+    counts: Dict[str, int] = Field(..., description="Items per status")
+    progress: float = Field(..., description="Finished items as a percentage (0-100)")
+    media_seconds_processed: float = 0.0
+    items_per_minute: Optional[float] = None
+    media_minutes_per_minute: Optional[float] = Field(
+        None,
+        description="Source media transcribed per wall-clock minute",
+    )
+    eta_seconds: Optional[float] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -4,7 +4,7 @@ Request/Response validation for template endpoints.
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -115,8 +115,12 @@ class UserTemplateResponse(BaseModel):
     customizations: dict
     output_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     status: str
     render_progress: int
+    encoder_profile: Optional[str] = None
+    encode_fps: Optional[float] = None
+    render_metrics: Optional[dict] = None
     error_message: Optional[str] = None
     created_at: datetime
     rendered_at: Optional[datetime] = None
@@ -144,6 +148,16 @@ class RenderTemplateRequest(BaseModel):
         default=False,
         description="Add ContentKaro watermark",
     )
+    preview: bool = Field(
+        default=False,
+        description="Fast low-resolution preview instead of the final render (not charged)",
+    )
+    preview_scale: int = Field(
+        default=2,
+        ge=2,
+        le=4,
+        description="Preview downscale factor: 2 (half) or 4 (quarter resolution)",
+    )
 
 
 class RenderStatusResponse(BaseModel):
@@ -154,6 +168,7 @@ class RenderStatusResponse(BaseModel):
     progress: int = Field(ge=0, le=100)
     output_url: Optional[str] = None
     thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     estimated_time_remaining: Optional[int] = Field(
         None,
         description="Estimated seconds remaining",
@@ -175,3 +190,31 @@ class TemplateAssetUploadResponse(BaseModel):
     content_type: Optional[str] = None
     filename: Optional[str] = None
 
+
+class TemplateRenderMetrics(BaseModel):
+    """Render metrics of one template, aggregated over its recent renders."""
+
+    template_id: UUID
+    template_name: str
+    renders: int
+    cache_hits: int = 0
+    failures: Dict[str, int] = Field(default_factory=dict, description="Failed renders by stage")
+    avg_total_seconds: Optional[float] = None
+    p95_total_seconds: Optional[float] = None
+    avg_stage_seconds: Dict[str, float] = Field(
+        default_factory=dict,
+        description="assets, plan, encode, upload, poster",
+    )
+    slowest_stage: Optional[str] = None
+    avg_encode_fps: Optional[float] = None
+    avg_encode_speed: Optional[float] = None
+    avg_upload_mbps: Optional[float] = None
+    avg_sprite_seconds: Optional[float] = None
+    layers: Optional[Dict[str, int]] = None
+
+
+class RenderMetricsResponse(BaseModel):
+    """Per-template render metrics, slowest first."""
+
+    since: datetime
+    templates: List[TemplateRenderMetrics]
@@ -0,0 +1,287 @@
+"""
+Asset Prefetcher
+Concurrent, streaming downloads of template render assets with a local
+content-addressed cache.
+
+All assets of a render are fetched at once through one pooled
+``httpx.AsyncClient``, streamed to disk in chunks (never held in memory)
+and cut off as soon as they exceed their size limit. Finished files are
+stored under their SHA-256 in ``TEMPLATE_ASSET_CACHE_DIR``, with a small
+URL index beside them, so logos and B-roll shared between renders are
+downloaded once per node. Renders get a hard link to the cached file, so
+evicting the cache never pulls a file from under a running encode.
+
+Preview renders ask for downscaled proxies instead; those are derived
+once per cached file, scale and frame rate and cached beside it.
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.ffmpeg_runner import ffmpeg_runner
+
+
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+
+# Content type → extension, for URLs without one
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/webp": "webp",
+    "video/mp4": "mp4",
+    "video/quicktime": "mov",
+}
+
+
+@dataclass(frozen=True)
+class AssetRequest:
+    """One asset to fetch."""
+
+    url: str
+    max_bytes: int
+    is_video: bool = False
+
+
+@dataclass(frozen=True)
+class ProxySpec:
+    """Downscaling applied to assets of a preview render."""
+
+    scale: int  # 2 = half, 4 = quarter resolution
+    fps: int
+
+
+class AssetTooLargeError(ValueError):
+    """An asset is larger than its limit; the download was aborted."""
+
+
+def _url_extension(url: str) -> Optional[str]:
+    path = url.split("?", 1)[0].split("#", 1)[0].rsplit("/", 1)[-1]
+    if "." not in path:
+        return None
+    ext = path.rsplit(".", 1)[-1].lower()
+    return ext if ext.isalnum() and len(ext) <= 5 else None
+
+
+class AssetCache:
+    """Content-addressed file cache with a URL index, pruned least-recently-used first."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._blobs = os.path.join(directory, "blobs")
+        self._urls = os.path.join(directory, "urls")
+        self._proxies = os.path.join(directory, "proxies")
+        self._sprites = os.path.join(directory, "sprites")  # written by template_system.text_sprites
+
+    def _url_entry(self, url: str) -> str:
+        return os.path.join(self._urls, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Cached file for ``url``, or None."""
+        try:
+            with open(self._url_entry(url), "r", encoding="ascii") as f:
+                name = f.read().strip()
+        except OSError:
+            return None
+        path = os.path.join(self._blobs, name)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # mark as recently used
+        return path
+
+    def digest(self, url: str) -> Optional[str]:
+        """SHA-256 of the content last downloaded from ``url``, or None."""
+        try:
+            with open(self._url_entry(url), "r", encoding="ascii") as f:
+                return f.read().strip().split(".", 1)[0]
+        except OSError:
+            return None
+
+    def store(self, url: str, temp_path: str, digest: str, ext: str) -> str:
+        """Move a finished download into the cache (deduplicated by content) and index its URL."""
+        os.makedirs(self._blobs, exist_ok=True)
+        os.makedirs(self._urls, exist_ok=True)
+        name = f"{digest}.{ext}"
+        path = os.path.join(self._blobs, name)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            os.utime(path)
+        else:
+            os.replace(temp_path, path)
+
+        entry = self._url_entry(url)
+        with open(entry + ".tmp", "w", encoding="ascii") as f:
+            f.write(name)
+        os.replace(entry + ".tmp", entry)
+        return path
+
+    def proxy_path(self, blob_path: str, spec: ProxySpec, ext: str) -> str:
+        """Where the proxy of a cached blob lives (whether or not it exists yet)."""
+        os.makedirs(self._proxies, exist_ok=True)
+        stem = os.path.basename(blob_path).rsplit(".", 1)[0]
+        return os.path.join(self._proxies, f"{stem}_s{spec.scale}_f{spec.fps}.{ext}")
+
+    def prune(self):
+        """Delete least-recently-used blobs, proxies and text sprites until the cache fits in ``max_bytes``."""
+        entries = []
+        for directory in (self._blobs, self._proxies, self._sprites):
+            try:
+                entries.extend(e for e in os.scandir(directory) if e.is_file())
+            except OSError:
+                pass
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        # URL index entries pointing at evicted blobs are ignored by lookup()
+
+
+async def _proxy(blob_path: str, request: AssetRequest, spec: ProxySpec) -> str:
+    """Downscaled copy of a cached asset for preview renders (the original if that fails)."""
+    ext = blob_path.rsplit(".", 1)[-1].lower()
+    if request.is_video:
+        ext = "mp4"
+        output_args = [
+            "-vf", f"scale=trunc(iw/{spec.scale}/2)*2:-2,fps={spec.fps}",
+            "-an", "-c:v", "libx264", "-preset", "ultrafast", "-crf", "28",
+            "-g", str(spec.fps), "-pix_fmt", "yuv420p",
+        ]
+    else:
+        ext = "jpg" if ext in ("jpg", "jpeg") else "png"  # png keeps logo transparency
+        output_args = ["-vf", f"scale=max(1\\,trunc(iw/{spec.scale})):-1", "-frames:v", "1"]
+
+    path = asset_cache.proxy_path(blob_path, spec, ext)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    partial = f"{path}.{os.getpid()}.part.{ext}"
+    try:
+        await ffmpeg_runner.run(["-y", "-i", blob_path, *output_args, partial], timeout=600)
+        os.replace(partial, path)
+    except Exception as e:
+        print(f"Proxy for {os.path.basename(blob_path)} failed, using original: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return blob_path
+    return path
+
+
+asset_cache = AssetCache(
+    settings.TEMPLATE_ASSET_CACHE_DIR,
+    settings.TEMPLATE_ASSET_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def _link_into(source: str, dest_dir: str, name: str) -> str:
+    """Hard-link (or copy, across filesystems) a cached file into a render's directory."""
+    ext = source.rsplit(".", 1)[-1]
+    dest = os.path.join(dest_dir, f"{name}.{ext}")
+    try:
+        os.link(source, dest)
+    except OSError:
+        shutil.copyfile(source, dest)
+    return dest
+
+
+async def _download(client: httpx.AsyncClient, field_id: str, request: AssetRequest) -> str:
+    """Stream one asset into a temp file in the cache, enforcing its size limit."""
+    os.makedirs(asset_cache.directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=asset_cache.directory, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    limit_mb = request.max_bytes / (1024 * 1024)
+    try:
+        async with client.stream("GET", request.url) as response:
+            response.raise_for_status()
+            declared = int(response.headers.get("content-length") or 0)
+            if declared > request.max_bytes:
+                raise AssetTooLargeError(f"Asset '{field_id}' is larger than {limit_mb:.0f} MB")
+
+            with os.fdopen(fd, "wb") as f:
+                fd = None
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > request.max_bytes:
+                        raise AssetTooLargeError(f"Asset '{field_id}' is larger than {limit_mb:.0f} MB")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            content_type = (response.headers.get("content-type") or "").split(";", 1)[0].strip().lower()
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    ext = _url_extension(request.url) or CONTENT_TYPE_EXTENSIONS.get(content_type, "bin")
+    return asset_cache.store(request.url, temp_path, digest.hexdigest(), ext)
+
+
+async def prefetch_assets(
+    requests: Dict[str, AssetRequest],
+    dest_dir: str,
+    proxy: Optional[ProxySpec] = None,
+) -> Dict[str, str]:
+    """
+    Fetch every asset concurrently and return {field_id: local path in ``dest_dir``}.
+
+    Cached URLs are not downloaded again. With ``proxy`` the returned files
+    are downscaled proxies. Raises on the first failed or oversized asset
+    after cancelling the others.
+    """
+    if not requests:
+        return {}
+
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(max(1, settings.TEMPLATE_ASSET_CONCURRENCY))
+    limits = httpx.Limits(max_connections=max(1, settings.TEMPLATE_ASSET_CONCURRENCY))
+    timeout = httpx.Timeout(settings.TEMPLATE_ASSET_TIMEOUT_SECONDS)
+    hits = 0
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, follow_redirects=True) as client:
+
+        async def fetch(field_id: str, request: AssetRequest) -> str:
+            nonlocal hits
+            cached = asset_cache.lookup(request.url)
+            if cached is None or os.path.getsize(cached) > request.max_bytes:
+                async with semaphore:
+                    cached = await _download(client, field_id, request)
+            else:
+                hits += 1
+            if proxy is not None:
+                cached = await _proxy(cached, request, proxy)
+            return _link_into(cached, dest_dir, field_id)
+
+        tasks = {field_id: asyncio.create_task(fetch(field_id, request)) for field_id, request in requests.items()}
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+    asset_cache.prune()
+    print(
+        f"Prefetched {len(requests)} asset(s) ({hits} from cache) "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    return {field_id: task.result() for field_id, task in tasks.items()}
@@ -0,0 +1,340 @@
+"""
+Caption Burn-in Queue
+Runs FFmpeg burn-in renders outside the request cycle.
+
+Jobs are persisted in ``caption_burn_jobs``; each API process runs a
+bounded number of encodes at once (sized to the CPU count), writes
+throttled progress and heartbeats, and honours cancellation requests
+made from any process. Jobs whose heartbeat goes stale (crashed or
+restarted worker) are picked up again by a periodic sweep on every
+live process.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, or_
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.caption import Caption, CaptionBurnJob, BurnJobStatus
+from app.services.caption_service import CaptionService
+from app.services.ffmpeg_runner import FFmpegProgress
+from app.services.job_events import job_events, channel_name
+
+
+# Minimum seconds between progress writes for one job
+PROGRESS_WRITE_INTERVAL = 2.0
+
+# Seconds between heartbeats / cancellation checks while a job runs
+HEARTBEAT_INTERVAL = 15.0
+
+
+def stale_cutoff() -> datetime:
+    """Jobs whose last heartbeat is older than this belong to a dead worker."""
+    return datetime.utcnow() - timedelta(seconds=settings.BURN_JOB_STALE_SECONDS)
+
+
+def is_stale(heartbeat_at: Optional[datetime]) -> bool:
+    """Whether a job last heard from at ``heartbeat_at`` has lost its worker."""
+    if heartbeat_at is None:
+        return True
+    if heartbeat_at.tzinfo:
+        heartbeat_at = heartbeat_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return heartbeat_at < stale_cutoff()
+
+
+class BurnQueue:
+    """Per-process scheduler for caption burn-in jobs."""
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        cpu_count = os.cpu_count() or 1
+        # libx264 already scales across cores, so run few encodes with many
+        # threads each rather than one encode per core.
+        self.max_concurrent = max_concurrent or settings.BURN_MAX_CONCURRENT_JOBS or max(1, cpu_count // 4)
+        self.threads_per_job = max(1, cpu_count // self.max_concurrent)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._tasks: Dict[UUID, asyncio.Task] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._draining = False
+
+    def start(self):
+        """Start the stale-job sweep."""
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_stale())
+
+    def submit(self, job_id: UUID):
+        """Schedule a queued job on this process."""
+        if job_id in self._tasks or self._draining:
+            return
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    def cancel_local(self, job_id: UUID) -> bool:
+        """Cancel a job if it is scheduled on this process."""
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def resume_stale_jobs(self) -> List[UUID]:
+        """
+        Claim queued/running jobs whose worker stopped heartbeating.
+
+        Called at startup and by the periodic sweep; jobs left by a previous
+        run of this process, or by a dead node, are re-queued here and
+        rendered from the start.
+        """
+        cutoff = stale_cutoff()
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(CaptionBurnJob.id)
+                .where(
+                    CaptionBurnJob.status.in_([BurnJobStatus.QUEUED, BurnJobStatus.RUNNING]),
+                    or_(
+                        CaptionBurnJob.heartbeat_at.is_(None),
+                        CaptionBurnJob.heartbeat_at < cutoff,
+                    ),
+                )
+                .order_by(CaptionBurnJob.created_at)
+                .with_for_update(skip_locked=True)
+            )
+            job_ids = list(result.scalars())
+
+            if job_ids:
+                await db.execute(
+                    update(CaptionBurnJob)
+                    .where(CaptionBurnJob.id.in_(job_ids))
+                    .values(
+                        status=BurnJobStatus.QUEUED,
+                        progress=0,
+                        worker_id=self.worker_id,
+                        heartbeat_at=datetime.utcnow(),
+                    )
+                )
+            await db.commit()
+
+        for job_id in job_ids:
+            self.submit(job_id)
+        return job_ids
+
+    async def shutdown(self):
+        """
+        Stop local jobs without marking them cancelled.
+
+        Interrupted jobs are put back in the queue so the next process
+        to start resumes them.
+        """
+        self._draining = True
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _sweep_stale(self):
+        interval = max(1.0, settings.BURN_JOB_STALE_SECONDS / 2)
+        while True:
+            try:
+                await self._touch_waiting_jobs()
+                await self.resume_stale_jobs()
+            except Exception as e:
+                print(f"Burn queue stale sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def _touch_waiting_jobs(self):
+        """Refresh the heartbeat of queued jobs waiting for a slot here, so no other node claims them."""
+        if not self._tasks:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(CaptionBurnJob)
+                .where(
+                    CaptionBurnJob.id.in_(list(self._tasks)),
+                    CaptionBurnJob.status == BurnJobStatus.QUEUED,
+                    CaptionBurnJob.worker_id == self.worker_id,
+                )
+                .values(heartbeat_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def _run(self, job_id: UUID):
+        async with self._semaphore:
+            async with AsyncSessionLocal() as db:
+                # Atomic claim: only the process that owns the queued job runs it
+                claimed = await db.execute(
+                    update(CaptionBurnJob)
+                    .where(
+                        CaptionBurnJob.id == job_id,
+                        CaptionBurnJob.status == BurnJobStatus.QUEUED,
+                        CaptionBurnJob.worker_id == self.worker_id,
+                    )
+                    .values(
+                        status=BurnJobStatus.RUNNING,
+                        started_at=datetime.utcnow(),
+                        heartbeat_at=datetime.utcnow(),
+                        progress=0,
+                    )
+                    .returning(CaptionBurnJob.caption_id)
+                )
+                caption_id = claimed.scalar_one_or_none()
+                await db.commit()
+                if caption_id is None:
+                    return
+
+                job = await db.get(CaptionBurnJob, job_id)
+                caption = await db.get(Caption, caption_id, options=[selectinload(Caption.segment_rows)])
+
+                heartbeat = asyncio.create_task(self._heartbeat(job_id))
+                try:
+                    if caption is None:
+                        raise ValueError("Caption not found")
+
+                    service = CaptionService(db)
+                    url = await asyncio.wait_for(
+                        service.burn_captions_to_video(
+                            caption=caption,
+                            style_preset_id=job.style_preset_id,
+                            karaoke=job.karaoke,
+                            karaoke_mode=job.karaoke_mode,
+                            on_progress=self._progress_writer(job_id),
+                            threads=self.threads_per_job,
+                            on_output=self._output_writer(job_id),
+                        ),
+                        timeout=settings.BURN_TIMEOUT_SECONDS,
+                    )
+                except asyncio.CancelledError:
+                    if self._draining:
+                        await self._finish(job_id, BurnJobStatus.QUEUED, progress=0, heartbeat_at=None)
+                    else:
+                        await self._finish(job_id, BurnJobStatus.CANCELLED)
+                    raise
+                except asyncio.TimeoutError:
+                    await self._finish(
+                        job_id,
+                        BurnJobStatus.FAILED,
+                        error_message=f"Render timed out after {settings.BURN_TIMEOUT_SECONDS}s",
+                    )
+                except Exception as e:
+                    print(f"Caption burn job {job_id} failed: {e}")
+                    await self._finish(job_id, BurnJobStatus.FAILED, error_message=str(e)[:2000])
+                else:
+                    await self._finish(job_id, BurnJobStatus.COMPLETED, progress=100, download_url=url)
+                finally:
+                    heartbeat.cancel()
+
+    def _progress_writer(self, job_id: UUID):
+        """Return an FFmpeg progress callback that persists at most every few seconds."""
+        last_write = 0.0
+        channel = channel_name("burn", job_id)
+
+        async def on_progress(event: FFmpegProgress):
+            nonlocal last_write
+            # Streams get every event; the database only a throttled subset
+            job_events.publish(channel, "progress", {
+                "job_id": str(job_id),
+                "status": BurnJobStatus.RUNNING.value,
+                "progress": round(event.percent, 1),
+                "encode_fps": event.fps or None,
+            })
+            now = time.monotonic()
+            if now - last_write < PROGRESS_WRITE_INTERVAL and not event.done:
+                return
+            last_write = now
+
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(CaptionBurnJob)
+                    .where(CaptionBurnJob.id == job_id)
+                    .values(
+                        progress=round(event.percent, 1),
+                        encode_fps=event.fps or None,
+                        encode_speed=event.speed or None,
+                        heartbeat_at=datetime.utcnow(),
+                    )
+                )
+                await db.commit()
+
+        return on_progress
+
+    def _output_writer(self, job_id: UUID):
+        """Return a callback recording each rendition URL as soon as it is uploaded."""
+        outputs: Dict[str, str] = {}
+        channel = channel_name("burn", job_id)
+
+        async def on_output(name: str, url: str):
+            outputs[name] = url
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(CaptionBurnJob)
+                    .where(CaptionBurnJob.id == job_id)
+                    .values(outputs=dict(outputs))
+                )
+                await db.commit()
+            job_events.publish(channel, "output", {"job_id": str(job_id), "rendition": name, "url": url})
+
+        return on_output
+
+    async def _heartbeat(self, job_id: UUID):
+        """Keep the job's heartbeat fresh and stop it when cancellation is requested."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            # A failed beat is retried next interval; ending the loop would let the
+            # stale sweep re-queue a job that is still running
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        update(CaptionBurnJob)
+                        .where(CaptionBurnJob.id == job_id)
+                        .values(heartbeat_at=datetime.utcnow())
+                        .returning(CaptionBurnJob.cancel_requested)
+                    )
+                    cancel_requested = result.scalar_one_or_none()
+                    await db.commit()
+            except Exception as e:
+                print(f"Burn job {job_id} heartbeat failed: {e}")
+                continue
+            if cancel_requested:
+                self.cancel_local(job_id)
+                return
+
+    async def _finish(self, job_id: UUID, status: BurnJobStatus, **values):
+        """Record a job's final state in a fresh session."""
+        values.setdefault("heartbeat_at", datetime.utcnow())
+        if status != BurnJobStatus.QUEUED:
+            values["finished_at"] = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(CaptionBurnJob)
+                .where(CaptionBurnJob.id == job_id)
+                .values(status=status, **values)
+            )
+            await db.commit()
+
+        # Terminal states end the job's event stream; a re-queue is plain progress
+        event = "progress" if status == BurnJobStatus.QUEUED else status.value
+        job_events.publish(channel_name("burn", job_id), event, {
+            "job_id": str(job_id),
+            "status": status.value,
+            "progress": values.get("progress"),
+            "download_url": values.get("download_url"),
+            "error_message": values.get("error_message"),
+        })
+
+
+# Process-wide queue used by the API endpoints.
+burn_queue = BurnQueue()
@@ -0,0 +1,315 @@
+"""
+Caption Exporters
+Registry of streaming writers, one per CaptionFormat.
+
+Each exporter is a generator that takes a caption and ExportOptions and
+yields ``str`` or ``bytes`` chunks, one segment (or one row group) at a
+time, so memory does not grow with transcript length. New formats are
+added with ``@register_exporter`` and are picked up by
+CaptionService.export_captions and the download endpoint automatically.
+
+Built-in formats: SRT, WebVTT, ASS (registered by caption_service),
+JSON, plain text, TTML, DFXP, JSON Lines and a binary columnar dump.
+"""
+
+import json
+import math
+import struct
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from xml.sax.saxutils import escape
+
+from app.models.caption import Caption, CaptionFormat
+
+
+Chunk = Union[str, bytes]
+ExportWriter = Callable[[Caption, "ExportOptions"], Iterable[Chunk]]
+
+
+@dataclass
+class ExportOptions:
+    """Options passed to every exporter."""
+
+    include_translation: bool = False
+    style_settings: Any = None  # CaptionStyleSettings, used by ASS
+    service: Any = None  # CaptionService, for exporters that need its helpers
+
+
+@dataclass(frozen=True)
+class CaptionExporter:
+    """A registered export format."""
+
+    format: CaptionFormat
+    extension: str
+    content_type: str
+    writer: ExportWriter
+
+    def iter_bytes(self, caption: Caption, options: ExportOptions) -> Iterator[bytes]:
+        """Run the writer, encoding text chunks as UTF-8."""
+        for chunk in self.writer(caption, options):
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+EXPORTERS: Dict[CaptionFormat, CaptionExporter] = {}
+
+
+def register_exporter(format: CaptionFormat, extension: str, content_type: str):
+    """Decorator registering ``writer`` as the exporter for ``format``."""
+
+    def decorator(writer: ExportWriter) -> ExportWriter:
+        EXPORTERS[format] = CaptionExporter(format, extension, content_type, writer)
+        return writer
+
+    return decorator
+
+
+def get_exporter(format: CaptionFormat) -> CaptionExporter:
+    exporter = EXPORTERS.get(format)
+    if exporter is None:
+        raise ValueError(f"No exporter registered for format: {format}")
+    return exporter
+
+
+# --- time formatting ---
+
+def _split_time(seconds: float) -> Tuple[int, int, int, int]:
+    millis_total = int(round(max(0.0, float(seconds)) * 1000))
+    hours, rest = divmod(millis_total, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    secs, millis = divmod(rest, 1000)
+    return hours, minutes, secs, millis
+
+
+def format_srt_time(seconds: float) -> str:
+    """HH:MM:SS,mmm"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds % 1) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def format_vtt_time(seconds: float) -> str:
+    """HH:MM:SS.mmm"""
+    return format_srt_time(seconds).replace(",", ".")
+
+
+def format_clock_time(seconds: float) -> str:
+    """TTML clock time HH:MM:SS.mmm (rounded to the millisecond)."""
+    hours, minutes, secs, millis = _split_time(seconds)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def _text(segment: dict, include_translation: bool) -> str:
+    text = segment.get("text") or ""
+    if include_translation and segment.get("text_english"):
+        text = f"{text}\n{segment['text_english']}"
+    return text
+
+
+# --- text formats ---
+
+@register_exporter(CaptionFormat.SRT, ".srt", "application/x-subrip; charset=utf-8")
+def export_srt(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """SubRip, one cue per chunk."""
+    for i, segment in enumerate(caption.iter_segments(), 1):
+        start = format_srt_time(segment["start_time"])
+        end = format_srt_time(segment["end_time"])
+        separator = "\n" if i > 1 else ""
+        yield f"{separator}{i}\n{start} --> {end}\n{_text(segment, options.include_translation)}\n"
+
+
+@register_exporter(CaptionFormat.VTT, ".vtt", "text/vtt; charset=utf-8")
+def export_vtt(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """WebVTT, one cue per chunk."""
+    yield "WEBVTT\n"
+    for i, segment in enumerate(caption.iter_segments(), 1):
+        start = format_vtt_time(segment["start_time"])
+        end = format_vtt_time(segment["end_time"])
+        yield f"\n{i}\n{start} --> {end}\n{_text(segment, options.include_translation)}\n"
+
+
+@register_exporter(CaptionFormat.JSON, ".json", "application/json; charset=utf-8")
+def export_json(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """Segments as a compact JSON array, one segment per line."""
+    empty = True
+    for segment in caption.iter_segments():
+        body = json.dumps(segment, ensure_ascii=False, separators=(",", ":"))
+        yield ("[\n" if empty else ",\n") + body
+        empty = False
+    yield "[]" if empty else "\n]"
+
+
+@register_exporter(CaptionFormat.TXT, ".txt", "text/plain; charset=utf-8")
+def export_txt(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    yield caption.transcription_text or ""
+
+
+@register_exporter(CaptionFormat.JSONL, ".jsonl", "application/x-ndjson; charset=utf-8")
+def export_jsonl(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """One compact JSON object per segment, tagged with caption id and language."""
+    caption_id = str(caption.id)
+    language = caption.detected_language
+    for segment in caption.iter_segments():
+        row = {"caption_id": caption_id, "language": language, **segment}
+        if not options.include_translation:
+            row.pop("text_english", None)
+        yield json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _iter_ttml(caption: Caption, options: ExportOptions, namespace: str) -> Iterator[str]:
+    language = escape(caption.detected_language or "und", {'"': "&quot;"})
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<tt xmlns="{namespace}" xml:lang="{language}">\n'
+        "  <body>\n"
+        "    <div>\n"
+    )
+    for segment in caption.iter_segments():
+        lines = _text(segment, options.include_translation).split("\n")
+        body = "<br/>".join(escape(line) for line in lines)
+        yield (
+            f'      <p begin="{format_clock_time(segment["start_time"])}" '
+            f'end="{format_clock_time(segment["end_time"])}">{body}</p>\n'
+        )
+    yield "    </div>\n  </body>\n</tt>\n"
+
+
+@register_exporter(CaptionFormat.TTML, ".ttml", "application/ttml+xml; charset=utf-8")
+def export_ttml(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """W3C TTML 1 (IMSC-compatible clock times)."""
+    return _iter_ttml(caption, options, "http://www.w3.org/ns/ttml")
+
+
+@register_exporter(CaptionFormat.DFXP, ".dfxp", "application/ttaf+xml; charset=utf-8")
+def export_dfxp(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """Legacy DFXP (TTML draft namespace) for older players and ingest tools."""
+    return _iter_ttml(caption, options, "http://www.w3.org/2006/10/ttaf1")
+
+
+# --- binary columnar ---
+#
+# Layout (all integers little-endian):
+#   magic  b"CKCOL\x01"
+#   uint16 column count, then per column: uint8 name length, name (ASCII), uint8 type code
+#   row groups: uint32 row count (0 ends the file), then each column's data:
+#     "d" float64 x n | "f" float32 x n (NaN = null) | "I" uint32 x n
+#     "s" validity bitmap (ceil(n/8) bytes, LSB first), uint32 offsets x (n+1), UTF-8 blob
+
+COLUMNAR_MAGIC = b"CKCOL\x01"
+COLUMNAR_ROW_GROUP_SIZE = 4096
+COLUMNAR_COLUMNS: List[Tuple[str, str]] = [
+    ("segment_index", "I"),
+    ("start_time", "d"),
+    ("end_time", "d"),
+    ("confidence", "f"),
+    ("word_count", "I"),
+    ("text", "s"),
+    ("text_english", "s"),
+]
+
+
+def _columnar_header() -> bytes:
+    parts = [COLUMNAR_MAGIC, struct.pack("<H", len(COLUMNAR_COLUMNS))]
+    for name, type_code in COLUMNAR_COLUMNS:
+        encoded = name.encode("ascii")
+        parts.append(struct.pack("<B", len(encoded)) + encoded + type_code.encode("ascii"))
+    return b"".join(parts)
+
+
+def _pack_numbers(type_code: str, values: List[Any]) -> bytes:
+    data = array(type_code, values)
+    if data.itemsize != struct.calcsize(type_code) or struct.pack("=I", 1) != struct.pack("<I", 1):
+        # Non-standard platform sizes / big-endian: fall back to struct
+        return struct.pack(f"<{len(values)}{type_code}", *values)
+    return data.tobytes()
+
+
+def _pack_strings(values: List[Optional[str]]) -> bytes:
+    validity = bytearray((len(values) + 7) // 8)
+    offsets = [0]
+    blob = bytearray()
+    for i, value in enumerate(values):
+        if value is not None:
+            validity[i // 8] |= 1 << (i % 8)
+            blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return bytes(validity) + _pack_numbers("I", offsets) + bytes(blob)
+
+
+def _columnar_row_group(rows: List[dict]) -> bytes:
+    parts = [struct.pack("<I", len(rows))]
+    for name, type_code in COLUMNAR_COLUMNS:
+        if name == "word_count":
+            values = [len(r.get("words") or []) for r in rows]
+        else:
+            values = [r.get(name) for r in rows]
+        if type_code == "s":
+            parts.append(_pack_strings(values))
+        elif type_code == "f":
+            parts.append(_pack_numbers("f", [math.nan if v is None else float(v) for v in values]))
+        elif type_code == "d":
+            parts.append(_pack_numbers("d", [float(v or 0) for v in values]))
+        else:
+            parts.append(_pack_numbers("I", [int(v or 0) for v in values]))
+    return b"".join(parts)
+
+
+@register_exporter(CaptionFormat.COLUMNAR, ".ckcol", "application/octet-stream")
+def export_columnar(caption: Caption, options: ExportOptions) -> Iterator[bytes]:
+    """Segments as column chunks in row groups of COLUMNAR_ROW_GROUP_SIZE (see read_columnar)."""
+    yield _columnar_header()
+    rows: List[dict] = []
+    for i, segment in enumerate(caption.iter_segments()):
+        if segment.get("segment_index") is None:
+            segment = {**segment, "segment_index": i}
+        rows.append(segment)
+        if len(rows) >= COLUMNAR_ROW_GROUP_SIZE:
+            yield _columnar_row_group(rows)
+            rows = []
+    if rows:
+        yield _columnar_row_group(rows)
+    yield struct.pack("<I", 0)
+
+
+def read_columnar(data: bytes) -> Dict[str, list]:
+    """Decode a columnar export into {column: values} (for analysis scripts)."""
+    if not data.startswith(COLUMNAR_MAGIC):
+        raise ValueError("Not a columnar caption export")
+    pos = len(COLUMNAR_MAGIC)
+    (count,) = struct.unpack_from("<H", data, pos)
+    pos += 2
+    columns: List[Tuple[str, str]] = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<B", data, pos)
+        pos += 1
+        name = data[pos:pos + length].decode("ascii")
+        pos += length
+        columns.append((name, chr(data[pos])))
+        pos += 1
+
+    result: Dict[str, list] = {name: [] for name, _ in columns}
+    while True:
+        (n,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        if n == 0:
+            return result
+        for name, type_code in columns:
+            if type_code == "s":
+                validity = data[pos:pos + (n + 7) // 8]
+                pos += len(validity)
+                offsets = struct.unpack_from(f"<{n + 1}I", data, pos)
+                pos += 4 * (n + 1)
+                blob = data[pos:pos + offsets[-1]]
+                pos += offsets[-1]
+                result[name].extend(
+                    blob[offsets[i]:offsets[i + 1]].decode("utf-8") if validity[i // 8] >> (i % 8) & 1 else None
+                    for i in range(n)
+                )
+            else:
+                values = struct.unpack_from(f"<{n}{type_code}", data, pos)
+                pos += n * struct.calcsize(type_code)
+                if type_code == "f":
+                    values = [None if math.isnan(v) else v for v in values]
+                result[name].extend(values)
@@ -0,0 +1,242 @@
+"""
+Caption Ingest Queue
+Bounded worker pool for bulk caption batches.
+
+Batch items are persisted in ``caption_batch_items``. Each API process
+runs ``CAPTION_INGEST_WORKERS`` workers that claim queued items with
+``FOR UPDATE SKIP LOCKED``, so any number of processes can share the
+queue. Claims are fair across users: the next item always comes from the
+user with the fewest items currently running, so one creator's
+500-video back-catalogue cannot starve everyone else. Running items
+heartbeat; items whose worker died are re-queued by a periodic sweep.
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, func, exists, or_, and_
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.caption import Caption, CaptionBatch, CaptionBatchItem, BatchItemStatus, TranscriptionStatus
+from app.services.caption_service import CaptionService
+
+
+# Seconds between heartbeats while an item is transcribed
+HEARTBEAT_INTERVAL = 30.0
+
+
+class CaptionIngestQueue:
+    """Per-process worker pool draining the shared caption batch queue."""
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or settings.CAPTION_INGEST_WORKERS)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+        self._draining = False
+
+    def start(self):
+        """Start the workers and the stale-item sweep (called at startup)."""
+        if self._tasks:
+            return
+        self._draining = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_stale()))
+
+    def wake(self):
+        """Tell idle workers that new items were queued."""
+        self._wake.set()
+
+    async def shutdown(self):
+        """Stop the workers; items they were running go back to the queue."""
+        self._draining = True
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def requeue_stale_items(self) -> int:
+        """Put RUNNING items whose worker stopped heartbeating back in the queue."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.CAPTION_INGEST_STALE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(CaptionBatchItem)
+                .where(
+                    CaptionBatchItem.status == BatchItemStatus.RUNNING,
+                    or_(
+                        CaptionBatchItem.heartbeat_at.is_(None),
+                        CaptionBatchItem.heartbeat_at < cutoff,
+                    ),
+                )
+                .values(status=BatchItemStatus.QUEUED, worker_id=None, heartbeat_at=None)
+            )
+            await db.commit()
+        if result.rowcount:
+            self.wake()
+        return result.rowcount
+
+    async def _sweep_stale(self):
+        interval = max(1.0, settings.CAPTION_INGEST_STALE_SECONDS / 2)
+        while True:
+            try:
+                await self.requeue_stale_items()
+            except Exception as e:
+                print(f"Caption ingest stale sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def _worker(self):
+        while not self._draining:
+            # Clear before claiming so a wake() during the claim is not lost
+            self._wake.clear()
+            try:
+                claimed = await self._claim()
+            except Exception as e:
+                print(f"Caption ingest claim failed: {e}")
+                claimed = None
+
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=settings.CAPTION_INGEST_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(*claimed)
+
+    async def _claim(self) -> Optional[tuple]:
+        """
+        Claim the next queued item, fairly across users.
+
+        Users are ordered by how many of their items are running right now,
+        then by queue age. Returns (item_id, batch_id, caption_id) or None.
+        """
+        running = (
+            select(CaptionBatchItem.user_id, func.count().label("running"))
+            .where(CaptionBatchItem.status == BatchItemStatus.RUNNING)
+            .group_by(CaptionBatchItem.user_id)
+            .cte("running")
+        )
+        candidate = (
+            select(CaptionBatchItem.id)
+            .outerjoin(running, running.c.user_id == CaptionBatchItem.user_id)
+            .where(CaptionBatchItem.status == BatchItemStatus.QUEUED)
+            .order_by(
+                func.coalesce(running.c.running, 0),
+                CaptionBatchItem.created_at,
+                CaptionBatchItem.position,
+            )
+            .limit(1)
+            .with_for_update(of=CaptionBatchItem, skip_locked=True)
+        )
+
+        async with AsyncSessionLocal() as db:
+            item_id = (await db.execute(candidate)).scalar_one_or_none()
+            if item_id is None:
+                await db.commit()
+                return None
+            result = await db.execute(
+                update(CaptionBatchItem)
+                .where(CaptionBatchItem.id == item_id)
+                .values(
+                    status=BatchItemStatus.RUNNING,
+                    worker_id=self.worker_id,
+                    started_at=datetime.utcnow(),
+                    heartbeat_at=datetime.utcnow(),
+                )
+                .returning(CaptionBatchItem.id, CaptionBatchItem.batch_id, CaptionBatchItem.caption_id)
+            )
+            claimed = tuple(result.one())
+            await db.commit()
+        return claimed
+
+    async def _process(self, item_id: UUID, batch_id: UUID, caption_id: Optional[UUID]):
+        heartbeat = asyncio.create_task(self._heartbeat(item_id))
+        try:
+            async with AsyncSessionLocal() as db:
+                batch = await db.get(CaptionBatch, batch_id)
+                if batch is None or caption_id is None:
+                    raise ValueError("Caption not found")
+
+                service = CaptionService(db)
+                await service.process_transcription(
+                    caption_id=caption_id,
+                    word_timestamps=batch.word_timestamps,
+                    translate=batch.translate_to_english,
+                    language_hint=batch.language_hint,
+                )
+                row = (await db.execute(
+                    select(Caption.status, Caption.error_message)
+                    .where(Caption.id == caption_id)
+                    .execution_options(populate_existing=True)
+                )).one_or_none()
+        except asyncio.CancelledError:
+            if self._draining:
+                await self._finish(item_id, BatchItemStatus.QUEUED, started_at=None, heartbeat_at=None, worker_id=None)
+            raise
+        except Exception as e:
+            print(f"Caption batch item {item_id} failed: {e}")
+            await self._finish(item_id, BatchItemStatus.FAILED, error_message=str(e)[:2000])
+        else:
+            if row is None:
+                await self._finish(item_id, BatchItemStatus.FAILED, error_message="Caption not found")
+            elif row.status == TranscriptionStatus.COMPLETED:
+                await self._finish(item_id, BatchItemStatus.COMPLETED)
+            else:
+                await self._finish(item_id, BatchItemStatus.FAILED, error_message=row.error_message)
+        finally:
+            heartbeat.cancel()
+
+        await self._close_batch_if_done(batch_id)
+
+    async def _heartbeat(self, item_id: UUID):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            # A failed beat is retried next interval; ending the loop would let the
+            # stale sweep re-queue a item that is still running
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(CaptionBatchItem)
+                        .where(CaptionBatchItem.id == item_id)
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    await db.commit()
+            except Exception as e:
+                print(f"Batch item {item_id} heartbeat failed: {e}")
+
+    async def _finish(self, item_id: UUID, status: BatchItemStatus, **values):
+        """Record an item's final (or re-queued) state in a fresh session."""
+        if status != BatchItemStatus.QUEUED:
+            values["finished_at"] = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(CaptionBatchItem)
+                .where(CaptionBatchItem.id == item_id)
+                .values(status=status, **values)
+            )
+            await db.commit()
+
+    async def _close_batch_if_done(self, batch_id: UUID):
+        """Stamp finished_at once no item of the batch is queued or running."""
+        pending = exists().where(and_(
+            CaptionBatchItem.batch_id == batch_id,
+            CaptionBatchItem.status.in_([BatchItemStatus.QUEUED, BatchItemStatus.RUNNING]),
+        ))
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(CaptionBatch)
+                .where(CaptionBatch.id == batch_id, CaptionBatch.finished_at.is_(None), ~pending)
+                .values(finished_at=datetime.utcnow())
+            )
+            await db.commit()
+
+
+# Process-wide pool used by the API endpoints.
+ingest_queue = CaptionIngestQueue()
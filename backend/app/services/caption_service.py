@@ -4,26 +4,67 @@ Auto-caption generation using OpenAI Whisper API.
 """
 
 import os
+import asyncio
 import tempfile
 import unicodedata
-import subprocess
 import json
+import hashlib
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Callable, Awaitable, Sequence
 from uuid import UUID
+from urllib.parse import urlsplit, urlunsplit
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func
+from sqlalchemy.orm import noload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import UploadFile
 import openai
 import httpx
 
 from app.core.config import settings
-from app.models.caption import Caption, CaptionFormat, CaptionStyle, TranscriptionStatus
-from app.schemas.caption import CaptionGenerateRequest, CaptionExportResponse, CaptionStyleSettings
+from app.models.caption import Caption, CaptionSegment, CaptionBatch, CaptionBatchItem, BatchItemStatus, CaptionFormat, CaptionStyle, TranscriptionStatus, KaraokeMode
+from app.schemas.caption import CaptionGenerateRequest, CaptionBatchCreateRequest, CaptionExportResponse, CaptionStyleSettings
 from app.services.storage_service import StorageService
+from app.services.translation_service import CaptionTranslator
+from app.services.ffmpeg_runner import ffmpeg_runner, FFmpegError, FFmpegProgress, ProgressCallback
+from app.services.segmented_encoder import EncodeSegment, encode_segments, plan_segments, segment_parallelism, write_concat_list
+from app.services.caption_exporters import ExportOptions, get_exporter, register_exporter, format_srt_time, format_vtt_time
+from app.services.karaoke_compiler import KaraokeCompiler, compiled_ass_cache, format_ass_time
+from app.services.caption_timing import CaptionRetimer, RetimeOptions, SegmentIndex, segment_index_cache, snap_to_cuts
+from app.services.silence_trimmer import trim_silence
+from app.services.job_events import job_events, channel_name
 from app.config.caption_styles import CAPTION_STYLES
 
+# Source audio codecs that can be stream-copied into an MP4 container
+MP4_COPYABLE_AUDIO_CODECS = {"aac", "mp3", "alac", "ac3", "eac3"}
+
+# Burn-in outputs produced from a single decode + subtitle pass.
+# Video renditions are scaled from the first one (the 9:16 canvas the ASS is laid out on).
+BURN_RENDITIONS: Dict[str, Dict[str, Any]] = {
+    "1080p": {"width": 1080, "height": 1920, "preset": "veryfast", "crf": 20, "ext": ".mp4", "content_type": "video/mp4"},
+    "720p_preview": {"width": 720, "height": 1280, "preset": "veryfast", "crf": 28, "ext": ".mp4", "content_type": "video/mp4"},
+    "audio": {"ext": ".m4a", "content_type": "audio/mp4"},
+}
+
+# Called with (rendition name, url) as each burn output is uploaded
+OutputCallback = Callable[[str, str], Awaitable[None]]
+
+def normalize_source_url(url: str) -> str:
+    """
+    Canonical form of a source URL for de-duplication.
+    
+    Lower-cases scheme and host and drops the fragment; path and query
+    are kept as-is (signed URLs differ only there).
+    
+    Raises:
+        ValueError: Not an http(s) URL.
+    """
+    parts = urlsplit(url.strip())
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        raise ValueError(f"Invalid source URL: {url[:200]}")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
 
 class CaptionService:
     """Service for caption/transcription generation using Whisper."""
@@ -32,32 +73,25 @@ class CaptionService:
         self.db = db
         self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.storage = StorageService()
+        self.translator = CaptionTranslator(self.client)
 
-    def _extract_audio(self, video_path: str, output_path: str) -> bool:
+    async def _extract_audio(self, video_path: str, output_path: str) -> bool:
         """
         Extract audio from video using FFmpeg.
         Returns True if successful, False otherwise.
         """
         try:
             # Command: ffmpeg -i input -vn -acodec libmp3lame -q:a 4 -y output
-            command = [
-                "ffmpeg",
+            await ffmpeg_runner.run([
                 "-i", video_path,
                 "-vn",  # No video
                 "-acodec", "libmp3lame",  # MP3 codec
                 "-q:a", "4",  # VBR quality
                 "-y",  # Overwrite
                 output_path
-            ]
-            
-            subprocess.run(
-                command, 
-                check=True, 
-                stdout=subprocess.DEVNULL, 
-                stderr=subprocess.PIPE
-            )
+            ])
             return True
-        except subprocess.CalledProcessError as e:
+        except FFmpegError as e:
             print(f"FFmpeg error: {e}")
             return False
         except Exception as e:
@@ -124,6 +158,8 @@ class CaptionService:
         self.db.add(caption)
         await self.db.commit()
         await self.db.refresh(caption)
+        # A new caption has no segment rows; mark them loaded instead of querying
+        set_committed_value(caption, "segment_rows", [])
         
         return caption
     
@@ -154,9 +190,139 @@ class CaptionService:
         self.db.add(caption)
         await self.db.commit()
         await self.db.refresh(caption)
+        # A new caption has no segment rows; mark them loaded instead of querying
+        set_committed_value(caption, "segment_rows", [])
         
         return caption
     
+    async def create_caption_batch(
+        self,
+        user_id: UUID,
+        request: CaptionBatchCreateRequest,
+    ) -> Tuple[CaptionBatch, int]:
+        """
+        Create a bulk caption batch from a URL manifest.
+        
+        URLs are normalised and de-duplicated within the manifest; URLs the
+        user has already captioned become DUPLICATE items linked to the
+        existing caption. Every other URL gets a PENDING caption and a
+        QUEUED item for the ingest queue. Returns (batch, new_item_count).
+        
+        Raises:
+            ValueError: Too many items, or a URL is not http(s).
+        """
+        if len(request.items) > settings.CAPTION_BATCH_MAX_ITEMS:
+            raise ValueError(f"A batch can contain at most {settings.CAPTION_BATCH_MAX_ITEMS} items")
+        
+        unique: Dict[str, Any] = {}
+        for entry in request.items:
+            unique.setdefault(normalize_source_url(entry.source_file_url), entry)
+        
+        existing_rows = await self.db.execute(
+            select(Caption.source_file_url, Caption.id)
+            .where(
+                Caption.user_id == user_id,
+                Caption.source_file_url.in_(list(unique)),
+                Caption.status != TranscriptionStatus.FAILED,
+            )
+            .order_by(Caption.created_at)
+        )
+        existing = {url: caption_id for url, caption_id in existing_rows}
+        
+        batch = CaptionBatch(
+            user_id=user_id,
+            title=request.title,
+            language_hint=request.language_hint,
+            word_timestamps=request.word_timestamps,
+            translate_to_english=request.translate_to_english,
+            submitted_count=len(request.items),
+        )
+        self.db.add(batch)
+        await self.db.flush()
+        
+        new_count = 0
+        for position, (url, entry) in enumerate(unique.items()):
+            item = CaptionBatchItem(batch_id=batch.id, user_id=user_id, position=position, source_file_url=url)
+            if url in existing:
+                item.caption_id = existing[url]
+                item.status = BatchItemStatus.DUPLICATE
+                item.finished_at = datetime.utcnow()
+            else:
+                filename = url.split("/")[-1].split("?")[0] or "source"
+                caption = Caption(
+                    user_id=user_id,
+                    project_id=request.project_id,
+                    title=entry.title or filename,
+                    source_file_url=url,
+                    source_file_name=filename[:255],
+                    caption_style=request.caption_style,
+                    status=TranscriptionStatus.PENDING,
+                )
+                self.db.add(caption)
+                await self.db.flush()
+                item.caption_id = caption.id
+                new_count += 1
+            self.db.add(item)
+        
+        if new_count == 0:
+            batch.finished_at = datetime.utcnow()
+        await self.db.commit()
+        await self.db.refresh(batch)
+        return batch, new_count
+    
+    async def get_batch_progress(self, batch: CaptionBatch) -> Dict[str, Any]:
+        """Aggregate item counts, throughput and ETA for a batch (CaptionBatchResponse fields)."""
+        result = await self.db.execute(
+            select(
+                CaptionBatchItem.status,
+                func.count(),
+                func.min(CaptionBatchItem.started_at),
+                func.coalesce(func.sum(Caption.source_duration_seconds), 0.0),
+            )
+            .outerjoin(Caption, Caption.id == CaptionBatchItem.caption_id)
+            .where(CaptionBatchItem.batch_id == batch.id)
+            .group_by(CaptionBatchItem.status)
+        )
+        counts = {s.value: 0 for s in BatchItemStatus}
+        started_at = None
+        media_seconds = 0.0
+        for item_status, count, first_started, duration in result:
+            counts[item_status.value] = count
+            if first_started and (started_at is None or first_started < started_at):
+                started_at = first_started
+            if item_status == BatchItemStatus.COMPLETED:
+                media_seconds = float(duration or 0)
+        
+        total = sum(counts.values())
+        processed = counts[BatchItemStatus.COMPLETED.value] + counts[BatchItemStatus.FAILED.value]
+        finished = processed + counts[BatchItemStatus.DUPLICATE.value]
+        remaining = total - finished
+        
+        items_per_minute = media_rate = eta = None
+        if started_at and processed:
+            end = batch.finished_at or datetime.now(started_at.tzinfo)
+            minutes = max((end - started_at).total_seconds() / 60, 1 / 60)
+            items_per_minute = round(processed / minutes, 2)
+            media_rate = round(media_seconds / 60 / minutes, 2)
+            if remaining:
+                eta = round(remaining / items_per_minute * 60, 1)
+        
+        return {
+            "id": batch.id,
+            "title": batch.title,
+            "submitted_count": batch.submitted_count,
+            "total": total,
+            "counts": counts,
+            "progress": round(finished / total * 100, 1) if total else 100.0,
+            "media_seconds_processed": round(media_seconds, 1),
+            "items_per_minute": items_per_minute,
+            "media_minutes_per_minute": media_rate,
+            "eta_seconds": eta,
+            "created_at": batch.created_at,
+            "started_at": started_at,
+            "finished_at": batch.finished_at,
+        }
+    
     async def process_transcription(
         self,
         caption_id: UUID,
@@ -171,17 +337,22 @@ class CaptionService:
         """
         # Get caption record
         result = await self.db.execute(
-            select(Caption).where(Caption.id == caption_id)
+            select(Caption)
+            .where(Caption.id == caption_id)
+            .options(selectinload(Caption.segment_rows))
         )
         caption = result.scalar_one_or_none()
         
         if not caption:
             return
         
+        channel = channel_name("caption", caption.id)
+        
         try:
             # Update status
             caption.status = TranscriptionStatus.PROCESSING
             await self.db.commit()
+            job_events.publish(channel, caption.status.value, {"status": caption.status.value})
             
             start_time = datetime.utcnow()
             
@@ -202,16 +373,31 @@ class CaptionService:
                     tmp_path = tmp.name
             
             audio_path = None
+            trimmed_path = None
+            offset_map = None
+            scene_task = None
             
             try:
                 # Extract audio for Whisper (smaller size, better format)
                 # MP3 is universally supported by Whisper
                 audio_path = tmp_path + ".mp3"
-                extraction_success = self._extract_audio(tmp_path, audio_path)
+                extraction_success = await self._extract_audio(tmp_path, audio_path)
                 
                 # Use extracted audio if successful, otherwise try original file
                 file_to_transcribe = audio_path if extraction_success else tmp_path
                 
+                # Cut long non-speech spans so Whisper is billed for speech only
+                trimmed_path = tmp_path + ".speech.mp3"
+                offset_map = await trim_silence(file_to_transcribe, trimmed_path)
+                if offset_map is not None:
+                    file_to_transcribe = trimmed_path
+                    caption.silence_trimmed_seconds = offset_map.removed_seconds
+                    print(f"Caption {caption.id}: trimmed {offset_map.removed_seconds:.1f}s of silence")
+                
+                # Shot changes are detected once per source video, alongside Whisper
+                if caption.scene_cuts is None and ext.lower() in settings.ALLOWED_VIDEO_EXTENSIONS:
+                    scene_task = asyncio.create_task(self.detect_scene_cuts(tmp_path))
+                
                 # Call Whisper API
                 with open(file_to_transcribe, "rb") as audio_file:
                     response_format = "verbose_json" if word_timestamps else "json"
@@ -269,8 +455,25 @@ class CaptionService:
                         
                         segments.append(segment)
                 
+                if offset_map is not None:
+                    # Restore timestamps to the untrimmed source timeline
+                    for segment in segments:
+                        segment["start_time"] = offset_map.to_original(segment["start_time"])
+                        segment["end_time"] = offset_map.to_original(segment["end_time"], is_end=True)
+                        for w in segment.get("words") or []:
+                            w["start"] = offset_map.to_original(w["start"])
+                            w["end"] = offset_map.to_original(w["end"], is_end=True)
+                
                 caption.segments = segments
                 
+                # Partial results: streamed clients render first lines before the row is committed
+                batch = settings.SSE_SEGMENT_BATCH_SIZE
+                for i in range(0, len(segments), batch):
+                    job_events.publish(channel, "segments", {"offset": i, "segments": segments[i:i + batch]})
+                
+                if scene_task is not None:
+                    caption.scene_cuts = await scene_task
+                
                 # Get duration from last segment
                 if segments:
                     caption.source_duration_seconds = segments[-1]["end_time"]
@@ -293,41 +496,309 @@ class CaptionService:
                 caption.completed_at = datetime.utcnow()
                 
             finally:
+                if scene_task is not None and not scene_task.done():
+                    scene_task.cancel()
+                    await asyncio.gather(scene_task, return_exceptions=True)
                 # Clean up temp files
                 if os.path.exists(tmp_path):
                     os.unlink(tmp_path)
                 if audio_path and os.path.exists(audio_path):
                     os.unlink(audio_path)
+                if trimmed_path and os.path.exists(trimmed_path):
+                    os.unlink(trimmed_path)
             
         except Exception as e:
             caption.status = TranscriptionStatus.FAILED
             caption.error_message = str(e)
         
         await self.db.commit()
+        job_events.publish(channel, caption.status.value, self.status_event_data(caption))
+    
+    @staticmethod
+    def status_event_data(caption: Caption) -> Dict[str, Any]:
+        """Small status payload for progress streams (no segments)."""
+        return {
+            "status": caption.status.value,
+            "error_message": caption.error_message,
+            "detected_language": caption.detected_language,
+            "segment_count": len(caption.segment_rows or caption.legacy_segments or []),
+            "source_duration_seconds": caption.source_duration_seconds,
+            "silence_trimmed_seconds": caption.silence_trimmed_seconds,
+        }
+    
+    async def detect_scene_cuts(
+        self,
+        video_path: str,
+        threshold: Optional[float] = None,
+    ) -> Optional[List[float]]:
+        """
+        Detect shot changes with FFmpeg's scene score.
+        
+        Frames are downscaled before scoring, which keeps the pass far
+        cheaper than decoding for an encode. Returns sorted cut timestamps
+        in seconds, or None if the analysis failed.
+        """
+        threshold = settings.SCENE_CUT_THRESHOLD if threshold is None else threshold
+        
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as f:
+            metadata_path = f.name
+        
+        try:
+            await ffmpeg_runner.run([
+                "-i", video_path,
+                "-an", "-sn",
+                "-vf", f"scale=160:-2,select='gt(scene,{threshold})',metadata=print:file={metadata_path}",
+                "-f", "null",
+                "-",
+            ])
+            
+            cuts: List[float] = []
+            with open(metadata_path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    # "frame:12   pts:6144    pts_time:0.48"
+                    if "pts_time:" in line:
+                        try:
+                            cuts.append(round(float(line.rsplit("pts_time:", 1)[1].split()[0]), 3))
+                        except (IndexError, ValueError):
+                            continue
+            return sorted(set(cuts))
+        except FFmpegError as e:
+            print(f"Scene detection error: {e}")
+            return None
+        finally:
+            if os.path.exists(metadata_path):
+                os.unlink(metadata_path)
     
     async def _add_translation(self, caption: Caption):
         """Add English translation for Hindi captions."""
         if not caption.segments:
             return
         
-        # Translate each segment using GPT-4
-        for segment in caption.segments:
-            if segment.get("text"):
-                response = await self.client.chat.completions.create(
-                    model="gpt-4-turbo-preview",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "Translate the following Hindi text to English. Only provide the translation, nothing else.",
-                        },
-                        {
-                            "role": "user",
-                            "content": segment["text"],
-                        },
-                    ],
-                    max_tokens=200,
+        # Copy so the JSONB column is flagged dirty on reassignment
+        segments = [dict(s) for s in caption.segments]
+
+        # Batched, cached translation (one request per ~40 segments)
+        translations = await self.translator.translate(
+            [s.get("text") or "" for s in segments]
+        )
+        for segment, english in zip(segments, translations):
+            if english:
+                segment["text_english"] = english
+
+        caption.segments = segments
+    
+    async def get_segment_range(
+        self,
+        caption_id: UUID,
+        user_id: UUID,
+        start_index: int = 0,
+        limit: int = 100,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+    ) -> Optional[List[CaptionSegment]]:
+        """
+        Read a window of segments without loading the whole caption.
+        
+        Returns up to ``limit + 1`` rows so callers can detect more pages,
+        or None if the caption does not exist for this user.
+        """
+        query = (
+            select(CaptionSegment)
+            .join(Caption, Caption.id == CaptionSegment.caption_id)
+            .where(
+                Caption.id == caption_id,
+                Caption.user_id == user_id,
+                CaptionSegment.segment_index >= start_index,
+            )
+        )
+        if start_time is not None:
+            query = query.where(CaptionSegment.end_time > start_time)
+        if end_time is not None:
+            query = query.where(CaptionSegment.start_time < end_time)
+        query = query.order_by(CaptionSegment.segment_index).limit(limit + 1)
+        
+        rows = list((await self.db.execute(query)).scalars().all())
+        if rows:
+            return rows
+        
+        # Empty window: caption may be missing or still on the legacy JSONB blob
+        migrated = await self._migrate_legacy_segments(caption_id, user_id)
+        if migrated is None:
+            return None
+        if migrated:
+            rows = list((await self.db.execute(query)).scalars().all())
+        return rows
+    
+    async def get_segment(
+        self,
+        caption_id: UUID,
+        user_id: UUID,
+        segment_index: int,
+    ) -> Optional[Tuple[CaptionSegment, TranscriptionStatus]]:
+        """Fetch one segment row plus its caption's status in a single query."""
+        query = (
+            select(CaptionSegment, Caption.status)
+            .join(Caption, Caption.id == CaptionSegment.caption_id)
+            .where(
+                Caption.id == caption_id,
+                Caption.user_id == user_id,
+                CaptionSegment.segment_index == segment_index,
+            )
+        )
+        row = (await self.db.execute(query)).first()
+        if row is None and await self._migrate_legacy_segments(caption_id, user_id):
+            row = (await self.db.execute(query)).first()
+        if row is None:
+            return None
+        return row[0], row[1]
+    
+    async def update_segment(
+        self,
+        segment: CaptionSegment,
+        changes: Dict[str, Any],
+    ) -> CaptionSegment:
+        """
+        Apply a partial edit to one segment.
+        
+        Only the segment row and the parent's edit flags are written.
+        """
+        start = changes.get("start_time", segment.start_time)
+        end = changes.get("end_time", segment.end_time)
+        if start is not None and end is not None and end < start:
+            raise ValueError("end_time must be greater than or equal to start_time")
+        
+        for field, value in changes.items():
+            if field in {"text", "text_english"} and value is not None:
+                value = unicodedata.normalize("NFC", value)
+            if field == "text" and value != segment.text and segment.original_text is None:
+                segment.original_text = segment.text
+            setattr(segment, field, value)
+        segment.is_edited = True
+        
+        await self.db.execute(
+            update(Caption)
+            .where(Caption.id == segment.caption_id)
+            .values(
+                is_edited=True,
+                updated_at=datetime.utcnow(),
+                revision=Caption.revision + 1,
+                export_cache={},
+            )
+        )
+        await self.db.commit()
+        
+        return segment
+    
+    async def get_segment_at(
+        self,
+        caption_id: UUID,
+        user_id: UUID,
+        time_seconds: float,
+    ) -> Optional[Tuple[Optional[CaptionSegment], int]]:
+        """
+        Find the segment on screen at ``time_seconds``.
+        
+        Uses a cached interval index per caption revision, so repeated
+        lookups from a preview player cost one binary search plus one row
+        fetch. Returns (segment or None, revision), or None if the caption
+        does not exist for this user.
+        """
+        row = (
+            await self.db.execute(
+                select(Caption.revision, Caption.status).where(
+                    Caption.id == caption_id,
+                    Caption.user_id == user_id,
                 )
-                segment["text_english"] = response.choices[0].message.content.strip()
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        revision, caption_status = row
+        
+        # Transcription writes segments without bumping the revision, so only
+        # a finished caption's index may be cached under it
+        cacheable = caption_status == TranscriptionStatus.COMPLETED
+        cache_key = (str(caption_id), revision)
+        index = segment_index_cache.get(cache_key) if cacheable else None
+        if index is None:
+            await self._migrate_legacy_segments(caption_id, user_id)
+            rows = (
+                await self.db.execute(
+                    select(
+                        CaptionSegment.segment_index,
+                        CaptionSegment.start_time,
+                        CaptionSegment.end_time,
+                    )
+                    .where(CaptionSegment.caption_id == caption_id)
+                    .order_by(CaptionSegment.start_time, CaptionSegment.segment_index)
+                )
+            ).all()
+            index = SegmentIndex(
+                [(r.start_time, r.end_time) for r in rows],
+                keys=[r.segment_index for r in rows],
+            )
+            if cacheable:
+                segment_index_cache.set(cache_key, index)
+        
+        segment_index = index.key_at(time_seconds)
+        if segment_index is None:
+            return None, revision
+        
+        segment = (
+            await self.db.execute(
+                select(CaptionSegment).where(
+                    CaptionSegment.caption_id == caption_id,
+                    CaptionSegment.segment_index == segment_index,
+                )
+            )
+        ).scalar_one_or_none()
+        return segment, revision
+    
+    async def retime_caption(self, caption: Caption, options: RetimeOptions) -> Caption:
+        """
+        Re-time all segments: fix overlaps and gaps, merge/split to the
+        line limits and snap to shot changes. Rewrites changed rows only.
+        """
+        caption.segments = CaptionRetimer(options).retime(caption.iter_segments())
+        caption.is_edited = True
+        caption.invalidate_exports()
+        await self.db.commit()
+        return caption
+    
+    async def _migrate_legacy_segments(
+        self,
+        caption_id: UUID,
+        user_id: UUID,
+    ) -> Optional[bool]:
+        """
+        Move a caption's legacy JSONB segments into caption_segments rows.
+        
+        Returns None if the caption is not found, True if rows were created.
+        """
+        result = await self.db.execute(
+            select(Caption)
+            .options(noload(Caption.segment_rows))
+            .where(Caption.id == caption_id, Caption.user_id == user_id)
+        )
+        caption = result.scalar_one_or_none()
+        if caption is None:
+            return None
+        if not caption.legacy_segments:
+            return False
+        
+        has_rows = (
+            await self.db.execute(
+                select(CaptionSegment.id)
+                .where(CaptionSegment.caption_id == caption_id)
+                .limit(1)
+            )
+        ).first() is not None
+        if has_rows:
+            return False
+        
+        caption.segments = caption.legacy_segments
+        await self.db.commit()
+        return True
     
     async def export_captions(
         self,
@@ -336,38 +807,55 @@ class CaptionService:
         include_translation: bool = False,
         style_settings: Optional[CaptionStyleSettings] = None,
     ) -> CaptionExportResponse:
-        """Export captions to various formats."""
-        if format == CaptionFormat.SRT:
-            content = self._generate_srt(caption, include_translation)
-            extension = ".srt"
-        elif format == CaptionFormat.VTT:
-            content = self._generate_vtt(caption, include_translation)
-            extension = ".vtt"
-        elif format == CaptionFormat.ASS:
-            content = self._generate_ass(caption, style_settings)
-            extension = ".ass"
-        elif format == CaptionFormat.JSON:
-            import json
-            content = json.dumps(caption.segments, ensure_ascii=False, indent=2)
-            extension = ".json"
-        else:  # TXT
-            content = caption.transcription_text
-            extension = ".txt"
+        """
+        Export captions to various formats, streaming straight into storage.
         
-        # Upload to storage
-        filename = f"{caption.title.replace(' ', '_')}{extension}"
+        Results are cached per (revision, format, options); an unchanged
+        caption returns the previously uploaded file without regenerating it.
+        The caption may be loaded without its segment rows: they are only
+        fetched on a cache miss.
+        """
+        cache_key = self._export_cache_key(caption, format, include_translation, style_settings)
+        cached = (caption.export_cache or {}).get(cache_key)
+        if cached:
+            return CaptionExportResponse(
+                caption_id=caption.id,
+                format=format,
+                download_url=cached["url"],
+                expires_at=datetime.utcnow() + timedelta(hours=24),
+                file_size_bytes=cached["size_bytes"],
+            )
+        
+        if not caption.segment_rows:
+            await self._load_segment_rows(caption)
         
-        download_url = await self.storage.upload_text_file(
-            content=content,
+        chunks, extension, content_type = self.iter_export(
+            caption=caption,
+            format=format,
+            include_translation=include_translation,
+            style_settings=style_settings,
+        )
+        
+        # Upload to storage; name is unique per cache key so variants don't overwrite each other
+        digest = hashlib.sha1(f"{caption.id}:{cache_key}".encode()).hexdigest()[:10]
+        filename = f"{caption.title.replace(' ', '_')}_{digest}{extension}"
+        
+        download_url, file_size = await self.storage.upload_stream(
+            chunks=chunks,
             filename=filename,
             folder=f"exports/{caption.user_id}",
-            content_type="text/plain; charset=utf-8",
+            content_type=content_type,
         )
         
-        # Update exported formats
-        if caption.exported_formats is None:
-            caption.exported_formats = {}
-        caption.exported_formats[format.value] = download_url
+        # Update exported formats and cache (new dicts so JSONB changes are tracked)
+        caption.exported_formats = {
+            **(caption.exported_formats or {}),
+            format.value: download_url,
+        }
+        caption.export_cache = {
+            **(caption.export_cache or {}),
+            cache_key: {"url": download_url, "size_bytes": file_size},
+        }
         await self.db.commit()
         
         return CaptionExportResponse(
@@ -375,52 +863,67 @@ class CaptionService:
             format=format,
             download_url=download_url,
             expires_at=datetime.utcnow() + timedelta(hours=24),
-            file_size_bytes=len(content.encode("utf-8")),
+            file_size_bytes=file_size,
         )
     
-    def _generate_srt(self, caption: Caption, include_translation: bool) -> str:
-        """Generate SRT format."""
-        lines = []
-        
-        for i, segment in enumerate(caption.segments or [], 1):
-            start = self._format_time_srt(segment["start_time"])
-            end = self._format_time_srt(segment["end_time"])
-            
-            text = segment["text"]
-            if include_translation and segment.get("text_english"):
-                text = f"{text}\n{segment['text_english']}"
-            
-            lines.append(f"{i}")
-            lines.append(f"{start} --> {end}")
-            lines.append(text)
-            lines.append("")
-        
-        return "\n".join(lines)
+    async def _load_segment_rows(self, caption: Caption):
+        """Populate segment_rows on a caption that was loaded without them."""
+        result = await self.db.execute(
+            select(CaptionSegment)
+            .where(CaptionSegment.caption_id == caption.id)
+            .order_by(CaptionSegment.segment_index)
+        )
+        set_committed_value(caption, "segment_rows", list(result.scalars().all()))
     
-    def _generate_vtt(self, caption: Caption, include_translation: bool) -> str:
-        """Generate WebVTT format."""
-        lines = ["WEBVTT", ""]
+    def _export_cache_key(
+        self,
+        caption: Caption,
+        format: CaptionFormat,
+        include_translation: bool,
+        style_settings: Optional[CaptionStyleSettings],
+    ) -> str:
+        """Cache key: caption revision + format + export options (+ scene cuts for ASS)."""
+        if style_settings is not None:
+            style_json = json.dumps(style_settings.model_dump(), sort_keys=True)
+            style_hash = hashlib.sha1(style_json.encode()).hexdigest()[:12]
+        else:
+            style_hash = "default"
+        key = f"r{caption.revision or 0}:{format.value}:{int(include_translation)}:{style_hash}"
+        if format == CaptionFormat.ASS and caption.scene_cuts:
+            # ASS timings snap to cuts, which are detected lazily without a new revision
+            key += f":c{len(caption.scene_cuts)}"
+        return key
+    
+    def iter_export(
+        self,
+        caption: Caption,
+        format: CaptionFormat,
+        include_translation: bool = False,
+        style_settings: Optional[CaptionStyleSettings] = None,
+    ) -> Tuple[Iterator[bytes], str, str]:
+        """
+        Build a lazy byte stream for an export format.
         
-        for i, segment in enumerate(caption.segments or [], 1):
-            start = self._format_time_vtt(segment["start_time"])
-            end = self._format_time_vtt(segment["end_time"])
-            
-            text = segment["text"]
-            if include_translation and segment.get("text_english"):
-                text = f"{text}\n{segment['text_english']}"
-            
-            lines.append(f"{i}")
-            lines.append(f"{start} --> {end}")
-            lines.append(text)
-            lines.append("")
+        Returns (chunks, file_extension, content_type). The writer comes from
+        the caption_exporters registry and produces one segment (or row
+        group) at a time, so memory does not grow with transcript length.
         
-        return "\n".join(lines)
+        Raises:
+            ValueError: No exporter is registered for ``format``.
+        """
+        exporter = get_exporter(format)
+        options = ExportOptions(
+            include_translation=include_translation,
+            style_settings=style_settings,
+            service=self,
+        )
+        return exporter.iter_bytes(caption, options), exporter.extension, exporter.content_type
     
-    def _generate_ass(
+    def _iter_ass(
         self,
         caption: Caption,
         style_settings: Optional[CaptionStyleSettings],
-    ) -> str:
+    ) -> Iterator[str]:
         """Generate ASS format with styling.
 
         If a preset_id exists in caption.style_settings and no explicit style_settings were passed,
@@ -431,11 +934,17 @@ class CaptionService:
             preset_id = caption.style_settings.get("preset_id")
 
         if preset_id and preset_id in CAPTION_STYLES:
-            return self._generate_ass_from_preset(
+            try:
+                karaoke_mode = KaraokeMode(caption.style_settings.get("karaoke_mode") or KaraokeMode.LINE)
+            except ValueError:
+                karaoke_mode = KaraokeMode.LINE
+            yield from self._iter_ass_from_preset(
                 caption=caption,
                 preset_id=preset_id,
-                karaoke=bool(caption.segments and any(s.get("words") for s in (caption.segments or []))),
+                karaoke=any(s.get("words") for s in caption.iter_segments()),
+                karaoke_mode=karaoke_mode,
             )
+            return
 
         style = style_settings or CaptionStyleSettings()
 
@@ -448,7 +957,7 @@ class CaptionService:
         outline = self._hex_to_ass_color("#000000")
         back = self._rgba_to_ass_back_color(style.background_color)
 
-        header = f"""[Script Info]
+        yield f"""[Script Info]
 Title: {caption.title}
 ScriptType: v4.00+
 WrapStyle: 0
@@ -465,14 +974,13 @@ Style: Default,{style.font_family},{style.font_size},{primary},{secondary},{outl
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
 
-        events: List[str] = []
-        for segment in caption.segments or []:
-            start = self._format_time_ass(segment["start_time"])
-            end = self._format_time_ass(segment["end_time"])
+        cuts = sorted(caption.scene_cuts or [])
+        for i, segment in enumerate(caption.iter_segments()):
+            start = self._format_time_ass(snap_to_cuts(segment["start_time"], cuts, settings.SCENE_SNAP_TOLERANCE))
+            end = self._format_time_ass(snap_to_cuts(segment["end_time"], cuts, settings.SCENE_SNAP_TOLERANCE))
             text = (segment.get("text") or "").replace("\n", "\\N")
-            events.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}")
-
-        return header + "\n".join(events)
+            separator = "\n" if i else ""
+            yield f"{separator}Dialogue: 0,{start},{end},Default,,0,0,0,,{text}"
 
     def _alignment_from_position(self, position: str) -> int:
         """Map logical position to ASS Alignment."""
@@ -517,7 +1025,20 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             return self._hex_to_ass_color("#000000", alpha=0x80)
         return self._hex_to_ass_color("#000000", alpha=0x80)
 
-    def _generate_ass_from_preset(self, caption: Caption, preset_id: str, karaoke: bool) -> str:
+    def _iter_ass_from_preset(
+        self,
+        caption: Caption,
+        preset_id: str,
+        karaoke: bool,
+        karaoke_mode: KaraokeMode = KaraokeMode.LINE,
+    ) -> Iterator[str]:
+        """
+        Generate ASS using a CAPTION_STYLES preset.
+        
+        Events come from the KaraokeCompiler: one Dialogue per segment in
+        ``line`` mode, or pre-baked per-word events in ``word`` mode. Compiled
+        events are cached per caption revision.
+        """
         preset = CAPTION_STYLES.get(preset_id) or CAPTION_STYLES["minimal_chic"]
 
         play_res_x = 1080
@@ -538,7 +1059,7 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
         bold = -1 if str(preset.get("font_weight", "600")) in {"700", "800", "900"} else 0
 
-        header = f"""[Script Info]
+        yield f"""[Script Info]
 Title: {caption.title}
 ScriptType: v4.00+
 WrapStyle: 0
@@ -555,132 +1076,349 @@ Style: Default,{font_name},{font_size},{primary},{secondary},{outline},{back},{b
 Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 """
 
-        events: List[str] = []
-        for segment in caption.segments or []:
-            start = self._format_time_ass(segment.get("start_time", 0))
-            end = self._format_time_ass(segment.get("end_time", 0))
+        compiler = KaraokeCompiler(
+            preset=preset,
+            mode=karaoke_mode,
+            highlight_color=preset.get("highlight_color", "#FFD700"),
+            play_res=(play_res_x, play_res_y),
+            alignment=alignment,
+            margin_v=margin_v,
+            shot_changes=caption.scene_cuts,
+        )
+        cache_key = None
+        if caption.id is not None:
+            cache_key = (
+                str(caption.id),
+                caption.revision or 0,
+                preset_id,
+                karaoke,
+                compiler.mode.value,
+                compiler.max_words_per_line,
+                len(compiler.cuts),
+            )
+        
+        lines = compiled_ass_cache.get(cache_key) if cache_key else None
+        if lines is None:
+            lines = [
+                event.to_dialogue()
+                for event in compiler.compile(caption.iter_segments(), karaoke=karaoke)
+            ]
+            if cache_key:
+                compiled_ass_cache.set(cache_key, lines)
+        
+        for i, line in enumerate(lines):
+            separator = "\n" if i else ""
+            yield f"{separator}{line}"
 
-            if karaoke and segment.get("words"):
-                events.append(
-                    f"Dialogue: 0,{start},{end},Default,,0,0,0,,{self._karaoke_text(segment['words'])}"
-                )
-            else:
-                text = (segment.get("text") or "").replace("\n", "\\N").strip()
-                events.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}")
-
-        return header + "\n".join(events)
-
-    def _karaoke_text(self, words: List[dict]) -> str:
-        """Build ASS karaoke (\k) sequence from word timestamps."""
-        parts: List[str] = []
-        for idx, w in enumerate(words):
-            word = (w.get("word") or "").strip()
-            if not word:
-                continue
-            start = float(w.get("start", 0))
-            end = float(w.get("end", start))
-            dur_cs = max(1, int(round((end - start) * 100)))
-            prefix = "" if idx == 0 else " "
-            parts.append(f"{{\\k{dur_cs}}}{prefix}{word}")
-        return "".join(parts)
-
-    async def burn_captions_to_video(self, caption: Caption, style_preset_id: str, karaoke: bool = True) -> str:
-        """Download source video, render ASS subtitles, burn them into the video, upload, and return URL."""
+    async def burn_captions_to_video(
+        self,
+        caption: Caption,
+        style_preset_id: str,
+        karaoke: bool = True,
+        karaoke_mode: KaraokeMode = KaraokeMode.LINE,
+        on_progress: Optional[ProgressCallback] = None,
+        threads: Optional[int] = None,
+        renditions: Optional[Sequence[str]] = None,
+        on_output: Optional[OutputCallback] = None,
+    ) -> str:
+        """
+        Download source video, render ASS subtitles, burn them into the video, upload, and return URL.
+        
+        One FFmpeg pass decodes the source once, burns the subtitles once
+        onto a 9:16 canvas and ``split``s it into every requested rendition
+        (see BURN_RENDITIONS; default all). Outputs are uploaded concurrently
+        as soon as FFmpeg finalises them and reported through ``on_output``.
+        The returned URL is the first video rendition.
+        
+        Long videos (see ``segment_parallelism``) are instead burned as
+        keyframe-aligned segments in parallel FFmpeg processes and joined
+        losslessly with the concat demuxer.
+        
+        FFmpeg runs through the shared async runner; ``on_progress`` receives
+        an FFmpegProgress for each ``-progress`` update.
+        Audio is stream-copied when the source codec is MP4-compatible.
+        """
         if not caption.source_file_url:
             raise ValueError("Missing source_file_url")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(caption.source_file_url)
-            response.raise_for_status()
-            video_bytes = response.content
+        names = list(renditions or BURN_RENDITIONS)
+        unknown = [n for n in names if n not in BURN_RENDITIONS]
+        if unknown:
+            raise ValueError(f"Unknown burn rendition(s): {', '.join(unknown)}")
+        video_names = [n for n in names if "width" in BURN_RENDITIONS[n]]
+        if not video_names:
+            raise ValueError("At least one video rendition is required")
 
         ext = os.path.splitext(caption.source_file_name or "video.mp4")[1] or ".mp4"
 
         tmp_video = None
         tmp_ass = None
-        tmp_out = None
+        tmp_outputs: Dict[str, str] = {}
+        tmp_extra: List[str] = []
 
         try:
+            # Stream the download to disk instead of buffering the whole video
             with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as f:
-                f.write(video_bytes)
                 tmp_video = f.name
+                async with httpx.AsyncClient(timeout=120.0, follow_redirects=True) as client:
+                    async with client.stream("GET", caption.source_file_url) as response:
+                        response.raise_for_status()
+                        async for chunk in response.aiter_bytes(1024 * 1024):
+                            f.write(chunk)
+
+            # Reuse cached cuts; analyse once if this caption predates scene detection
+            # Cuts are metadata: the revision (and the running job's dedupe key) and
+            # text exports stay valid; the ASS export key covers the cuts itself
+            if caption.scene_cuts is None:
+                cuts = await self.detect_scene_cuts(tmp_video)
+                if cuts is not None:
+                    caption.scene_cuts = cuts
+                    await self.db.commit()
 
-            ass_content = self._generate_ass_from_preset(caption=caption, preset_id=style_preset_id, karaoke=karaoke)
             with tempfile.NamedTemporaryFile(delete=False, suffix=".ass", mode="w", encoding="utf-8") as f:
-                f.write(ass_content)
+                f.writelines(
+                    self._iter_ass_from_preset(
+                        caption=caption,
+                        preset_id=style_preset_id,
+                        karaoke=karaoke,
+                        karaoke_mode=karaoke_mode,
+                    )
+                )
                 tmp_ass = f.name
 
-            tmp_out = tmp_video + ".burned.mp4"
+            probe = await ffmpeg_runner.probe(tmp_video)
+            duration = (probe or {}).get("duration") or caption.source_duration_seconds or 0
+            if probe is None:
+                audio_opts = ["-c:a", "aac", "-b:a", "128k"]
+            elif probe["audio_codec"] is None:
+                audio_opts = ["-an"]
+            elif probe["audio_codec"] in MP4_COPYABLE_AUDIO_CODECS:
+                audio_opts = ["-c:a", "copy"]  # fast path: no audio re-encode
+            else:
+                audio_opts = ["-c:a", "aac", "-b:a", "128k"]
 
-            command = [
-                "ffmpeg",
-                "-y",
-                "-i",
-                tmp_video,
-                "-vf",
-                f"subtitles={tmp_ass}",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "veryfast",
-                "-crf",
-                "20",
-                "-c:a",
-                "aac",
-                "-b:a",
-                "128k",
-                "-movflags",
-                "+faststart",
-                tmp_out,
-            ]
+            if "audio" in names and (probe is None or probe["audio_codec"] is None):
+                # Without a known audio stream an audio-only output would fail the whole pass
+                print(f"Caption {caption.id}: skipping audio-only burn output (no audio stream found)")
+                names.remove("audio")
 
-            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            for name in video_names:
+                tmp_outputs[name] = f"{tmp_video}.{name}{BURN_RENDITIONS[name]['ext']}"
+            if "audio" in names:
+                tmp_outputs["audio"] = f"{tmp_video}.audio{BURN_RENDITIONS['audio']['ext']}"
 
-            with open(tmp_out, "rb") as f:
-                out_bytes = f.read()
+            segment_count = segment_parallelism(duration) if duration else 1
+            if segment_count > 1:
+                await self._burn_segmented(
+                    tmp_video, tmp_ass, video_names, tmp_outputs, audio_opts, duration,
+                    segment_count, threads, on_progress, tmp_extra,
+                )
+            else:
+                args = ["-y", "-i", tmp_video, "-filter_complex", self._burn_filter_graph(tmp_ass, video_names)]
+                for i, name in enumerate(video_names):
+                    args += [
+                        "-map", f"[v{i}]",
+                        "-map", "0:a?",
+                        *self._burn_video_codec_args(name, threads),
+                        *audio_opts,
+                        "-movflags", "+faststart",
+                        tmp_outputs[name],
+                    ]
+                if "audio" in tmp_outputs:
+                    args += ["-map", "0:a:0", "-vn", *audio_opts, "-movflags", "+faststart", tmp_outputs["audio"]]
 
-            filename = f"{caption.title.replace(' ', '_')}_{caption.id}_burned.mp4"
-            url = await self.storage.upload_file_content(
-                content=out_bytes,
-                filename=filename,
-                folder=f"exports/{caption.user_id}",
-                content_type="video/mp4",
-            )
+                await ffmpeg_runner.run(
+                    args,
+                    duration=duration,
+                    on_progress=on_progress,
+                    timeout=settings.BURN_TIMEOUT_SECONDS,
+                )
+
+            base_name = f"{caption.title.replace(' ', '_')}_{caption.id}_burned"
+
+            async def upload(name: str) -> Tuple[str, str]:
+                spec = BURN_RENDITIONS[name]
+                suffix = "" if name == video_names[0] else f"_{name}"
+                with open(tmp_outputs[name], "rb") as f:
+                    url = await self.storage.upload_fileobj(
+                        fileobj=f,
+                        filename=f"{base_name}{suffix}{spec['ext']}",
+                        folder=f"exports/{caption.user_id}",
+                        content_type=spec["content_type"],
+                    )
+                if on_output:
+                    await on_output(name, url)
+                return name, url
 
-            if caption.exported_formats is None:
-                caption.exported_formats = {}
-            caption.exported_formats["burned_mp4"] = url
+            outputs = dict(await asyncio.gather(*(upload(name) for name in tmp_outputs)))
+            url = outputs[video_names[0]]
+
+            caption.exported_formats = {
+                **(caption.exported_formats or {}),
+                "burned_mp4": url,
+                **{f"burned_{name}": u for name, u in outputs.items() if name != video_names[0]},
+            }
+            caption.export_cache = {
+                **(caption.export_cache or {}),
+                self.burn_cache_key(caption, style_preset_id, karaoke, karaoke_mode): {
+                    "url": url,
+                    "outputs": outputs,
+                },
+            }
             await self.db.commit()
 
             return url
         finally:
-            for path in [tmp_video, tmp_ass, tmp_out]:
+            for path in [tmp_video, tmp_ass, *tmp_outputs.values(), *tmp_extra]:
                 if path and os.path.exists(path):
                     try:
                         os.unlink(path)
                     except Exception:
                         pass
     
+    def _burn_filter_graph(self, ass_path: str, video_names: List[str], time_offset: float = 0.0) -> str:
+        """
+        Fit to the first rendition's 9:16 canvas, burn subtitles once, split and scale.
+        
+        ``time_offset`` is the source time of the first input frame when
+        encoding a segment; frames are shifted so subtitles render at their
+        original times, then shifted back.
+        """
+        canvas = BURN_RENDITIONS[video_names[0]]
+        w, h = canvas["width"], canvas["height"]
+        subtitles = f"subtitles={ass_path}"
+        if time_offset:
+            subtitles = f"setpts=PTS+{time_offset:.6f}/TB,{subtitles},setpts=PTS-{time_offset:.6f}/TB"
+        graph = (
+            f"[0:v]scale={w}:{h}:force_original_aspect_ratio=decrease:force_divisible_by=2,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+            f"{subtitles},split={len(video_names)}"
+            + "".join(f"[s{i}]" for i in range(len(video_names)))
+        )
+        for i, name in enumerate(video_names):
+            spec = BURN_RENDITIONS[name]
+            if (spec["width"], spec["height"]) == (w, h):
+                graph += f";[s{i}]null[v{i}]"
+            else:
+                graph += f";[s{i}]scale={spec['width']}:{spec['height']}[v{i}]"
+        return graph
+    
+    def _burn_video_codec_args(self, name: str, threads: Optional[int]) -> List[str]:
+        spec = BURN_RENDITIONS[name]
+        return [
+            "-c:v", "libx264",
+            "-preset", spec["preset"],
+            "-crf", str(spec["crf"]),
+            *(["-threads", str(threads)] if threads else []),
+        ]
+    
+    async def _burn_segmented(
+        self,
+        source: str,
+        ass_path: str,
+        video_names: List[str],
+        outputs: Dict[str, str],
+        audio_opts: List[str],
+        duration: float,
+        segment_count: int,
+        threads: Optional[int],
+        on_progress: Optional[ProgressCallback],
+        tmp_files: List[str],
+    ):
+        """
+        Burn ``source`` as parallel keyframe-aligned segments and join them.
+        
+        Each segment encodes every video rendition (video only); the join
+        step stream-copies the segments and muxes audio from the source.
+        """
+        keyframes = await ffmpeg_runner.keyframes(source)
+        segments = plan_segments(duration, segment_count, keyframes)
+        segment_threads = max(1, (threads or os.cpu_count() or 1) // len(segments))
+        
+        pieces: Dict[str, List[str]] = {name: [] for name in video_names}
+        for segment in segments:
+            for name in video_names:
+                path = f"{source}.seg{segment.index:03d}.{name}.mp4"
+                pieces[name].append(path)
+                tmp_files.append(path)
+        
+        def build_args(segment: EncodeSegment) -> List[str]:
+            args = [
+                "-y",
+                "-ss", f"{segment.start:.6f}",
+                "-t", f"{segment.duration:.6f}",
+                "-i", source,
+                "-filter_complex", self._burn_filter_graph(ass_path, video_names, time_offset=segment.start),
+            ]
+            for i, name in enumerate(video_names):
+                args += [
+                    "-map", f"[v{i}]",
+                    "-an",
+                    # setpts drops the link frame rate; keep source timestamps instead of resampling
+                    "-fps_mode", "passthrough",
+                    *self._burn_video_codec_args(name, segment_threads),
+                    pieces[name][segment.index],
+                ]
+            return args
+        
+        await encode_segments(
+            segments,
+            build_args,
+            total_duration=duration,
+            on_progress=on_progress,
+            timeout=settings.BURN_TIMEOUT_SECONDS,
+        )
+        
+        # Lossless join: concat demuxer per rendition, audio taken once from the source
+        args = ["-y"]
+        for name in video_names:
+            list_path = write_concat_list(pieces[name], f"{source}.{name}.concat.txt")
+            tmp_files.append(list_path)
+            args += ["-f", "concat", "-safe", "0", "-i", list_path]
+        args += ["-i", source]
+        source_index = len(video_names)
+        for i, name in enumerate(video_names):
+            args += [
+                "-map", f"{i}:v",
+                "-map", f"{source_index}:a?",
+                "-c:v", "copy",
+                *audio_opts,
+                "-movflags", "+faststart",
+                outputs[name],
+            ]
+        if "audio" in outputs:
+            args += ["-map", f"{source_index}:a:0", "-vn", *audio_opts, "-movflags", "+faststart", outputs["audio"]]
+        
+        await ffmpeg_runner.run(args, timeout=settings.BURN_TIMEOUT_SECONDS)
+        
+        if on_progress:
+            await on_progress(FFmpegProgress(out_time_seconds=duration, percent=100.0, done=True))
+    
+    def burn_cache_key(
+        self,
+        caption: Caption,
+        style_preset_id: str,
+        karaoke: bool,
+        karaoke_mode: KaraokeMode = KaraokeMode.LINE,
+    ) -> str:
+        """Export cache key for a burned video of the current caption revision."""
+        mode = KaraokeMode(karaoke_mode).value
+        return f"r{caption.revision or 0}:burned_mp4:{style_preset_id}:{int(karaoke)}:{mode}"
+    
     def _format_time_srt(self, seconds: float) -> str:
         """Format time for SRT (HH:MM:SS,mmm)."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+        return format_srt_time(seconds)
     
     def _format_time_vtt(self, seconds: float) -> str:
         """Format time for VTT (HH:MM:SS.mmm)."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millis = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+        return format_vtt_time(seconds)
     
     def _format_time_ass(self, seconds: float) -> str:
         """Format time for ASS (H:MM:SS.cc)."""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        centis = int((seconds % 1) * 100)
-        return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+        return format_ass_time(seconds)
+
+
+@register_exporter(CaptionFormat.ASS, ".ass", "text/x-ssa; charset=utf-8")
+def export_ass(caption: Caption, options: ExportOptions) -> Iterator[str]:
+    """ASS with styling and karaoke (needs the service's style presets)."""
+    return options.service._iter_ass(caption, options.style_settings)
@@ -0,0 +1,293 @@
+"""
+Caption Timing Engine
+Re-timing, merge/split and time lookup for caption segments.
+
+Segments are kept in a sorted interval index (parallel start/end arrays)
+so "which caption is on screen at time t" is a binary search, and the
+re-timer fixes overlaps and gaps, merges fragments, splits lines that are
+too long, and snaps boundaries to shot changes.
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from app.core.lru import LRUCache
+
+
+@dataclass
+class RetimeOptions:
+    """Limits applied by the re-timer (seconds / characters)."""
+
+    max_chars_per_line: int = 42
+    max_duration: float = 7.0
+    min_duration: float = 0.7
+    min_gap: float = 0.08
+    # Gaps shorter than this are closed so captions do not flicker off/on
+    close_gap_under: float = 0.5
+    # Boundaries within this distance of a shot change are moved onto it
+    snap_tolerance: float = 0.25
+    shot_changes: List[float] = field(default_factory=list)
+
+
+class SegmentIndex:
+    """
+    Sorted interval index over caption segments.
+
+    Built from (start, end) pairs ordered by start time. ``keys`` maps each
+    position back to a caller id (e.g. segment_index); defaults to position.
+    """
+
+    def __init__(
+        self,
+        intervals: Sequence[Tuple[float, float]],
+        keys: Optional[Sequence[int]] = None,
+    ):
+        self.starts = [float(s) for s, _ in intervals]
+        self.ends = [float(e) for _, e in intervals]
+        self.keys = list(keys) if keys is not None else list(range(len(self.starts)))
+        # Running max of end times lets range queries stay correct even if
+        # the segments overlap (untimed input).
+        self._max_end: List[float] = []
+        running = float("-inf")
+        for end in self.ends:
+            running = max(running, end)
+            self._max_end.append(running)
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[dict]) -> "SegmentIndex":
+        return cls([(s.get("start_time", 0), s.get("end_time", 0)) for s in segments])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def at(self, t: float) -> Optional[int]:
+        """Index of the segment on screen at time ``t`` (latest start wins), or None."""
+        i = bisect_right(self.starts, t) - 1
+        # Walk back only while an earlier segment could still cover t
+        while i >= 0 and self._max_end[i] > t:
+            if self.ends[i] > t:
+                return i
+            i -= 1
+        return None
+
+    def key_at(self, t: float) -> Optional[int]:
+        """Key of the segment on screen at time ``t``, or None."""
+        i = self.at(t)
+        return None if i is None else self.keys[i]
+
+    def overlapping(self, start: float, end: float) -> List[int]:
+        """Indices of segments intersecting [start, end)."""
+        hi = bisect_left(self.starts, end)
+        lo = bisect_right(self._max_end, start)
+        return [i for i in range(lo, hi) if self.ends[i] > start]
+
+    def next_after(self, t: float) -> Optional[int]:
+        """First segment starting at or after ``t``."""
+        i = bisect_left(self.starts, t)
+        return i if i < len(self.starts) else None
+
+
+def snap_to_cuts(t: float, cuts: Sequence[float], tolerance: float) -> float:
+    """Move ``t`` onto the nearest cut within ``tolerance`` (``cuts`` sorted)."""
+    if not cuts:
+        return t
+    i = bisect_left(cuts, t)
+    nearest = min((cuts[j] for j in (i - 1, i) if 0 <= j < len(cuts)), key=lambda c: abs(c - t))
+    return nearest if abs(nearest - t) <= tolerance else t
+
+
+def _text_len(segment: dict) -> int:
+    return len((segment.get("text") or "").strip())
+
+
+def _join(a: Optional[str], b: Optional[str]) -> Optional[str]:
+    if a and b:
+        return f"{a.strip()} {b.strip()}"
+    return a or b
+
+
+class CaptionRetimer:
+    """Normalise segment timing and line length."""
+
+    def __init__(self, options: Optional[RetimeOptions] = None):
+        self.options = options or RetimeOptions()
+        self.cuts = sorted(float(c) for c in self.options.shot_changes)
+
+    def retime(self, segments: Iterable[dict]) -> List[dict]:
+        """Return a new, re-indexed list of segment dicts."""
+        items = [dict(s) for s in segments if (s.get("text") or "").strip()]
+        items.sort(key=lambda s: (float(s.get("start_time", 0)), float(s.get("end_time", 0))))
+        for s in items:
+            s["start_time"] = max(0.0, float(s.get("start_time", 0)))
+            s["end_time"] = max(s["start_time"], float(s.get("end_time", s["start_time"])))
+
+        items = self._split_long(items)
+        items = self._merge_short(items)
+        self._fix_overlaps_and_gaps(items)
+        if self.cuts:
+            self._snap_to_cuts(items)
+        self._enforce_min_duration(items)
+
+        for i, s in enumerate(items):
+            s["segment_index"] = i
+            s["start_time"] = round(s["start_time"], 3)
+            s["end_time"] = round(s["end_time"], 3)
+        return items
+
+    # --- split / merge ---
+
+    def _split_long(self, items: List[dict]) -> List[dict]:
+        out: List[dict] = []
+        for s in items:
+            out.extend(self._split_segment(s))
+        return out
+
+    def _split_segment(self, s: dict) -> List[dict]:
+        opts = self.options
+        duration = s["end_time"] - s["start_time"]
+        if _text_len(s) <= opts.max_chars_per_line and duration <= opts.max_duration:
+            return [s]
+
+        words = [w for w in (s.get("words") or []) if (w.get("word") or "").strip()]
+        if len(words) < 2:
+            words = self._synthesize_words(s)
+        if len(words) < 2:
+            return [s]
+
+        # Greedy packing of words into lines within both limits
+        lines: List[List[dict]] = [[]]
+        for w in words:
+            current = lines[-1]
+            if current:
+                chars = sum(len(x["word"].strip()) + 1 for x in current) + len(w["word"].strip())
+                span = float(w.get("end", w["start"])) - float(current[0]["start"])
+                if chars > opts.max_chars_per_line or span > opts.max_duration:
+                    lines.append([])
+            lines[-1].append(w)
+
+        if len(lines) == 1:
+            return [s]
+
+        parts = []
+        for n, line in enumerate(lines):
+            start = s["start_time"] if n == 0 else float(line[0]["start"])
+            end = s["end_time"] if n == len(lines) - 1 else float(lines[n + 1][0]["start"])
+            parts.append({
+                **s,
+                "start_time": start,
+                "end_time": max(start, end),
+                "text": " ".join(w["word"].strip() for w in line),
+                # A translation cannot be split reliably; it is re-generated on demand
+                "text_english": None,
+                "words": line if s.get("words") else None,
+            })
+        return parts
+
+    def _synthesize_words(self, s: dict) -> List[dict]:
+        """Spread a segment's duration over its words by character count."""
+        tokens = (s.get("text") or "").split()
+        total = sum(len(t) for t in tokens) or 1
+        duration = s["end_time"] - s["start_time"]
+        t = s["start_time"]
+        words = []
+        for token in tokens:
+            span = duration * len(token) / total
+            words.append({"word": token, "start": t, "end": t + span})
+            t += span
+        return words
+
+    def _merge_short(self, items: List[dict]) -> List[dict]:
+        opts = self.options
+        out: List[dict] = []
+        for s in items:
+            prev = out[-1] if out else None
+            if prev is not None:
+                prev_short = prev["end_time"] - prev["start_time"] < opts.min_duration
+                cur_short = s["end_time"] - s["start_time"] < opts.min_duration
+                gap = s["start_time"] - prev["end_time"]
+                chars = _text_len(prev) + 1 + _text_len(s)
+                span = max(prev["end_time"], s["end_time"]) - prev["start_time"]
+                if (
+                    (prev_short or cur_short)
+                    and gap <= opts.close_gap_under
+                    and chars <= opts.max_chars_per_line
+                    and span <= opts.max_duration
+                    and not self._cut_between(prev["end_time"], s["start_time"])
+                ):
+                    out[-1] = {
+                        **prev,
+                        "end_time": max(prev["end_time"], s["end_time"]),
+                        "text": _join(prev.get("text"), s.get("text")),
+                        "text_english": _join(prev.get("text_english"), s.get("text_english")),
+                        "words": (
+                            (prev.get("words") or []) + (s.get("words") or [])
+                            if prev.get("words") or s.get("words")
+                            else None
+                        ),
+                        "confidence": min(
+                            (c for c in (prev.get("confidence"), s.get("confidence")) if c is not None),
+                            default=None,
+                        ),
+                    }
+                    continue
+            out.append(s)
+        return out
+
+    # --- timing ---
+
+    def _fix_overlaps_and_gaps(self, items: List[dict]):
+        opts = self.options
+        for prev, cur in zip(items, items[1:]):
+            if prev["end_time"] > cur["start_time"] - opts.min_gap:
+                # Overlap: end the earlier caption just before the next one
+                boundary = max(prev["start_time"], cur["start_time"] - opts.min_gap)
+                if boundary - prev["start_time"] < opts.min_duration / 2:
+                    # Both start almost together: share the overlap at the midpoint
+                    mid = (prev["start_time"] + min(prev["end_time"], cur["end_time"])) / 2
+                    cur["start_time"] = max(cur["start_time"], mid)
+                    boundary = cur["start_time"] - opts.min_gap
+                prev["end_time"] = max(prev["start_time"], boundary)
+            elif cur["start_time"] - prev["end_time"] < opts.close_gap_under:
+                # Small gap: keep the previous caption up until the next one
+                prev["end_time"] = cur["start_time"] - opts.min_gap
+
+    def _nearest_cut(self, t: float) -> Optional[float]:
+        i = bisect_left(self.cuts, t)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(self.cuts) and abs(self.cuts[j] - t) <= self.options.snap_tolerance:
+                if best is None or abs(self.cuts[j] - t) < abs(best - t):
+                    best = self.cuts[j]
+        return best
+
+    def _cut_between(self, a: float, b: float) -> bool:
+        i = bisect_left(self.cuts, min(a, b))
+        return i < len(self.cuts) and self.cuts[i] <= max(a, b)
+
+    def _snap_to_cuts(self, items: List[dict]):
+        opts = self.options
+        for i, s in enumerate(items):
+            cut = self._nearest_cut(s["start_time"])
+            if cut is not None and cut < s["end_time"] - opts.min_duration / 2:
+                if i == 0 or cut >= items[i - 1]["start_time"] + opts.min_duration / 2:
+                    s["start_time"] = cut
+                    if i > 0 and items[i - 1]["end_time"] > cut:
+                        items[i - 1]["end_time"] = cut
+            cut = self._nearest_cut(s["end_time"])
+            if cut is not None and cut > s["start_time"] + opts.min_duration / 2:
+                nxt = items[i + 1] if i + 1 < len(items) else None
+                if nxt is None or cut <= nxt["start_time"]:
+                    s["end_time"] = cut
+
+    def _enforce_min_duration(self, items: List[dict]):
+        opts = self.options
+        for i, s in enumerate(items):
+            if s["end_time"] - s["start_time"] >= opts.min_duration:
+                continue
+            limit = items[i + 1]["start_time"] - opts.min_gap if i + 1 < len(items) else float("inf")
+            s["end_time"] = max(s["end_time"], min(s["start_time"] + opts.min_duration, limit))
+
+
+# Process-wide cache for time lookups from preview players.
+segment_index_cache: LRUCache[tuple, SegmentIndex] = LRUCache(max_size=256)
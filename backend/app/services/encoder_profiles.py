@@ -0,0 +1,273 @@
+"""
+Encoder Profiles
+Pick the x264 preset for each render quality tier by measuring this box.
+
+Each quality tier fixes a CRF and a reference preset (the old hard-coded
+pair). The benchmark encodes a short synthetic 1080×1920 clip with the
+reference and then with faster presets, fastest first, and keeps the
+first preset whose SSIM is within ``max_ssim_loss`` of the reference and
+whose bitrate is at most ``max_bitrate_increase`` higher. The chosen
+profiles, with the encode fps measured for each, are stored per hardware
+fingerprint in ``ENCODER_PROFILE_PATH`` and reused until the hardware or
+FFmpeg build changes.
+
+Until a benchmark has run, tiers use their reference preset. API
+processes and render workers on one host share the file, so only the one
+holding an exclusive lock beside it (``<path>.lock``) benchmarks; the
+others keep their reference presets and load its result once it is
+stored, instead of running concurrent benchmarks that skew each other.
+
+Run on demand with ``python -m benchmarks.encoder_profiles``.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import platform
+import re
+import tempfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services.ffmpeg_runner import ffmpeg_runner
+
+
+# Fastest first
+CANDIDATE_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower")
+
+BENCHMARK_SIZE = "1080x1920"
+BENCHMARK_FPS = 30
+# Moving test pattern with light temporal grain, so presets differ the way they do on camera footage
+BENCHMARK_SOURCE = "testsrc2=s={size}:r={fps}:d={seconds},noise=alls=3:allf=t"
+
+# How often a process waiting on another's benchmark checks for stored profiles
+BENCHMARK_POLL_SECONDS = 15.0
+
+
+@dataclass(frozen=True)
+class QualityTarget:
+    """What a quality tier must deliver."""
+
+    crf: int
+    reference_preset: str
+    max_ssim_loss: float = 0.002  # vs the reference preset, same CRF
+    max_bitrate_increase: float = 0.15  # fraction over the reference preset's bitrate
+
+
+QUALITY_TARGETS: Dict[str, QualityTarget] = {
+    "low": QualityTarget(crf=28, reference_preset="fast"),
+    "medium": QualityTarget(crf=23, reference_preset="medium"),
+    "high": QualityTarget(crf=18, reference_preset="slow"),
+    "ultra": QualityTarget(crf=15, reference_preset="slower"),
+}
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    """The encoder settings a tier renders with."""
+
+    tier: str
+    preset: str
+    crf: int
+    codec: str = "libx264"
+    ssim: Optional[float] = None  # on the benchmark clip
+    kbps: Optional[float] = None
+    encode_fps: Optional[float] = None
+    measured: bool = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.codec} {self.preset} crf{self.crf}"
+
+    def encode_args(self) -> List[str]:
+        return ["-c:v", self.codec, "-crf", str(self.crf), "-preset", self.preset]
+
+
+def default_profile(tier: str) -> EncoderProfile:
+    target = QUALITY_TARGETS.get(tier) or QUALITY_TARGETS["high"]
+    return EncoderProfile(tier=tier if tier in QUALITY_TARGETS else "high", preset=target.reference_preset, crf=target.crf)
+
+
+def hardware_fingerprint() -> str:
+    """Identifies what encode speed depends on: CPU model and count, and the FFmpeg binary."""
+    cpu_model = platform.processor() or ""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu_model = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    try:
+        ffmpeg_mtime = int(os.path.getmtime(settings.FFMPEG_PATH))
+    except OSError:
+        ffmpeg_mtime = 0
+    return f"{platform.machine()}|{cpu_model}|{os.cpu_count()}|{settings.FFMPEG_PATH}@{ffmpeg_mtime}"
+
+
+async def _measure(preset: str, crf: int, source: str, seconds: float, tmp_dir: str) -> Dict[str, float]:
+    """Encode the benchmark clip once; returns encode fps, SSIM against the source and bitrate."""
+    output_path = os.path.join(tmp_dir, f"{preset}_{crf}.mp4")
+    encoded = await ffmpeg_runner.run(
+        [
+            "-y", "-f", "lavfi", "-i", source,
+            "-c:v", "libx264", "-crf", str(crf), "-preset", preset, "-pix_fmt", "yuv420p",
+            output_path,
+        ],
+        timeout=600,
+    )
+    compared = await ffmpeg_runner.run(
+        [
+            "-i", output_path, "-f", "lavfi", "-i", source,
+            "-lavfi", "[0:v]format=yuv420p[enc];[1:v]format=yuv420p[ref];[enc][ref]ssim",
+            "-f", "null", "-",
+        ],
+        timeout=600,
+    )
+    match = re.search(r"All:([0-9.]+)", compared.stderr)
+    frames = seconds * BENCHMARK_FPS
+    return {
+        "encode_fps": frames / max(encoded.elapsed_seconds, 1e-6),
+        "ssim": float(match.group(1)) if match else 0.0,
+        "kbps": os.path.getsize(output_path) * 8 / 1000 / seconds,
+    }
+
+
+async def benchmark_profiles(seconds: Optional[float] = None) -> Dict[str, EncoderProfile]:
+    """Measure presets on this machine and choose one per tier."""
+    seconds = seconds or settings.ENCODER_BENCHMARK_SECONDS
+    source = BENCHMARK_SOURCE.format(size=BENCHMARK_SIZE, fps=BENCHMARK_FPS, seconds=seconds)
+    profiles: Dict[str, EncoderProfile] = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for tier, target in QUALITY_TARGETS.items():
+            reference = await _measure(target.reference_preset, target.crf, source, seconds, tmp_dir)
+            chosen_preset, chosen = target.reference_preset, reference
+
+            for preset in CANDIDATE_PRESETS[:CANDIDATE_PRESETS.index(target.reference_preset)]:
+                result = await _measure(preset, target.crf, source, seconds, tmp_dir)
+                if (
+                    result["ssim"] >= reference["ssim"] - target.max_ssim_loss
+                    and result["kbps"] <= reference["kbps"] * (1 + target.max_bitrate_increase)
+                ):
+                    chosen_preset, chosen = preset, result
+                    break
+
+            profiles[tier] = EncoderProfile(
+                tier=tier,
+                preset=chosen_preset,
+                crf=target.crf,
+                ssim=round(chosen["ssim"], 5),
+                kbps=round(chosen["kbps"], 1),
+                encode_fps=round(chosen["encode_fps"], 2),
+                measured=True,
+            )
+            print(
+                f"Encoder profile {tier}: {profiles[tier].label} at {chosen['encode_fps']:.1f} fps "
+                f"(reference {target.reference_preset}: {reference['encode_fps']:.1f} fps)"
+            )
+    return profiles
+
+
+class EncoderProfiles:
+    """Profiles in use by this process, persisted per hardware fingerprint."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._profiles: Dict[str, EncoderProfile] = {}
+        self._benchmark: Optional[asyncio.Task] = None
+
+    def get(self, tier: str) -> EncoderProfile:
+        return self._profiles.get(tier) or default_profile(tier)
+
+    def load(self) -> bool:
+        """Load stored profiles for this hardware; False if there are none."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+        entry = stored.get(hardware_fingerprint())
+        if not entry:
+            return False
+        self._profiles = {
+            tier: EncoderProfile(**profile)
+            for tier, profile in (entry.get("profiles") or {}).items()
+            # Ignore tiers whose target changed since the benchmark
+            if tier in QUALITY_TARGETS and profile.get("crf") == QUALITY_TARGETS[tier].crf
+        }
+        return bool(self._profiles)
+
+    def save(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+        stored[hardware_fingerprint()] = {
+            "measured_at": datetime.utcnow().isoformat(),
+            "profiles": {tier: asdict(profile) for tier, profile in self._profiles.items()},
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
+
+    @contextmanager
+    def _benchmark_lock(self, blocking: bool = True):
+        """
+        Host-wide benchmark lock (a flock on ``<path>.lock``). Yields
+        whether it was acquired; without ``blocking`` it does not wait.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def refresh(self, seconds: Optional[float] = None):
+        """Benchmark now and store the result (waits for a benchmark running in another process)."""
+        with self._benchmark_lock():
+            self._profiles = await benchmark_profiles(seconds)
+            self.save()
+
+    def ensure(self):
+        """Load stored profiles, or benchmark in the background if enabled (called at startup)."""
+        if self.load() or not settings.ENCODER_BENCHMARK_ON_STARTUP or self._benchmark is not None:
+            return
+        self._benchmark = asyncio.create_task(self._refresh_in_background())
+
+    async def _refresh_in_background(self):
+        try:
+            with self._benchmark_lock(blocking=False) as acquired:
+                if acquired:
+                    # Another process may have stored profiles since load()
+                    if not self.load():
+                        self._profiles = await benchmark_profiles()
+                        self.save()
+                    return
+            # Another process on this host is benchmarking: wait for its result
+            while not self.load():
+                await asyncio.sleep(BENCHMARK_POLL_SECONDS)
+                with self._benchmark_lock(blocking=False) as acquired:
+                    if acquired and not self.load():
+                        print("Encoder benchmark in another process stored nothing, using reference presets")
+                        return
+        except Exception as e:
+            print(f"Encoder benchmark failed, using reference presets: {e}")
+
+
+# Process-wide profiles used by template renders
+encoder_profiles = EncoderProfiles(settings.ENCODER_PROFILE_PATH)
+
@@ -0,0 +1,318 @@
+"""
+FFmpeg Runner
+Shared async subprocess runner for every FFmpeg/ffprobe invocation.
+
+Encodes run via ``asyncio.create_subprocess_exec`` so they never block the
+event loop. A process-wide semaphore caps concurrent FFmpeg processes to
+the CPU count, each run has a timeout, cancelling the awaiting task kills
+the process, stderr is kept only up to a bounded tail, and ``-progress``
+output is parsed into structured events.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+
+class FFmpegError(RuntimeError):
+    """FFmpeg exited with an error (or could not be started)."""
+
+    def __init__(self, message: str, returncode: Optional[int] = None, stderr: str = ""):
+        super().__init__(message)
+        self.returncode = returncode
+        self.stderr = stderr
+
+
+class FFmpegTimeoutError(FFmpegError):
+    """FFmpeg did not finish within its timeout and was killed."""
+
+
+@dataclass
+class FFmpegProgress:
+    """One parsed ``-progress`` block."""
+
+    out_time_seconds: float = 0.0
+    frame: int = 0
+    fps: float = 0.0
+    speed: float = 0.0
+    percent: float = 0.0
+    done: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class FFmpegResult:
+    """Outcome of a successful FFmpeg run."""
+
+    returncode: int
+    elapsed_seconds: float
+    stderr: str
+    stdout: bytes = b""
+    last_progress: Optional[FFmpegProgress] = None
+
+
+ProgressCallback = Callable[[FFmpegProgress], Awaitable[None]]
+
+
+def parse_progress_block(block: Dict[str, str], duration: Optional[float]) -> FFmpegProgress:
+    """Convert one FFmpeg ``-progress`` key=value block into an FFmpegProgress."""
+
+    def number(key: str, cast=float, default=0):
+        value = (block.get(key) or "").strip().rstrip("x")
+        try:
+            return cast(value) if value and value != "N/A" else default
+        except ValueError:
+            return default
+
+    # out_time_ms is actually microseconds in FFmpeg's output
+    out_time_us = number("out_time_us", int) or number("out_time_ms", int)
+    out_time = max(0.0, out_time_us / 1_000_000)
+    done = block.get("progress") == "end"
+
+    if done:
+        percent = 100.0
+    elif duration and duration > 0:
+        percent = min(99.0, out_time / duration * 100)
+    else:
+        percent = 0.0
+
+    return FFmpegProgress(
+        out_time_seconds=out_time,
+        frame=number("frame", int),
+        fps=number("fps"),
+        speed=number("speed"),
+        percent=percent,
+        done=done,
+    )
+
+
+class FFmpegRunner:
+    """Run FFmpeg processes without blocking the event loop."""
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self.max_concurrent = max_concurrent or settings.FFMPEG_MAX_CONCURRENT or (os.cpu_count() or 1)
+        self.stderr_max_bytes = settings.FFMPEG_STDERR_MAX_BYTES
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+    async def run(
+        self,
+        args: List[str],
+        duration: Optional[float] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        timeout: Optional[float] = None,
+        capture_stdout: bool = False,
+    ) -> FFmpegResult:
+        """
+        Run ``ffmpeg <args>`` and wait for it to finish.
+
+        Args:
+            args: FFmpeg arguments (without the binary).
+            duration: Expected output duration in seconds, used for ``percent``.
+            on_progress: Awaited with an FFmpegProgress for every progress block.
+            timeout: Seconds before the process is killed
+                (default ``settings.FFMPEG_TIMEOUT_SECONDS``).
+            capture_stdout: Return stdout bytes (e.g. ``-f null -`` analysis
+                or piped output). Not combinable with ``on_progress``.
+
+        Raises:
+            FFmpegError: Non-zero exit status.
+            FFmpegTimeoutError: Timeout exceeded.
+        """
+        if on_progress and capture_stdout:
+            raise ValueError("on_progress and capture_stdout both need stdout")
+
+        command = [settings.FFMPEG_PATH, "-hide_banner", "-nostdin"]
+        if on_progress:
+            command += ["-nostats", "-progress", "pipe:1"]
+        command += list(args)
+
+        timeout = timeout if timeout is not None else settings.FFMPEG_TIMEOUT_SECONDS
+
+        async with self._semaphore:
+            started = time.monotonic()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE if (on_progress or capture_stdout) else asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except OSError as e:
+                raise FFmpegError(f"FFmpeg could not be started: {e}") from e
+
+            last_progress: Optional[FFmpegProgress] = None
+            stdout_data = b""
+
+            async def read_stdout():
+                nonlocal last_progress, stdout_data
+                if capture_stdout:
+                    stdout_data = await process.stdout.read()
+                    return
+                if not on_progress:
+                    return
+                block: Dict[str, str] = {}
+                async for raw in process.stdout:
+                    key, _, value = raw.decode("utf-8", "replace").strip().partition("=")
+                    block[key] = value
+                    # "progress=continue|end" terminates each block
+                    if key == "progress":
+                        last_progress = parse_progress_block(block, duration)
+                        await on_progress(last_progress)
+                        block = {}
+
+            async def communicate():
+                stderr_task = asyncio.create_task(self._drain_stderr(process.stderr))
+                try:
+                    await read_stdout()
+                    await process.wait()
+                    return await stderr_task
+                finally:
+                    stderr_task.cancel()
+
+            try:
+                stderr = await asyncio.wait_for(communicate(), timeout=timeout)
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                raise FFmpegTimeoutError(f"FFmpeg timed out after {timeout}s")
+            except BaseException:
+                # Cancelled (or progress callback failed): never leave an orphan encode
+                await self._kill(process)
+                raise
+
+            stderr_text = stderr.decode("utf-8", "replace")
+            if process.returncode != 0:
+                raise FFmpegError(
+                    f"FFmpeg error: {stderr_text.strip()}",
+                    returncode=process.returncode,
+                    stderr=stderr_text,
+                )
+
+            return FFmpegResult(
+                returncode=process.returncode,
+                elapsed_seconds=time.monotonic() - started,
+                stderr=stderr_text,
+                stdout=stdout_data,
+                last_progress=last_progress,
+            )
+
+    async def probe(self, path: str, timeout: float = 30.0) -> Optional[Dict[str, Any]]:
+        """
+        Return {"duration": float|None, "audio_codec": str|None} using ffprobe.
+
+        Returns None if the file could not be probed. ffprobe is cheap and
+        does not take an encode slot.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                settings.FFPROBE_PATH,
+                "-v", "error",
+                "-show_entries", "format=duration:stream=codec_type,codec_name",
+                "-of", "json",
+                path,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            return None
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+
+        if process.returncode != 0:
+            return None
+        try:
+            data = json.loads(stdout or b"{}")
+        except json.JSONDecodeError:
+            return None
+
+        audio_codec = next(
+            (st.get("codec_name") for st in data.get("streams") or [] if st.get("codec_type") == "audio"),
+            None,
+        )
+        try:
+            duration = float((data.get("format") or {}).get("duration"))
+        except (TypeError, ValueError):
+            duration = None
+        return {"duration": duration, "audio_codec": audio_codec}
+
+    async def keyframes(self, path: str, timeout: float = 120.0) -> Optional[List[float]]:
+        """
+        Return sorted keyframe timestamps of the first video stream.
+
+        Reads packet flags only (no decoding). Returns None if ffprobe is
+        unavailable or the file could not be read.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                settings.FFPROBE_PATH,
+                "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags",
+                "-of", "csv=p=0",
+                path,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await self._kill(process)
+            return None
+        except asyncio.CancelledError:
+            await self._kill(process)
+            raise
+
+        if process.returncode != 0:
+            return None
+
+        times = []
+        for line in stdout.decode("utf-8", "replace").splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" not in flags:
+                continue
+            try:
+                times.append(float(pts_time))
+            except ValueError:
+                continue
+        return sorted(times)
+
+    async def _drain_stderr(self, stream: asyncio.StreamReader) -> bytes:
+        """Read stderr to EOF keeping only the last ``stderr_max_bytes``."""
+        tail = bytearray()
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                return bytes(tail)
+            tail += chunk
+            if len(tail) > self.stderr_max_bytes:
+                del tail[: len(tail) - self.stderr_max_bytes]
+
+    async def _kill(self, process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+
+# Process-wide runner; its semaphore bounds FFmpeg processes across all services.
+ffmpeg_runner = FFmpegRunner()
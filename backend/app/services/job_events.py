@@ -0,0 +1,244 @@
+"""
+Job Event Streaming
+Pub/sub for job progress, served to clients as Server-Sent Events.
+
+Background jobs (transcription, caption burn-in, thumbnail generation and
+template renders) publish status changes and partial results to a channel
+per job; the ``/events`` endpoints stream them so clients no longer poll
+the full record. Events reach subscribers in the publishing process
+directly and, once ``start()`` has run, every other API or render worker
+process through Redis pub/sub (``REDIS_URL``). Delivery is best effort,
+so streams also re-read a cheap status snapshot every
+``SSE_RECHECK_SECONDS`` (covers dropped events and Redis outages) and end
+once the job reaches a terminal state.
+"""
+
+import asyncio
+import json
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import count
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import redis.asyncio as redis
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+
+
+# Event names that end a stream
+TERMINAL_EVENTS = {"completed", "failed", "cancelled"}
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    """One published event."""
+
+    id: int
+    event: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> str:
+        payload = json.dumps(self.data, ensure_ascii=False, default=str)
+        return f"id: {self.id}\nevent: {self.event}\ndata: {payload}\n\n"
+
+
+def channel_name(kind: str, job_id: Any) -> str:
+    """Channel key for a job, e.g. ``caption:<uuid>``."""
+    return f"{kind}:{job_id}"
+
+
+class JobEventBus:
+    """Fan out job events to subscribed streams, here and in other processes."""
+
+    def __init__(self, max_queue: int = 256, redis_url: Optional[str] = None):
+        self.max_queue = max_queue
+        self.redis_url = redis_url or settings.REDIS_URL
+        # Identifies this process's messages so they are not delivered twice
+        self.origin = uuid.uuid4().hex
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._ids = count(1)
+        self._outbox: Optional[asyncio.Queue] = None
+        self._redis: Optional[redis.Redis] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def publish(self, channel: str, event: str, data: Optional[Dict[str, Any]] = None):
+        """Deliver an event to every subscriber of ``channel`` (never blocks)."""
+        data = data or {}
+        self._deliver(channel, event, data)
+        if self._outbox is not None:
+            if self._outbox.full():
+                # Redis is down or slow: drop the oldest, the periodic snapshot catches up
+                self._outbox.get_nowait()
+            self._outbox.put_nowait(json.dumps(
+                {"origin": self.origin, "channel": channel, "event": event, "data": data},
+                ensure_ascii=False,
+                default=str,
+            ))
+
+    def _deliver(self, channel: str, event: str, data: Dict[str, Any]):
+        queues = self._subscribers.get(channel)
+        if not queues:
+            return
+        item = JobEvent(next(self._ids), event, data)
+        for queue in queues:
+            if queue.full():
+                # Slow client: drop the oldest event, the periodic snapshot catches up
+                queue.get_nowait()
+            queue.put_nowait(item)
+
+    @contextmanager
+    def subscribe(self, channel: str) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    # --- cross-process relay ---
+
+    def start(self, listen: bool = True):
+        """
+        Relay events through Redis: forward what this process publishes and,
+        with ``listen``, deliver what other processes publish. Render workers
+        only publish, so they skip listening.
+        """
+        if self._tasks or not settings.JOB_EVENTS_RELAY:
+            return
+        self._redis = redis.from_url(self.redis_url)
+        self._outbox = asyncio.Queue(maxsize=settings.JOB_EVENTS_OUTBOX_SIZE)
+        self._tasks.append(asyncio.create_task(self._forward()))
+        if listen:
+            self._tasks.append(asyncio.create_task(self._listen()))
+
+    async def shutdown(self, flush_seconds: float = 2.0):
+        """Give queued events a moment to reach Redis, then stop relaying."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._outbox.join(), timeout=flush_seconds)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._outbox = None
+        await self._redis.aclose()
+        self._redis = None
+
+    async def _forward(self):
+        """Publish queued events to Redis; events are dropped while Redis is unreachable."""
+        failing = False
+        while True:
+            message = await self._outbox.get()
+            try:
+                await self._redis.publish(settings.JOB_EVENTS_REDIS_CHANNEL, message)
+                failing = False
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not failing:
+                    print(f"Error relaying job events to Redis: {e}")
+                failing = True
+            finally:
+                self._outbox.task_done()
+
+    async def _listen(self):
+        """Deliver events published by other processes, reconnecting after errors."""
+        failing = False
+        while True:
+            try:
+                async with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(settings.JOB_EVENTS_REDIS_CHANNEL)
+                    failing = False
+                    async for message in pubsub.listen():
+                        if message.get("type") != "message":
+                            continue
+                        try:
+                            payload = json.loads(message["data"])
+                        except ValueError:
+                            continue
+                        if payload.get("origin") == self.origin:
+                            continue
+                        self._deliver(payload["channel"], payload["event"], payload.get("data") or {})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not failing:
+                    print(f"Error receiving job events from Redis: {e}")
+                failing = True
+            await asyncio.sleep(settings.JOB_EVENTS_RETRY_SECONDS)
+
+
+# Snapshot loader: returns (event, data) describing current state, or None if gone
+SnapshotLoader = Callable[[], Awaitable[Optional[Tuple[str, Dict[str, Any]]]]]
+
+
+async def sse_stream(
+    channel: str,
+    initial: List[Tuple[str, Dict[str, Any]]],
+    load_snapshot: Optional[SnapshotLoader] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for ``channel``: the ``initial`` events, then live events.
+
+    Ends after a terminal event (see TERMINAL_EVENTS). When the channel is
+    idle for ``SSE_RECHECK_SECONDS``, ``load_snapshot`` is consulted and its
+    event is sent if the state changed; a comment line keeps proxies from
+    closing the idle connection.
+    """
+    with job_events.subscribe(channel) as queue:
+        last_snapshot = None
+        for event, data in initial:
+            last_snapshot = (event, data)
+            yield JobEvent(0, event, data).to_sse()
+            if event in TERMINAL_EVENTS:
+                return
+
+        while True:
+            try:
+                item: JobEvent = await asyncio.wait_for(queue.get(), timeout=settings.SSE_RECHECK_SECONDS)
+            except asyncio.TimeoutError:
+                snapshot = await load_snapshot() if load_snapshot else None
+                if snapshot is None and load_snapshot is not None:
+                    yield JobEvent(0, "failed", {"error_message": "Job no longer exists"}).to_sse()
+                    return
+                if snapshot is not None and snapshot != last_snapshot:
+                    last_snapshot = snapshot
+                    yield JobEvent(0, *snapshot).to_sse()
+                    if snapshot[0] in TERMINAL_EVENTS:
+                        return
+                else:
+                    yield ": keep-alive\n\n"
+                continue
+
+            yield item.to_sse()
+            if item.event in TERMINAL_EVENTS:
+                return
+
+
+def sse_response(
+    channel: str,
+    initial: List[Tuple[str, Dict[str, Any]]],
+    load_snapshot: Optional[SnapshotLoader] = None,
+) -> StreamingResponse:
+    """StreamingResponse serving ``sse_stream`` with proxy buffering disabled."""
+    return StreamingResponse(
+        sse_stream(channel, initial, load_snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Process-wide bus shared by services and endpoints.
+job_events = JobEventBus()
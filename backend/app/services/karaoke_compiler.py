@@ -0,0 +1,227 @@
+"""
+Karaoke ASS Compiler
+Turns caption segments and word timestamps into precomputed ASS events.
+
+Two modes are supported:
+
+- ``line``: one Dialogue per segment with ``\\k`` sweep tags (classic karaoke).
+- ``word``: segments are chunked into lines of at most N words and every
+  word gets its own short event with the active word highlighted and the
+  preset's ``animation`` (pop_in, fade, slide_up, flicker, typewriter)
+  baked in, so the renderer only has to draw static events.
+
+Segment boundaries near a detected shot change are snapped onto it.
+Compiled event lists are cached per caption revision so repeated burns and
+exports of long transcripts skip recompilation, and inactive words are
+emitted with identical markup so libass can reuse its glyph caches.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.lru import LRUCache
+from app.models.caption import KaraokeMode
+from app.services.caption_timing import snap_to_cuts
+
+
+# Timings (ms / px) for the pre-baked CAPTION_STYLES animations
+POP_MS = 90
+SLIDE_MS = 150
+SLIDE_PX = 40
+
+
+def format_ass_time(seconds: float) -> str:
+    """Format time for ASS (H:MM:SS.cc)."""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    centis = int((seconds % 1) * 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+
+def line_karaoke_text(words: List[dict]) -> str:
+    """Build ASS karaoke (\\k) sequence from word timestamps."""
+    parts: List[str] = []
+    for idx, w in enumerate(words):
+        word = (w.get("word") or "").strip()
+        if not word:
+            continue
+        start = float(w.get("start", 0))
+        end = float(w.get("end", start))
+        dur_cs = max(1, int(round((end - start) * 100)))
+        prefix = "" if idx == 0 else " "
+        parts.append(f"{{\\k{dur_cs}}}{prefix}{word}")
+    return "".join(parts)
+
+
+def ass_color_override(hex_color: str, default: str = "FFFFFF") -> str:
+    """Convert #RRGGBB to the &HBBGGRR& form used by \\c override tags."""
+    h = (hex_color or "").lstrip("#")
+    if len(h) != 6:
+        h = default
+    return f"&H{h[4:6]}{h[2:4]}{h[0:2]}&".upper()
+
+
+@dataclass(frozen=True)
+class AssEvent:
+    """A single precomputed Dialogue event."""
+
+    start: float
+    end: float
+    text: str
+    layer: int = 0
+
+    def to_dialogue(self) -> str:
+        return (
+            f"Dialogue: {self.layer},{format_ass_time(self.start)},{format_ass_time(self.end)},"
+            f"Default,,0,0,0,,{self.text}"
+        )
+
+
+class KaraokeCompiler:
+    """Compile caption segments into ASS events for one CAPTION_STYLES preset."""
+
+    def __init__(
+        self,
+        preset: Dict[str, Any],
+        mode: KaraokeMode = KaraokeMode.LINE,
+        max_words_per_line: Optional[int] = None,
+        highlight_color: str = "#FFD700",
+        play_res: Tuple[int, int] = (1080, 1920),
+        alignment: int = 2,
+        margin_v: int = 110,
+        shot_changes: Optional[Sequence[float]] = None,
+        snap_tolerance: Optional[float] = None,
+    ):
+        self.preset = preset
+        self.mode = KaraokeMode(mode)
+        self.max_words_per_line = max(1, max_words_per_line or settings.KARAOKE_MAX_WORDS_PER_LINE)
+        self.highlight_tag = ass_color_override(highlight_color, default="FFD700")
+        self.primary_tag = ass_color_override(preset.get("color"))
+        self.play_res = play_res
+        self.alignment = alignment
+        self.margin_v = margin_v
+        self.animation = preset.get("animation") or "highlight"
+        self.uppercase = preset.get("text_transform") == "uppercase"
+        self.cuts = sorted(shot_changes or [])
+        self.snap_tolerance = settings.SCENE_SNAP_TOLERANCE if snap_tolerance is None else snap_tolerance
+
+    def snap(self, t: float) -> float:
+        """Snap a segment boundary onto a nearby shot change."""
+        return snap_to_cuts(float(t), self.cuts, self.snap_tolerance)
+
+    def compile(self, segments: Iterable[dict], karaoke: bool = True) -> Iterator[AssEvent]:
+        """Yield ASS events in time order for the given segment dicts."""
+        for segment in segments:
+            words = self._clean_words(segment.get("words")) if karaoke else []
+
+            if self.mode == KaraokeMode.LINE or not words:
+                if karaoke and segment.get("words"):
+                    text = line_karaoke_text(segment["words"])
+                else:
+                    text = (segment.get("text") or "").replace("\n", "\\N").strip()
+                start = self.snap(segment.get("start_time", 0))
+                end = self.snap(segment.get("end_time", 0))
+                yield AssEvent(start, max(start, end), text)
+                continue
+
+            yield from self._compile_word_segment(segment, words)
+
+    def _clean_words(self, words: Optional[List[dict]]) -> List[dict]:
+        cleaned = []
+        for w in words or []:
+            text = (w.get("word") or "").strip()
+            if not text:
+                continue
+            start = float(w.get("start", 0))
+            end = max(start, float(w.get("end", start)))
+            cleaned.append({"word": text.upper() if self.uppercase else text, "start": start, "end": end})
+        cleaned.sort(key=lambda w: w["start"])
+        return cleaned
+
+    def _compile_word_segment(self, segment: dict, words: List[dict]) -> Iterator[AssEvent]:
+        n = self.max_words_per_line
+        chunks = [words[i:i + n] for i in range(0, len(words), n)]
+
+        raw_start = float(segment.get("start_time", words[0]["start"]))
+        raw_end = float(segment.get("end_time", words[-1]["end"]))
+        segment_start = self.snap(raw_start)
+        segment_end = self.snap(raw_end)
+        if segment_start == raw_start:
+            segment_start = min(raw_start, words[0]["start"])
+        if segment_end == raw_end:
+            segment_end = max(raw_end, words[-1]["end"])
+
+        for c, chunk in enumerate(chunks):
+            # Each line stays up until the next line (or the segment) ends
+            line_start = segment_start if c == 0 else chunk[0]["start"]
+            line_end = chunks[c + 1][0]["start"] if c + 1 < len(chunks) else segment_end
+
+            first = True
+            # Lead-in before the first word is spoken: line shown, nothing highlighted
+            if chunk[0]["start"] - line_start >= 0.01 and self.animation != "typewriter":
+                yield AssEvent(line_start, chunk[0]["start"], self._line_text(chunk, None, first))
+                first = False
+
+            for k, word in enumerate(chunk):
+                start = max(word["start"], line_start)
+                end = min(chunk[k + 1]["start"] if k + 1 < len(chunk) else line_end, line_end)
+                if end - start < 0.01:
+                    continue
+                yield AssEvent(start, end, self._line_text(chunk, k, first))
+                first = False
+
+    def _line_text(self, chunk: List[dict], active: Optional[int], first: bool) -> str:
+        """Markup for one line with word ``active`` highlighted."""
+        prefix = self._line_tags() if first else ""
+        parts: List[str] = []
+        for i, word in enumerate(chunk):
+            text = word["word"]
+            if self.animation == "typewriter" and (active is None or i > active):
+                # Keep unspoken words in the layout, hidden, so the line does not reflow
+                hidden_from = 0 if active is None else active + 1
+                parts.append(f"{{\\alpha&HFF&}}{text}" if i == hidden_from else text)
+            elif i == active:
+                parts.append(f"{{{self._word_tags()}}}{text}{{{self._reset_tags()}}}")
+            else:
+                parts.append(text)
+        return prefix + " ".join(parts)
+
+    def _word_tags(self) -> str:
+        tags = f"\\c{self.highlight_tag}"
+        if self.animation == "pop_in":
+            tags += f"\\fscx125\\fscy125\\t(0,{POP_MS},\\fscx100\\fscy100)"
+        return tags
+
+    def _reset_tags(self) -> str:
+        # Explicit resets rather than \r so line-level animation keeps applying
+        tags = f"\\c{self.primary_tag}"
+        if self.animation == "pop_in":
+            tags += "\\fscx100\\fscy100"
+        return tags
+
+    def _line_tags(self) -> str:
+        if self.animation == "fade":
+            return "{\\fad(120,0)}"
+        if self.animation == "flicker":
+            return "{\\alpha&HFF&\\t(0,60,\\alpha&H00&)\\t(60,100,\\alpha&H80&)\\t(100,160,\\alpha&H00&)}"
+        if self.animation == "slide_up":
+            x, y = self._anchor()
+            return f"{{\\move({x},{y + SLIDE_PX},{x},{y},0,{SLIDE_MS})}}"
+        return ""
+
+    def _anchor(self) -> Tuple[int, int]:
+        """Default libass anchor point for the style's alignment (margins L/R are equal)."""
+        width, height = self.play_res
+        if self.alignment in (7, 8, 9):
+            y = self.margin_v
+        elif self.alignment in (4, 5, 6):
+            y = height // 2
+        else:
+            y = height - self.margin_v
+        return width // 2, y
+
+
+# Process-wide cache shared by every CaptionService instance.
+compiled_ass_cache: LRUCache[tuple, List[str]] = LRUCache(settings.KARAOKE_CACHE_SIZE)
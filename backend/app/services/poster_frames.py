@@ -0,0 +1,103 @@
+"""
+Poster Frames
+Pick a template render's thumbnail from frames captured by the render itself.
+
+The render's filter graph is split once more: besides the encoded video,
+a second output writes a handful of candidate frames as JPEGs (at 1 s and
+evenly through the video). No second FFmpeg process re-decodes the
+finished file. The candidates are then scored — edge energy for
+sharpness, penalised when too dark or blown out — and the best one
+becomes the poster.
+"""
+
+import glob
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageFilter, ImageStat
+
+
+# Scoring works on a small greyscale copy; the poster itself stays full size
+SCORE_SIZE = 256
+
+# Mean luma outside this range counts as too dark / too bright
+BRIGHTNESS_RANGE = (40.0, 215.0)
+
+
+def candidate_times(duration: float, fps: int, count: int) -> List[float]:
+    """Frame-aligned timestamps to capture: 1 s, then evenly spaced up to 90% of the video."""
+    if count <= 0 or duration <= 0:
+        return []
+    first = min(1.0, duration / 2)
+    last = duration * 0.9
+    if count == 1 or last <= first:
+        times = [first]
+    else:
+        step = (last - first) / (count - 1)
+        times = [first + i * step for i in range(count)]
+    frame = 1.0 / max(1, fps)
+    return sorted({round(t / frame) * frame for t in times})
+
+
+def attach_poster_output(
+    filter_complex: str,
+    map_label: str,
+    times: Sequence[float],
+    fps: int,
+    output_pattern: str,
+) -> Tuple[str, str, List[str]]:
+    """
+    Add a poster-frame branch to a render graph.
+
+    Returns (filter_complex, label to encode, extra output args). The
+    extra args are a complete second output and go after the main output
+    file. ``-frames:v`` closes that output after the last candidate, so a
+    segment encode does not run on to the end of the timeline.
+    """
+    if not times:
+        return filter_complex, map_label, []
+    half_frame = 0.5 / max(1, fps)
+    select = "+".join(
+        f"between(t\\,{t - half_frame:.6f}\\,{t + half_frame:.6f})" for t in times
+    )
+    graph = f"{filter_complex};{map_label}split=2[venc][vposter];[vposter]select='{select}'[vposterout]"
+    output_args = [
+        "-map", "[vposterout]",
+        "-frames:v", str(len(times)),
+        "-fps_mode", "passthrough",
+        "-q:v", "2",
+        output_pattern,
+    ]
+    return graph, "[venc]", output_args
+
+
+def score_frame(path: str) -> float:
+    """Higher is a better poster: sharp (edge variance) and reasonably exposed."""
+    with Image.open(path) as image:
+        grey = image.convert("L")
+        grey.thumbnail((SCORE_SIZE, SCORE_SIZE))
+        brightness = ImageStat.Stat(grey).mean[0]
+        sharpness = ImageStat.Stat(grey.filter(ImageFilter.FIND_EDGES)).var[0]
+
+    low, high = BRIGHTNESS_RANGE
+    if brightness < low:
+        exposure = brightness / low
+    elif brightness > high:
+        exposure = (255.0 - brightness) / (255.0 - high)
+    else:
+        exposure = 1.0
+    return sharpness * max(0.05, exposure)
+
+
+def pick_poster(directory: str, prefix: str = "poster_") -> Optional[str]:
+    """Best-scoring candidate frame written to ``directory``, or None if there are none."""
+    best_path, best_score = None, -1.0
+    for path in sorted(glob.glob(os.path.join(directory, f"{prefix}*.jpg"))):
+        try:
+            score = score_frame(path)
+        except OSError as e:
+            print(f"Skipping unreadable poster candidate {path}: {e}")
+            continue
+        if score > best_score:
+            best_path, best_score = path, score
+    return best_path
@@ -0,0 +1,145 @@
+"""
+Render Metrics
+Per-stage instrumentation for template renders.
+
+``render_template`` times each stage — asset fetch, plan build (compile
+and bind, including text sprite drawing), encode, upload and poster
+extraction — and records what FFmpeg's ``-progress`` output reported
+(encode fps and speed), upload throughput and the layer mix of the plan.
+The result is stored on ``UserTemplate.render_metrics``; failures record
+the stage they happened in and a short FFmpeg stderr tail instead of the
+whole log. ``GET /templates/render-metrics`` aggregates it per template.
+"""
+
+import time
+from contextlib import contextmanager
+from statistics import mean
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services.ffmpeg_runner import FFmpegError, FFmpegProgress, ProgressCallback
+
+
+STAGES = ("assets", "plan", "encode", "upload", "poster")
+
+# FFmpeg stderr lines kept with a failed render's metrics
+STDERR_TAIL_LINES = 20
+
+
+def stderr_tail(stderr: str, lines: int = STDERR_TAIL_LINES) -> str:
+    """Last ``lines`` non-empty lines of FFmpeg stderr (where the actual error is)."""
+    kept = [line for line in stderr.splitlines() if line.strip()]
+    return "\n".join(kept[-lines:])
+
+
+def failure_message(error: Exception, stage: Optional[str]) -> str:
+    """Short, user-facing description of a failed render."""
+    if isinstance(error, FFmpegError) and error.stderr:
+        # FFmpeg ends with generic lines ("Conversion failed!"); the first error in the tail is the cause
+        tail = stderr_tail(error.stderr).splitlines()
+        cause = next((line for line in tail if "error" in line.lower()), tail[-1] if tail else "")
+        detail = f"FFmpeg exited with status {error.returncode}: {cause.strip()}"
+    else:
+        detail = str(error)
+    return f"{stage.capitalize()} failed: {detail}" if stage else detail
+
+
+class RenderMetrics:
+    """Collects one render's timings and counters."""
+
+    def __init__(self, preview: bool = False):
+        self.preview = preview
+        self.stages: Dict[str, float] = {}
+        self.values: Dict[str, Any] = {}
+        self.failed_stage: Optional[str] = None
+        self._started = time.monotonic()
+        self._fps: List[float] = []
+        self._speed: List[float] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage; an exception inside marks it as the failed stage."""
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.failed_stage = self.failed_stage or name
+            raise
+        finally:
+            self.stages[name] = round(self.stages.get(name, 0.0) + time.monotonic() - started, 3)
+
+    def record(self, **values: Any):
+        self.values.update(values)
+
+    def track_progress(self, on_progress: Optional[ProgressCallback] = None) -> ProgressCallback:
+        """Wrap an FFmpeg progress callback to sample the encode fps and speed."""
+
+        async def callback(event: FFmpegProgress):
+            if not event.done:
+                if event.fps > 0:
+                    self._fps.append(event.fps)
+                if event.speed > 0:
+                    self._speed.append(event.speed)
+            if on_progress is not None:
+                await on_progress(event)
+
+        return callback
+
+    def to_dict(self, error: Optional[Exception] = None) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "preview": self.preview,
+            "total_seconds": round(time.monotonic() - self._started, 3),
+            "stages": dict(self.stages),
+            **self.values,
+        }
+        if self._fps:
+            result["progress_fps"] = round(mean(self._fps), 2)
+            result["peak_fps"] = round(max(self._fps), 2)
+        if self._speed:
+            result["progress_speed"] = round(mean(self._speed), 3)
+        if error is not None:
+            result["failed_stage"] = self.failed_stage
+            result["error"] = failure_message(error, self.failed_stage)
+            if isinstance(error, FFmpegError) and error.stderr:
+                result["stderr_tail"] = stderr_tail(error.stderr)
+        return result
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def aggregate(metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Summarise the stored metrics of several renders of one template."""
+    rendered = [m for m in metrics if not m.get("failed_stage") and not m.get("cache_hit")]
+    failures: Dict[str, int] = {}
+    for m in metrics:
+        if "error" in m:
+            stage = m.get("failed_stage") or "unknown"
+            failures[stage] = failures.get(stage, 0) + 1
+
+    def average(key: str) -> Optional[float]:
+        values = [m[key] for m in rendered if isinstance(m.get(key), (int, float))]
+        return round(mean(values), 3) if values else None
+
+    totals = [m["total_seconds"] for m in rendered if isinstance(m.get("total_seconds"), (int, float))]
+    stage_seconds = {}
+    for stage in STAGES:
+        values = [m["stages"][stage] for m in rendered if stage in (m.get("stages") or {})]
+        if values:
+            stage_seconds[stage] = round(mean(values), 3)
+
+    return {
+        "renders": len(metrics),
+        "cache_hits": sum(1 for m in metrics if m.get("cache_hit")),
+        "failures": failures,
+        "avg_total_seconds": round(mean(totals), 3) if totals else None,
+        "p95_total_seconds": round(_percentile(totals, 0.95), 3) if totals else None,
+        "avg_stage_seconds": stage_seconds,
+        "slowest_stage": max(stage_seconds, key=stage_seconds.get) if stage_seconds else None,
+        "avg_encode_fps": average("encode_fps"),
+        "avg_encode_speed": average("progress_speed"),
+        "avg_upload_mbps": average("upload_mbps"),
+        "avg_sprite_seconds": average("sprite_seconds"),
+        "layers": next((m.get("layers") for m in reversed(rendered) if m.get("layers")), None),
+    }
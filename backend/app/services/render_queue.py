@@ -0,0 +1,300 @@
+"""
+Template Render Queue
+Durable queue and worker pool for template renders.
+
+``POST /templates/render`` only inserts a ``template_render_jobs`` row.
+Workers claim queued jobs with ``FOR UPDATE SKIP LOCKED``, so any number
+of nodes can share the queue: the dedicated ``python -m app.render_worker``
+process, and (unless ``RENDER_WORKER_EMBEDDED`` is off) the API processes
+themselves. Each node runs at most ``RENDER_WORKER_CONCURRENCY`` renders.
+
+Running jobs heartbeat. Jobs whose worker died are re-queued by a periodic
+sweep, and transient failures are retried with exponential backoff up to
+``RENDER_JOB_MAX_ATTEMPTS``. On shutdown the pool stops claiming, lets
+running renders finish for up to ``RENDER_WORKER_DRAIN_SECONDS`` and puts
+whatever is left back in the queue without counting the attempt.
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.template import TemplateRenderJob, RenderJobStatus, UserTemplate
+from app.services.template_service import TemplateService
+
+
+# Seconds between heartbeats while a job renders
+HEARTBEAT_INTERVAL = 20.0
+
+
+async def active_render_job(db: AsyncSession, user_template_id: UUID) -> Optional[TemplateRenderJob]:
+    """The queued or running job for ``user_template_id``, if any."""
+    result = await db.execute(
+        select(TemplateRenderJob).where(
+            TemplateRenderJob.user_template_id == user_template_id,
+            TemplateRenderJob.status.in_([RenderJobStatus.QUEUED, RenderJobStatus.RUNNING]),
+        )
+    )
+    return result.scalars().first()
+
+
+def enqueue_render(
+    db: AsyncSession,
+    user_template: UserTemplate,
+    output_format: str = "mp4",
+    quality: str = "high",
+    watermark: bool = False,
+    preview_scale: Optional[int] = None,
+) -> TemplateRenderJob:
+    """Add a render job to the session; it is queued once the caller commits."""
+    job = TemplateRenderJob(
+        user_template_id=user_template.id,
+        user_id=user_template.user_id,
+        output_format=output_format,
+        quality=quality,
+        watermark=watermark,
+        preview_scale=preview_scale,
+        status=RenderJobStatus.QUEUED,
+        attempts=0,
+        available_at=datetime.utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+class RenderQueue:
+    """Per-node worker pool draining the shared template render queue."""
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = max(
+            1,
+            concurrency or settings.RENDER_WORKER_CONCURRENCY or (os.cpu_count() or 1) // 4,
+        )
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._tasks: List[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._draining = False
+
+    def start(self):
+        """Start the workers and the stale-job sweep."""
+        if self._tasks:
+            return
+        self._draining = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._sweeper = asyncio.create_task(self._sweep_stale())
+
+    def wake(self):
+        """Tell idle workers on this node that a job was queued."""
+        self._wake.set()
+
+    async def shutdown(self, drain_seconds: Optional[float] = None):
+        """
+        Stop claiming jobs and drain.
+
+        Running renders get ``drain_seconds`` (default
+        ``RENDER_WORKER_DRAIN_SECONDS``) to finish; the rest are cancelled
+        and re-queued for another node.
+        """
+        self._draining = True
+        self._wake.set()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+        tasks, self._tasks = self._tasks, []
+        if not tasks:
+            return
+        timeout = settings.RENDER_WORKER_DRAIN_SECONDS if drain_seconds is None else drain_seconds
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def requeue_stale_jobs(self) -> int:
+        """Re-queue RUNNING jobs whose worker stopped heartbeating; fail those out of attempts."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.RENDER_JOB_STALE_SECONDS)
+        stale = and_(
+            TemplateRenderJob.status == RenderJobStatus.RUNNING,
+            TemplateRenderJob.heartbeat_at < cutoff,
+        )
+        async with AsyncSessionLocal() as db:
+            exhausted = await db.execute(
+                update(TemplateRenderJob)
+                .where(stale, TemplateRenderJob.attempts >= settings.RENDER_JOB_MAX_ATTEMPTS)
+                .values(
+                    status=RenderJobStatus.FAILED,
+                    error_message="Render worker stopped responding",
+                    finished_at=datetime.utcnow(),
+                )
+                .returning(TemplateRenderJob.user_template_id)
+            )
+            failed_ids = list(exhausted.scalars())
+            if failed_ids:
+                await db.execute(
+                    update(UserTemplate)
+                    .where(UserTemplate.id.in_(failed_ids))
+                    .values(status="failed", error_message="Render worker stopped responding")
+                )
+            result = await db.execute(
+                update(TemplateRenderJob)
+                .where(stale)
+                .values(status=RenderJobStatus.QUEUED, worker_id=None, heartbeat_at=None)
+            )
+            await db.commit()
+        if result.rowcount:
+            self.wake()
+        return result.rowcount
+
+    async def _sweep_stale(self):
+        interval = max(1.0, settings.RENDER_JOB_STALE_SECONDS / 2)
+        while True:
+            try:
+                await self.requeue_stale_jobs()
+            except Exception as e:
+                print(f"Render queue stale sweep failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def _worker(self):
+        while not self._draining:
+            # Clear before claiming so a wake() during the claim is not lost
+            self._wake.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                print(f"Render queue claim failed: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=settings.RENDER_WORKER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._process(job)
+
+    async def _claim(self) -> Optional[TemplateRenderJob]:
+        """Claim the oldest available job, counting the attempt. Returns a detached row or None."""
+        now = datetime.utcnow()
+        candidate = (
+            select(TemplateRenderJob.id)
+            .where(
+                TemplateRenderJob.status == RenderJobStatus.QUEUED,
+                TemplateRenderJob.available_at <= now,
+            )
+            .order_by(TemplateRenderJob.available_at, TemplateRenderJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+
+        async with AsyncSessionLocal() as db:
+            job_id = (await db.execute(candidate)).scalar_one_or_none()
+            if job_id is None:
+                await db.commit()
+                return None
+            result = await db.execute(
+                update(TemplateRenderJob)
+                .where(TemplateRenderJob.id == job_id)
+                .values(
+                    status=RenderJobStatus.RUNNING,
+                    attempts=TemplateRenderJob.attempts + 1,
+                    worker_id=self.worker_id,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+                .returning(TemplateRenderJob)
+            )
+            job = result.scalar_one()
+            await db.commit()
+        return job
+
+    async def _process(self, job: TemplateRenderJob):
+        final_attempt = job.attempts >= settings.RENDER_JOB_MAX_ATTEMPTS
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            async with AsyncSessionLocal() as db:
+                await TemplateService(db).render_template(
+                    user_template_id=job.user_template_id,
+                    output_format=job.output_format,
+                    quality=job.quality,
+                    watermark=job.watermark,
+                    preview_scale=job.preview_scale,
+                    final_attempt=final_attempt,
+                )
+                row = (await db.execute(
+                    select(UserTemplate.status, UserTemplate.error_message)
+                    .where(UserTemplate.id == job.user_template_id)
+                    .execution_options(populate_existing=True)
+                )).one_or_none()
+        except asyncio.CancelledError:
+            if self._draining:
+                # Interrupted by shutdown: does not count as an attempt
+                await self._finish(
+                    job.id,
+                    RenderJobStatus.QUEUED,
+                    attempts=TemplateRenderJob.attempts - 1,
+                    worker_id=None,
+                    heartbeat_at=None,
+                )
+            raise
+        except Exception as e:
+            backoff = settings.RENDER_JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+            print(f"Render job {job.id} attempt {job.attempts} failed, retrying in {backoff:.0f}s: {e}")
+            await self._finish(
+                job.id,
+                RenderJobStatus.QUEUED,
+                available_at=datetime.utcnow() + timedelta(seconds=backoff),
+                error_message=str(e)[:2000],
+                worker_id=None,
+                heartbeat_at=None,
+            )
+        else:
+            if row is not None and row.status == "completed":
+                await self._finish(job.id, RenderJobStatus.COMPLETED, error_message=None)
+            else:
+                error = row.error_message if row is not None else "Template not found"
+                await self._finish(job.id, RenderJobStatus.FAILED, error_message=error)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: UUID):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            # A failed beat is retried next interval; ending the loop would let the
+            # stale sweep re-queue a job that is still running
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(TemplateRenderJob)
+                        .where(TemplateRenderJob.id == job_id)
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    await db.commit()
+            except Exception as e:
+                print(f"Render job {job_id} heartbeat failed: {e}")
+
+    async def _finish(self, job_id: UUID, status: RenderJobStatus, **values):
+        """Record a job's final (or re-queued) state in a fresh session."""
+        if status != RenderJobStatus.QUEUED:
+            values["finished_at"] = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(TemplateRenderJob)
+                .where(TemplateRenderJob.id == job_id)
+                .values(status=status, **values)
+            )
+            await db.commit()
+
+
+# This node's pool (API processes and the render worker each have one)
+render_queue = RenderQueue()
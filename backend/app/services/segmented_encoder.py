@@ -0,0 +1,148 @@
+"""
+Segmented Encoding
+Encode long videos as parallel time ranges and join them without re-encoding.
+
+A single libx264 process on a fast preset cannot keep every core busy.
+Long renders are therefore split into segments (on source keyframes when
+known, so input seeking is cheap), each segment is encoded video-only by
+its own FFmpeg process through the shared runner, and the pieces are
+joined with the concat demuxer (``-c copy``) while the audio is muxed
+from the source once. Callers shift time-based filters (subtitles) by the
+segment start so each piece renders exactly what the single pass would.
+"""
+
+import asyncio
+import os
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.services.ffmpeg_runner import ffmpeg_runner, FFmpegProgress, ProgressCallback
+
+
+@dataclass(frozen=True)
+class EncodeSegment:
+    """One time range of the output, in source seconds."""
+
+    index: int
+    start: float
+    duration: float
+
+
+def segment_parallelism(duration: float) -> int:
+    """Number of segments to encode for ``duration`` seconds (1 = single pass)."""
+    if not settings.SEGMENTED_ENCODE_ENABLED or duration < settings.SEGMENTED_ENCODE_MIN_SECONDS:
+        return 1
+    workers = settings.SEGMENTED_ENCODE_WORKERS or max(1, (os.cpu_count() or 1) // 2)
+    by_length = int(duration // max(1.0, settings.SEGMENTED_ENCODE_MIN_SEGMENT_SECONDS))
+    return max(1, min(workers, ffmpeg_runner.max_concurrent, by_length))
+
+
+def plan_segments(
+    duration: float,
+    count: int,
+    keyframes: Optional[Sequence[float]] = None,
+    frame_rate: Optional[float] = None,
+) -> List[EncodeSegment]:
+    """
+    Split [0, duration) into about ``count`` equal segments.
+
+    Boundaries move to the nearest keyframe when ``keyframes`` are given,
+    otherwise onto the frame grid when ``frame_rate`` is known.
+    """
+    if count <= 1 or duration <= 0:
+        return [EncodeSegment(0, 0.0, duration)]
+
+    min_gap = min(settings.SEGMENTED_ENCODE_MIN_SEGMENT_SECONDS, duration / count) / 2
+    keyframes = sorted(keyframes or [])
+    boundaries: List[float] = [0.0]
+    for i in range(1, count):
+        target = duration * i / count
+        if keyframes:
+            j = bisect_left(keyframes, target)
+            candidates = [keyframes[k] for k in (j - 1, j) if 0 <= k < len(keyframes)]
+            point = min(candidates, key=lambda k: abs(k - target))
+        elif frame_rate:
+            point = round(target * frame_rate) / frame_rate
+        else:
+            point = target
+        if point - boundaries[-1] >= min_gap and duration - point >= min_gap:
+            boundaries.append(point)
+
+    boundaries.append(duration)
+    return [
+        EncodeSegment(i, round(start, 6), round(end - start, 6))
+        for i, (start, end) in enumerate(zip(boundaries, boundaries[1:]))
+    ]
+
+
+async def encode_segments(
+    segments: Sequence[EncodeSegment],
+    build_args: Callable[[EncodeSegment], List[str]],
+    total_duration: float,
+    on_progress: Optional[ProgressCallback] = None,
+    timeout: Optional[float] = None,
+):
+    """
+    Run one FFmpeg process per segment concurrently.
+
+    ``build_args(segment)`` returns the FFmpeg arguments for that segment.
+    Progress from all processes is summed into a single FFmpegProgress
+    (``done`` is never set; the caller reports completion after joining).
+    If any segment fails the others are cancelled and the error re-raised.
+    """
+    out_times: Dict[int, float] = {}
+    fps: Dict[int, float] = {}
+    speeds: Dict[int, float] = {}
+
+    def segment_progress(segment: EncodeSegment) -> Optional[ProgressCallback]:
+        if on_progress is None:
+            return None
+
+        async def callback(event: FFmpegProgress):
+            out_times[segment.index] = segment.duration if event.done else event.out_time_seconds
+            fps[segment.index] = 0.0 if event.done else event.fps
+            speeds[segment.index] = 0.0 if event.done else event.speed
+            encoded = sum(out_times.values())
+            await on_progress(FFmpegProgress(
+                out_time_seconds=encoded,
+                frame=event.frame,
+                fps=sum(fps.values()),
+                speed=sum(speeds.values()),
+                percent=min(99.0, encoded / total_duration * 100) if total_duration else 0.0,
+            ))
+
+        return callback
+
+    tasks = [
+        asyncio.create_task(ffmpeg_runner.run(
+            build_args(segment),
+            duration=segment.duration,
+            on_progress=segment_progress(segment),
+            timeout=timeout,
+        ))
+        for segment in segments
+    ]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()  # re-raise the first failure
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def write_concat_list(paths: Sequence[str], list_path: str) -> str:
+    """Write a concat demuxer list for ``paths`` and return its path."""
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_path
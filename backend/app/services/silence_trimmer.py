@@ -0,0 +1,186 @@
+"""
+Silence Trimming
+Energy-based voice activity detection before transcription.
+
+FFmpeg's ``silencedetect`` finds long non-speech spans (music-only intros,
+pauses); those spans are cut from the audio sent to Whisper (``atrim`` +
+``concat``, sample-accurate) and an offset map restores every returned
+timestamp to the original timeline.
+"""
+
+import os
+import tempfile
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.ffmpeg_runner import ffmpeg_runner, FFmpegError
+
+
+@dataclass
+class SpeechOffsetMap:
+    """
+    Maps times in trimmed audio back to the original audio.
+
+    ``pieces`` are (original_start, original_end, trimmed_start) for each
+    kept span, in order. ``original_end`` is None for a span that runs to
+    the end of the file.
+    """
+
+    pieces: List[Tuple[float, Optional[float], float]]
+    removed_seconds: float
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        Convert a trimmed-audio timestamp to the original timeline.
+
+        A time exactly on a cut maps to the start of the following span, or
+        to the end of the preceding one when ``is_end`` is set.
+        """
+        if not self.pieces:
+            return t
+        starts = [p[2] for p in self.pieces]
+        i = max(0, (bisect_left(starts, t) if is_end else bisect_right(starts, t)) - 1)
+        original_start, original_end, trimmed_start = self.pieces[i]
+        original = original_start + max(0.0, t - trimmed_start)
+        if original_end is not None:
+            original = min(original, original_end)
+        return round(original, 3)
+
+
+def speech_spans(
+    silences: List[Tuple[float, Optional[float]]],
+    min_silence: float,
+    padding: float,
+) -> List[Tuple[float, Optional[float]]]:
+    """
+    Invert silence intervals into padded speech spans.
+
+    A silence with end None runs to the end of the file.
+    """
+    spans: List[Tuple[float, Optional[float]]] = []
+    cursor = 0.0
+    for start, end in silences:
+        # Keep a little of each silence so word onsets/offsets are not clipped
+        cut_start = start + padding if start > 0 else 0.0
+        cut_end = end - padding if end is not None else None
+        if cut_end is not None and cut_end - cut_start < min_silence:
+            continue
+        if cut_start > cursor:
+            spans.append((cursor, cut_start))
+        if cut_end is None:
+            return spans
+        cursor = cut_end
+    spans.append((cursor, None))
+    return spans
+
+
+async def detect_silences(audio_path: str) -> Optional[List[Tuple[float, Optional[float]]]]:
+    """Return (start, end) silence intervals found by FFmpeg silencedetect."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as f:
+        metadata_path = f.name
+
+    try:
+        await ffmpeg_runner.run([
+            "-i", audio_path,
+            "-vn",
+            "-af",
+            (
+                f"silencedetect=n={settings.VAD_NOISE_DB}dB:d={settings.VAD_MIN_SILENCE_SECONDS},"
+                f"ametadata=print:file={metadata_path}"
+            ),
+            "-f", "null",
+            "-",
+        ])
+
+        silences: List[Tuple[float, Optional[float]]] = []
+        start: Optional[float] = None
+        with open(metadata_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, _, value = line.strip().partition("=")
+                try:
+                    if key == "lavfi.silence_start":
+                        start = max(0.0, float(value))
+                    elif key == "lavfi.silence_end" and start is not None:
+                        silences.append((start, float(value)))
+                        start = None
+                except ValueError:
+                    continue
+        if start is not None:
+            silences.append((start, None))
+        return silences
+    except FFmpegError as e:
+        print(f"Silence detection error: {e}")
+        return None
+    finally:
+        if os.path.exists(metadata_path):
+            os.unlink(metadata_path)
+
+
+async def trim_silence(audio_path: str, output_path: str) -> Optional[SpeechOffsetMap]:
+    """
+    Write ``audio_path`` without its long silences to ``output_path``.
+
+    Returns the offset map, or None when trimming is disabled, failed, or
+    would save less than ``VAD_MIN_SAVED_SECONDS`` (the original file
+    should then be used as-is).
+    """
+    if not settings.VAD_ENABLED:
+        return None
+
+    silences = await detect_silences(audio_path)
+    if not silences:
+        return None
+
+    spans = speech_spans(silences, settings.VAD_MIN_SILENCE_SECONDS, settings.VAD_PADDING_SECONDS)
+    if not spans:
+        return None
+
+    # Removed time: gaps between kept spans, plus a trailing silence if any
+    removed = sum(b[0] - a[1] for a, b in zip(spans, spans[1:]))
+    if spans[-1][1] is not None:
+        duration = await _duration(audio_path)
+        if duration is None:
+            # Length unknown: keep the tail rather than guess what was saved
+            spans[-1] = (spans[-1][0], None)
+        else:
+            removed += max(0.0, duration - spans[-1][1])
+    if removed < settings.VAD_MIN_SAVED_SECONDS:
+        return None
+
+    # atrim cuts at sample boundaries, so each kept span is exactly end - start
+    # long in the output and the offset map below stays exact (aselect works
+    # per audio frame, ~20-26 ms, and its rounding drifts over many cuts)
+    chains = [
+        f"[0:a]atrim=start={start:.6f}" + (f":end={end:.6f}" if end is not None else "") + f",asetpts=PTS-STARTPTS[a{i}]"
+        for i, (start, end) in enumerate(spans)
+    ]
+    concat = "".join(f"[a{i}]" for i in range(len(spans))) + f"concat=n={len(spans)}:v=0:a=1[speech]"
+    try:
+        await ffmpeg_runner.run([
+            "-y",
+            "-i", audio_path,
+            "-filter_complex", ";".join([*chains, concat]),
+            "-map", "[speech]",
+            "-acodec", "libmp3lame",
+            "-q:a", "4",
+            output_path,
+        ])
+    except FFmpegError as e:
+        print(f"Silence trimming error: {e}")
+        return None
+
+    pieces: List[Tuple[float, Optional[float], float]] = []
+    trimmed = 0.0
+    for start, end in spans:
+        pieces.append((start, end, trimmed))
+        if end is not None:
+            trimmed += end - start
+
+    return SpeechOffsetMap(pieces=pieces, removed_seconds=round(removed, 3))
+
+
+async def _duration(path: str) -> Optional[float]:
+    probe = await ffmpeg_runner.probe(path)
+    return probe.get("duration") if probe else None
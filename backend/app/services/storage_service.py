@@ -4,7 +4,8 @@ Handles file uploads to AWS S3 or Cloudinary.
 """
 
 import io
-from typing import Optional
+import tempfile
+from typing import BinaryIO, Iterable, Optional, Tuple
 from fastapi import UploadFile
 import cloudinary
 import cloudinary.uploader
@@ -13,6 +14,34 @@ from botocore.exceptions import ClientError
 
 from app.core.config import settings
 
+# Streamed uploads that must be buffered (Cloudinary needs a sized file)
+# stay in memory up to this size, then spill to disk.
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+class ByteCountingStream(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks that counts bytes served."""
+    
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self.bytes_read = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        self.bytes_read += n
+        return n
+
 
 class StorageService:
     """Service for cloud storage operations."""
@@ -39,11 +68,10 @@ class StorageService:
         file: UploadFile,
         folder: str,
     ) -> str:
-        """Upload a file and return its URL."""
-        content = await file.read()
-        
-        return await self.upload_file_content(
-            content=content,
+        """Upload a file and return its URL, streaming from the upload's spooled temp file."""
+        await file.seek(0)
+        return await self.upload_fileobj(
+            fileobj=file.file,
             filename=file.filename,
             folder=folder,
             content_type=file.content_type,
@@ -77,13 +105,53 @@ class StorageService:
             content_type=content_type,
         )
     
+    async def upload_fileobj(
+        self,
+        fileobj: BinaryIO,
+        filename: str,
+        folder: str,
+        content_type: Optional[str] = None,
+    ) -> str:
+        """Upload an open binary file (e.g. a rendered video on disk) without reading it into memory."""
+        if self.provider == "cloudinary":
+            return await self._upload_cloudinary(fileobj, filename, folder)
+        else:
+            return await self._upload_s3(fileobj, filename, folder, content_type)
+    
+    async def upload_stream(
+        self,
+        chunks: Iterable[bytes],
+        filename: str,
+        folder: str,
+        content_type: Optional[str] = None,
+    ) -> Tuple[str, int]:
+        """
+        Upload content produced chunk by chunk.
+        
+        Memory stays flat regardless of size. Returns (url, size_in_bytes),
+        with the size counted while streaming.
+        """
+        if self.provider == "cloudinary":
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+                size = 0
+                for chunk in chunks:
+                    spool.write(chunk)
+                    size += len(chunk)
+                spool.seek(0)
+                url = await self._upload_cloudinary(spool, filename, folder)
+            return url, size
+        
+        stream = ByteCountingStream(chunks)
+        url = await self._upload_s3(io.BufferedReader(stream), filename, folder, content_type)
+        return url, stream.bytes_read
+    
     async def _upload_cloudinary(
         self,
-        content: bytes,
+        content,
         filename: str,
         folder: str,
     ) -> str:
-        """Upload to Cloudinary."""
+        """Upload to Cloudinary. ``content`` is bytes or a readable file object."""
         # Determine resource type
         extension = filename.split(".")[-1].lower()
         if extension in ["mp4", "mov", "avi", "mkv", "webm"]:
@@ -93,8 +161,11 @@ class StorageService:
         else:
             resource_type = "auto"
         
+        if isinstance(content, bytes):
+            content = io.BytesIO(content)
+        
         result = cloudinary.uploader.upload(
-            io.BytesIO(content),
+            content,
             folder=f"contentkaro/{folder}",
             resource_type=resource_type,
             public_id=filename.rsplit(".", 1)[0],
@@ -104,24 +175,33 @@ class StorageService:
     
     async def _upload_s3(
         self,
-        content: bytes,
+        content,
         filename: str,
         folder: str,
         content_type: Optional[str],
     ) -> str:
-        """Upload to AWS S3."""
+        """Upload to AWS S3. ``content`` is bytes or a readable file object."""
         key = f"{folder}/{filename}"
         
         extra_args = {}
         if content_type:
             extra_args["ContentType"] = content_type
         
-        self.s3_client.put_object(
-            Bucket=settings.AWS_S3_BUCKET,
-            Key=key,
-            Body=content,
-            **extra_args,
-        )
+        if isinstance(content, bytes):
+            self.s3_client.put_object(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=key,
+                Body=content,
+                **extra_args,
+            )
+        else:
+            # Multipart upload: reads the stream in parts, never all at once
+            self.s3_client.upload_fileobj(
+                content,
+                settings.AWS_S3_BUCKET,
+                key,
+                ExtraArgs=extra_args,
+            )
         
         return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{key}"
     
@@ -0,0 +1,271 @@
+"""
+Template Catalogue
+In-memory copy of the active templates for the browse endpoints.
+
+The catalogue is small and changes rarely (seeding, edits, usage counts),
+so every API process keeps it in memory: templates in browse order
+(featured first, then by usage), category counts, the featured list and
+festival templates by date, plus an inverted index for search. Browsing
+and searching never touch Postgres.
+
+Search tokens come from the name, Hindi name, description, tags and
+festival name. Each token is indexed as written and under a phonetic key
+of its romanisation: Devanagari is transliterated with
+``indic-transliteration`` and Latin spellings are folded the same way,
+so "diwali", "Divali" and "दिवाली" all find the same templates. Every
+query token must match (as a prefix of an indexed word or its phonetic
+key).
+
+A background task compares the table's row count and latest
+``updated_at`` every ``TEMPLATE_CATALOGUE_REFRESH_SECONDS`` and reloads
+when they change; ``request_refresh()`` makes it check immediately. The
+``etag`` changes with every reload.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from indic_transliteration import sanscript
+from sqlalchemy import func, select
+from sqlalchemy.orm import defer
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.template import AspectRatio, Template, TemplateCategory, TemplateType
+from app.schemas.template import TemplateResponse
+
+
+# Latin letters and digits, or Devanagari letters with their vowel signs (not the danda)
+TOKEN_PATTERN = re.compile(r"[0-9a-zÀ-ɏ]+|[ऀ-ॣ०-ॿ]+")
+DEVANAGARI_PATTERN = re.compile(r"[ऀ-ॿ]")
+
+# Spelling variants folded into a phonetic key, applied in order
+PHONETIC_RULES = (
+    (re.compile(r"w"), "v"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"sh"), "s"),
+    (re.compile(r"m(?=[kgcjtdsn])"), "n"),  # anusvara: "himdi" / "hindi"
+    (re.compile(r"(ee|ei|ie|y$)"), "i"),
+    (re.compile(r"(oo|ou)"), "u"),
+    (re.compile(r"z"), "j"),
+    (re.compile(r"([b-df-hj-np-tv-z])h"), r"\1"),  # aspirates: bh → b, th → t
+    (re.compile(r"a"), ""),  # schwa is written inconsistently ("navaratri" / "navratri")
+    (re.compile(r"(.)\1+"), r"\1"),
+)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased words of ``text`` (English and Devanagari)."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower().replace("_", " "))
+
+
+def romanize(token: str) -> str:
+    """Plain-ASCII romanisation of a token (Devanagari via IAST, diacritics dropped)."""
+    if DEVANAGARI_PATTERN.search(token):
+        token = sanscript.transliterate(token, sanscript.DEVANAGARI, sanscript.IAST)
+    decomposed = unicodedata.normalize("NFKD", token.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=8192)
+def phonetic_key(token: str) -> str:
+    """Spelling-insensitive key shared by Devanagari words and their romanised spellings."""
+    key = romanize(token)
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class _PrefixIndex:
+    """Token → template positions, with prefix lookup over the sorted vocabulary."""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocabulary: List[str] = []
+
+    def add(self, token: str, position: int):
+        if token:
+            self.postings.setdefault(token, set()).add(position)
+
+    def freeze(self):
+        self.vocabulary = sorted(self.postings)
+
+    def match(self, prefix: str) -> Set[int]:
+        matched: Set[int] = set()
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matched |= self.postings[token]
+        return matched
+
+
+@dataclass
+class _Snapshot:
+    """One loaded version of the catalogue (replaced whole on refresh)."""
+
+    templates: List[TemplateResponse] = field(default_factory=list)  # browse order
+    words: _PrefixIndex = field(default_factory=_PrefixIndex)
+    phonetic: _PrefixIndex = field(default_factory=_PrefixIndex)
+    categories: List[Tuple[TemplateCategory, int]] = field(default_factory=list)
+    featured: List[TemplateResponse] = field(default_factory=list)
+    festivals: List[TemplateResponse] = field(default_factory=list)  # by festival date
+    signature: Optional[Tuple[int, Optional[datetime]]] = None
+    etag: str = ""
+
+
+def _build(templates: Iterable[Template], signature: Tuple[int, Optional[datetime]]) -> _Snapshot:
+    snapshot = _Snapshot(signature=signature)
+    ordered = sorted(templates, key=lambda t: (not t.is_featured, -(t.usage_count or 0)))
+    counts: Dict[TemplateCategory, int] = {}
+    for position, template in enumerate(ordered):
+        response = TemplateResponse.model_validate(template)
+        snapshot.templates.append(response)
+        counts[template.category] = counts.get(template.category, 0) + 1
+
+        fields = [template.name, template.name_hindi, template.description, template.festival_name, *(template.tags or [])]
+        for text in fields:
+            for token in tokenize(text):
+                snapshot.words.add(token, position)
+                snapshot.phonetic.add(phonetic_key(token), position)
+
+    snapshot.words.freeze()
+    snapshot.phonetic.freeze()
+    snapshot.categories = sorted(counts.items(), key=lambda item: item[0].value)
+    snapshot.featured = [t for t in snapshot.templates if t.is_featured]
+    snapshot.festivals = sorted(
+        (t for t in snapshot.templates if t.category == TemplateCategory.FESTIVAL and t.festival_date),
+        key=lambda t: _utc(t.festival_date),
+    )
+    count, updated = signature
+    digest = hashlib.sha1(f"{count}:{updated.isoformat() if updated else ''}".encode()).hexdigest()
+    snapshot.etag = f'"catalogue-{digest[:16]}"'
+    return snapshot
+
+
+class TemplateCatalogue:
+    """Process-wide, periodically refreshed copy of the active templates."""
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def etag(self) -> str:
+        return self._snapshot.etag if self._snapshot else ""
+
+    async def snapshot(self) -> _Snapshot:
+        """The loaded catalogue, loading it first if startup has not yet."""
+        if self._snapshot is None:
+            await self.refresh()
+        return self._snapshot
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Reload if the templates table changed since the last load. Returns True on reload."""
+        async with self._lock:
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(select(func.count(Template.id), func.max(Template.updated_at)))).one()
+                signature = (row[0], row[1])
+                if not force and self._snapshot is not None and self._snapshot.signature == signature:
+                    return False
+                result = await db.execute(
+                    select(Template)
+                    .options(defer(Template.template_data))
+                    .where(Template.is_active == True)
+                    .order_by(Template.created_at)
+                )
+                templates = result.scalars().all()
+            self._snapshot = _build(templates, signature)
+        return True
+
+    def start(self):
+        """Start the change poller (called at startup, after the first load)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    def request_refresh(self):
+        """Check for changes now instead of at the next poll (after this process edits templates)."""
+        self._wake.set()
+
+    async def shutdown(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _poll(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.TEMPLATE_CATALOGUE_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                if await self.refresh():
+                    print(f"📚 Template catalogue reloaded ({len(self._snapshot.templates)} templates)")
+            except Exception as e:
+                print(f"Template catalogue refresh failed: {e}")
+
+    async def search(
+        self,
+        category: Optional[TemplateCategory] = None,
+        template_type: Optional[TemplateType] = None,
+        aspect_ratio: Optional[AspectRatio] = None,
+        is_premium: Optional[bool] = None,
+        is_featured: Optional[bool] = None,
+        festival_name: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> List[TemplateResponse]:
+        """Filter and search the catalogue; results stay in browse order."""
+        snapshot = await self.snapshot()
+        positions: Optional[Set[int]] = None
+        if search:
+            for token in tokenize(search):
+                matched = snapshot.words.match(token) | snapshot.phonetic.match(phonetic_key(token))
+                positions = matched if positions is None else positions & matched
+                if not positions:
+                    return []
+            if positions is None:
+                # Only punctuation: match nothing rather than everything
+                return []
+
+        festival = festival_name.lower() if festival_name else None
+        candidates = snapshot.templates if positions is None else [snapshot.templates[p] for p in sorted(positions)]
+        return [
+            t for t in candidates
+            if (category is None or t.category == category)
+            and (template_type is None or t.template_type == template_type)
+            and (aspect_ratio is None or t.aspect_ratio == aspect_ratio)
+            and (is_premium is None or t.is_premium == is_premium)
+            and (is_featured is None or t.is_featured == is_featured)
+            and (festival is None or festival in (t.festival_name or "").lower())
+        ]
+
+    async def categories(self) -> List[Tuple[TemplateCategory, int]]:
+        return (await self.snapshot()).categories
+
+    async def featured(self, limit: int) -> List[TemplateResponse]:
+        return (await self.snapshot()).featured[:limit]
+
+    async def festivals(self, start: datetime, end: datetime) -> List[TemplateResponse]:
+        """Festival templates dated within [start, end], by date."""
+        snapshot = await self.snapshot()
+        return [t for t in snapshot.festivals if _utc(start) <= _utc(t.festival_date) <= _utc(end)]
+
+
+template_catalogue = TemplateCatalogue()
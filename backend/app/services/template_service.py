@@ -5,18 +5,111 @@ Video template rendering using FFmpeg.
 
 import os
 import json
+import asyncio
+import hashlib
 import tempfile
-import subprocess
-from datetime import datetime
-from typing import Optional, Any
+import time
+from datetime import datetime, timedelta
+from typing import Optional
 from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
 
 from app.core.config import settings
-from app.models.template import Template, UserTemplate
+from app.models.template import Template, UserTemplate, RenderCacheEntry
+from app.template_system.compiler import BoundRender, get_render_plan
 from app.services.storage_service import StorageService
+from app.services.asset_prefetcher import AssetRequest, ProxySpec, asset_cache, prefetch_assets
+from app.services.encoder_profiles import encoder_profiles
+from app.services.poster_frames import attach_poster_output, candidate_times, pick_poster
+from app.services.render_metrics import RenderMetrics, failure_message
+from app.services.ffmpeg_runner import ffmpeg_runner, FFmpegProgress, ProgressCallback
+from app.services.job_events import job_events, channel_name
+from app.services.segmented_encoder import EncodeSegment, encode_segments, plan_segments, segment_parallelism, write_concat_list
+
+
+# Bump when rendering itself changes in a way that alters output for the same inputs
+RENDER_CACHE_VERSION = 3
+
+
+def render_cache_key(
+    template: Template,
+    customizations: Optional[dict],
+    quality: str,
+    output_format: str,
+    watermark: bool,
+) -> str:
+    """
+    Hash of everything a final render depends on.
+    
+    Asset URLs are replaced by the SHA-256 of their downloaded content, so
+    call this after the assets were prefetched; the same logo uploaded
+    twice, or under a fresh signed URL, still hits.
+    """
+    plan = get_render_plan(template)
+    resolved = plan.resolve_customizations(customizations)
+    for field_id, value in resolved.items():
+        if isinstance(value, str) and value.startswith("http"):
+            digest = asset_cache.digest(value)
+            if digest:
+                resolved[field_id] = f"sha256:{digest}"
+    payload = json.dumps(
+        {
+            "renderer": RENDER_CACHE_VERSION,
+            "template": str(template.id),
+            "version": template.version or 0,
+            "canvas": [plan.width, plan.height, plan.fps],
+            "customizations": resolved,
+            "encoder": encoder_profiles.get(quality).encode_args(),
+            "format": output_format,
+            "watermark": watermark,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def preview_fps(template: Template) -> int:
+    """Frame rate of preview renders for ``template``."""
+    return min(get_render_plan(template).fps, settings.TEMPLATE_PREVIEW_FPS)
+
+
+def preview_cache_key(template: Template, customizations: Optional[dict], scale: int) -> str:
+    """Hash identifying a preview: template version, customisations and proxy settings."""
+    payload = json.dumps(
+        {
+            "renderer": RENDER_CACHE_VERSION,
+            "template": str(template.id),
+            "version": template.version or 0,
+            "customizations": customizations or {},
+            "scale": scale,
+            "fps": preview_fps(template),
+            "crf": settings.TEMPLATE_PREVIEW_CRF,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _asset_stats(asset_paths: dict[str, str]) -> dict:
+    """Render metrics for the fetched assets."""
+    sizes = [os.path.getsize(path) for path in asset_paths.values() if os.path.exists(path)]
+    return {"assets": len(sizes), "asset_bytes": sum(sizes)}
+
+
+def _bind_stats(bound: BoundRender) -> dict:
+    """Render metrics for a bound plan: canvas, layer mix and text sprite drawing."""
+    return {
+        "canvas": [bound.width, bound.height, bound.fps],
+        "duration_seconds": bound.duration_seconds,
+        "layers": bound.layer_counts,
+        "sprites_drawn": bound.sprites_drawn,
+        "sprite_seconds": bound.sprite_seconds,
+    }
 
 
 class TemplateService:
@@ -32,11 +125,23 @@ class TemplateService:
         output_format: str = "mp4",
         quality: str = "high",
         watermark: bool = False,
+        preview_scale: Optional[int] = None,
+        final_attempt: bool = True,
     ):
         """
         Render a customized template to video.
         
-        Uses FFmpeg for video processing.
+        Uses FFmpeg for video processing. With ``preview_scale`` (2 or 4)
+        a fast low-resolution preview is rendered from proxy assets and
+        stored as ``preview_url`` instead; previews are cached per
+        customisation hash.
+        
+        Failures mark the render failed. When the caller will retry
+        (``final_attempt=False``) transient errors are raised instead;
+        ValueErrors (bad definition, oversized asset) always fail.
+        
+        Stage timings and encode/upload stats are stored in
+        ``render_metrics`` (see render_metrics), for failed renders too.
         """
         # Get user template and base template
         result = await self.db.execute(
@@ -56,22 +161,51 @@ class TemplateService:
             user_template.status = "failed"
             user_template.error_message = "Base template not found"
             await self.db.commit()
+            self._publish_status(user_template)
             return
         
+        metrics = RenderMetrics(preview=bool(preview_scale))
         try:
             # Update progress
             user_template.render_progress = 10
             await self.db.commit()
+            self._publish_status(user_template)
+            
+            # Compile (or fetch the cached plan) before any download, so a
+            # broken definition fails fast
+            with metrics.stage("plan"):
+                get_render_plan(template)
+            
+            if preview_scale:
+                await self._render_preview(template, user_template, preview_scale, metrics)
+                user_template.render_metrics = metrics.to_dict()
+                await self.db.commit()
+                self._publish_status(user_template)
+                return
             
             # Create temp directory for rendering
             with tempfile.TemporaryDirectory() as tmp_dir:
                 # Generate frames or video components
-                asset_paths = await self._prepare_assets(
-                    template, user_template, tmp_dir
+                with metrics.stage("assets"):
+                    asset_paths = await self._prepare_assets(
+                        template, user_template, tmp_dir
+                    )
+                metrics.record(**_asset_stats(asset_paths))
+                
+                # Identical render already done (by anyone)? Reuse its output
+                render_key = render_cache_key(
+                    template, user_template.customizations, quality, output_format, watermark
                 )
+                if await self._use_cached_render(user_template, render_key):
+                    metrics.record(cache_hit=True)
+                    user_template.render_metrics = metrics.to_dict()
+                    await self.db.commit()
+                    self._publish_status(user_template)
+                    return
                 
                 user_template.render_progress = 40
                 await self.db.commit()
+                self._publish_status(user_template)
                 
                 # Render video using FFmpeg
                 output_path = os.path.join(tmp_dir, f"output.{output_format}")
@@ -84,25 +218,44 @@ class TemplateService:
                     quality=quality,
                     watermark=watermark,
                     asset_paths=asset_paths,
+                    on_progress=metrics.track_progress(
+                        self._render_progress_writer(user_template, start=40, end=80)
+                    ),
+                    metrics=metrics,
                 )
                 
                 user_template.render_progress = 80
                 await self.db.commit()
+                self._publish_status(user_template)
                 
-                # Upload rendered video
-                with open(output_path, "rb") as f:
-                    video_url = await self.storage.upload_file_content(
-                        content=f.read(),
-                        filename=f"{user_template.title}.{output_format}",
-                        folder=f"renders/{user_template.user_id}",
-                        content_type=f"video/{output_format}",
-                    )
+                # Upload rendered video (streamed from disk)
+                output_bytes = os.path.getsize(output_path)
+                with metrics.stage("upload"):
+                    with open(output_path, "rb") as f:
+                        video_url = await self.storage.upload_fileobj(
+                            fileobj=f,
+                            filename=f"{user_template.title}.{output_format}",
+                            folder=f"renders/{user_template.user_id}",
+                            content_type=f"video/{output_format}",
+                        )
+                metrics.record(
+                    output_bytes=output_bytes,
+                    upload_mbps=round(output_bytes * 8 / 1_000_000 / max(metrics.stages["upload"], 1e-3), 2),
+                )
+                
+                user_template.render_progress = 90
+                await self.db.commit()
+                self._publish_status(user_template)
                 
-                # Generate thumbnail
-                thumbnail_path = os.path.join(tmp_dir, "thumbnail.jpg")
-                await self._generate_thumbnail(output_path, thumbnail_path)
+                # Poster: best candidate frame written by the render itself
+                with metrics.stage("poster"):
+                    thumbnail_path = await asyncio.to_thread(pick_poster, tmp_dir)
+                    if thumbnail_path is None:
+                        metrics.record(poster_fallback=True)
+                        thumbnail_path = os.path.join(tmp_dir, "thumbnail.jpg")
+                        await self._generate_thumbnail(output_path, thumbnail_path)
                 
-                with open(thumbnail_path, "rb") as f:
+                with metrics.stage("upload"), open(thumbnail_path, "rb") as f:
                     thumbnail_url = await self.storage.upload_file_content(
                         content=f.read(),
                         filename=f"{user_template.title}_thumb.jpg",
@@ -116,54 +269,213 @@ class TemplateService:
                 user_template.status = "completed"
                 user_template.render_progress = 100
                 user_template.rendered_at = datetime.utcnow()
+                user_template.render_metrics = metrics.to_dict()
+                
+                await self._store_cached_render(template, render_key, video_url, thumbnail_url)
                 
         except Exception as e:
+            user_template.render_metrics = metrics.to_dict(error=e)
+            if not final_attempt and not isinstance(e, ValueError):
+                raise
             user_template.status = "failed"
-            user_template.error_message = str(e)
+            user_template.error_message = failure_message(e, metrics.failed_stage)
         
         await self.db.commit()
+        self._publish_status(user_template)
+    
+    def _publish_status(self, user_template: UserTemplate):
+        """Push the render's current state to progress streams."""
+        event = user_template.status if user_template.status in ("completed", "failed") else "progress"
+        job_events.publish(channel_name("template", user_template.id), event, {
+            "status": user_template.status,
+            "progress": user_template.render_progress,
+            "output_url": user_template.output_url,
+            "thumbnail_url": user_template.thumbnail_url,
+            "preview_url": user_template.preview_url,
+            "error_message": user_template.error_message,
+        })
+    
+    def _render_progress_writer(
+        self,
+        user_template: UserTemplate,
+        start: int,
+        end: int,
+        interval: float = 2.0,
+    ) -> ProgressCallback:
+        """Map FFmpeg progress onto render_progress[start, end], committing at most every `interval` seconds."""
+        last_commit = 0.0
+        
+        async def on_progress(event: FFmpegProgress):
+            nonlocal last_commit
+            progress = start + int((end - start) * event.percent / 100)
+            if progress <= (user_template.render_progress or 0):
+                return
+            user_template.render_progress = progress
+            self._publish_status(user_template)
+            now = time.monotonic()
+            if now - last_commit >= interval:
+                last_commit = now
+                await self.db.commit()
+        
+        return on_progress
+    
+    async def _use_cached_render(self, user_template: UserTemplate, render_key: str) -> bool:
+        """Complete ``user_template`` from the render cache; False on a miss."""
+        cutoff = datetime.utcnow() - timedelta(days=settings.TEMPLATE_RENDER_CACHE_TTL_DAYS)
+        result = await self.db.execute(
+            select(RenderCacheEntry).where(
+                RenderCacheEntry.render_key == render_key,
+                RenderCacheEntry.created_at >= cutoff,
+            )
+        )
+        entry = result.scalar_one_or_none()
+        if entry is None:
+            return False
+        
+        await self.db.execute(
+            update(RenderCacheEntry)
+            .where(RenderCacheEntry.render_key == render_key)
+            .values(hit_count=RenderCacheEntry.hit_count + 1, last_hit_at=datetime.utcnow())
+        )
+        user_template.output_url = entry.output_url
+        user_template.thumbnail_url = entry.thumbnail_url
+        user_template.status = "completed"
+        user_template.render_progress = 100
+        user_template.rendered_at = datetime.utcnow()
+        return True
+    
+    async def _store_cached_render(
+        self,
+        template: Template,
+        render_key: str,
+        output_url: str,
+        thumbnail_url: Optional[str],
+    ):
+        """Record a finished render; replaces an expired entry with the same key."""
+        statement = insert(RenderCacheEntry).values(
+            render_key=render_key,
+            template_id=template.id,
+            output_url=output_url,
+            thumbnail_url=thumbnail_url,
+            hit_count=0,
+            created_at=datetime.utcnow(),
+        )
+        await self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[RenderCacheEntry.render_key],
+                set_={
+                    "output_url": statement.excluded.output_url,
+                    "thumbnail_url": statement.excluded.thumbnail_url,
+                    "created_at": statement.excluded.created_at,
+                },
+            )
+        )
+    
+    async def _render_preview(
+        self,
+        template: Template,
+        user_template: UserTemplate,
+        scale: int,
+        metrics: Optional[RenderMetrics] = None,
+    ):
+        """
+        Render a low-resolution preview into ``preview_url``.
+        
+        Reuses the compiled plan at 1/``scale`` resolution and a lower frame
+        rate, with downscaled proxy assets and an ultrafast short-GOP
+        encode. Skipped entirely when the customisation hash matches the
+        last preview.
+        """
+        key = preview_cache_key(template, user_template.customizations, scale)
+        if user_template.preview_key == key and user_template.preview_url:
+            if metrics is not None:
+                metrics.record(cache_hit=True)
+            user_template.status = "completed"
+            user_template.render_progress = 100
+            return
+        
+        metrics = metrics or RenderMetrics(preview=True)
+        fps = preview_fps(template)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with metrics.stage("assets"):
+                asset_paths = await self._prepare_assets(
+                    template, user_template, tmp_dir, proxy=ProxySpec(scale=scale, fps=fps)
+                )
+            metrics.record(**_asset_stats(asset_paths))
+            
+            user_template.render_progress = 40
+            await self.db.commit()
+            self._publish_status(user_template)
+            
+            # Binding draws text sprites that are not cached yet; keep that off the event loop
+            with metrics.stage("plan"):
+                bound = await asyncio.to_thread(
+                    get_render_plan(template).bind,
+                    user_template.customizations, asset_paths, tmp_dir, scale=scale, fps=fps,
+                )
+            metrics.record(**_bind_stats(bound))
+            output_path = os.path.join(tmp_dir, "preview.mp4")
+            with metrics.stage("encode"):
+                await ffmpeg_runner.run(
+                    [
+                        *bound.input_args,
+                        "-filter_complex", bound.filter_complex,
+                        "-map", bound.map_label,
+                        "-t", str(bound.duration_seconds),
+                        "-r", str(fps),
+                        "-c:v", "libx264",
+                        "-preset", "ultrafast",
+                        "-crf", str(settings.TEMPLATE_PREVIEW_CRF),
+                        "-g", str(fps),  # keyframe every second for scrubbing
+                        "-pix_fmt", "yuv420p",
+                        "-movflags", "+faststart",
+                        output_path,
+                    ],
+                    duration=bound.duration_seconds,
+                    on_progress=metrics.track_progress(
+                        self._render_progress_writer(user_template, start=40, end=90)
+                    ),
+                )
+            
+            with metrics.stage("upload"), open(output_path, "rb") as f:
+                user_template.preview_url = await self.storage.upload_fileobj(
+                    fileobj=f,
+                    filename=f"{user_template.title}_preview.mp4",
+                    folder=f"renders/{user_template.user_id}/previews",
+                    content_type="video/mp4",
+                )
+        
+        user_template.preview_key = key
+        user_template.status = "completed"
+        user_template.render_progress = 100
     
     async def _prepare_assets(
         self,
         template: Template,
         user_template: UserTemplate,
         tmp_dir: str,
+        proxy: Optional[ProxySpec] = None,
     ):
-        """Prepare assets for rendering."""
+        """
+        Download every asset customisation into ``tmp_dir``.
+        
+        Assets are fetched concurrently and streamed to disk through the
+        shared content-addressed cache; video placeholders get the video
+        size limit, everything else the image limit. With ``proxy`` the
+        files are downscaled preview proxies.
+        """
         customizations = user_template.customizations or {}
-        asset_paths: dict[str, str] = {}
+        placeholder_types = get_render_plan(template).placeholder_types
         
-        # Download any required images
+        requests: dict[str, AssetRequest] = {}
         for field_id, value in customizations.items():
             if not (isinstance(value, str) and value.startswith("http")):
                 continue
-
-            import httpx
-            async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-                response = await client.get(value)
-                response.raise_for_status()
-
-            url_path = value.split("?", 1)[0]
-            ext = (url_path.rsplit(".", 1)[-1] if "." in url_path else "bin").lower()
-
-            # Basic normalization for common content types when URL has no extension
-            content_type = (response.headers.get("content-type") or "").lower()
-            if ext == "bin":
-                if "image/png" in content_type:
-                    ext = "png"
-                elif "image/jpeg" in content_type or "image/jpg" in content_type:
-                    ext = "jpg"
-                elif "video/mp4" in content_type:
-                    ext = "mp4"
-                elif "video/quicktime" in content_type:
-                    ext = "mov"
-
-            path = os.path.join(tmp_dir, f"{field_id}.{ext}")
-            with open(path, "wb") as f:
-                f.write(response.content)
-            asset_paths[field_id] = path
-
-        return asset_paths
+            is_video = placeholder_types.get(field_id) == "video"
+            limit_mb = settings.TEMPLATE_ASSET_MAX_VIDEO_MB if is_video else settings.TEMPLATE_ASSET_MAX_IMAGE_MB
+            requests[field_id] = AssetRequest(url=value, max_bytes=limit_mb * 1024 * 1024, is_video=is_video)
+        
+        return await prefetch_assets(requests, tmp_dir, proxy=proxy)
     
     async def _render_video(
         self,
@@ -174,281 +486,131 @@ class TemplateService:
         quality: str,
         watermark: bool,
         asset_paths: dict[str, str],
+        on_progress: Optional[ProgressCallback] = None,
+        metrics: Optional[RenderMetrics] = None,
     ):
         """
         Render video using FFmpeg.
         
-        This is a simplified implementation.
-        Production would use more sophisticated compositing.
+        The template is compiled once into a RenderPlan (see
+        app.template_system.compiler); here it is only bound to this
+        render's customisations and encoded. The same pass writes poster
+        candidates (``poster_*.jpg`` in ``tmp_dir``, see poster_frames).
         """
-        # Quality settings
-        quality_settings = {
-            "low": {"crf": 28, "preset": "fast"},
-            "medium": {"crf": 23, "preset": "medium"},
-            "high": {"crf": 18, "preset": "slow"},
-            "ultra": {"crf": 15, "preset": "slower"},
-        }
+        metrics = metrics or RenderMetrics()
+        # Preset chosen for this tier by the encoder benchmark (see encoder_profiles)
+        profile = encoder_profiles.get(quality)
         
-        quality_opts = quality_settings.get(quality, quality_settings["high"])
-
-        definition: dict[str, Any] = template.template_data or {}
-        customizations: dict[str, Any] = user_template.customizations or {}
-
-        # --- helpers ---
-        def resolve_duration_seconds() -> int:
-            dur = customizations.get("duration_seconds")
-            if isinstance(dur, int) and dur > 0:
-                return dur
-            return int(template.duration_seconds)
-
-        def resolve_theme_id() -> Optional[str]:
-            theme_id = customizations.get("theme_id")
-            if isinstance(theme_id, str) and theme_id:
-                return theme_id
-            themes = definition.get("themes") or {}
-            if isinstance(themes, dict) and themes:
-                return next(iter(themes.keys()))
-            return None
-
-        duration_seconds = resolve_duration_seconds()
-        fps = int(definition.get("fps") or template.fps or 30)
-        width = int(definition.get("width") or template.width or 1080)
-        height = int(definition.get("height") or template.height or 1920)
-        theme_id = resolve_theme_id()
-        theme = ((definition.get("themes") or {}).get(theme_id) if theme_id else None) or {}
-
-        def resolve_token(value: Any) -> Any:
-            if not isinstance(value, str):
-                return value
-            if value == "$duration":
-                return duration_seconds
-            if value.startswith("$theme.colors."):
-                key = value.split("$theme.colors.", 1)[1]
-                return (theme.get("colors") or {}).get(key, "#000000")
-            if value.startswith("$placeholder."):
-                key = value.split("$placeholder.", 1)[1]
-                return customizations.get(key) or ((definition.get("placeholders") or {}).get(key) or {}).get("default")
-            return value
-
-        def resolve_obj(obj: Any) -> Any:
-            if isinstance(obj, dict):
-                return {k: resolve_obj(v) for k, v in obj.items()}
-            if isinstance(obj, list):
-                return [resolve_obj(v) for v in obj]
-            return resolve_token(obj)
-
-        layers = definition.get("layers") or []
-        if not isinstance(layers, list):
-            layers = []
-
-        # Determine background color if defined
-        bg_color = "black"
-        for layer in layers:
-            if isinstance(layer, dict) and layer.get("type") == "solid":
-                style = resolve_obj(layer.get("style") or {})
-                bg_color = style.get("color") or bg_color
-                break
-
-        # Inputs: [0] lavfi background, then external assets as needed
-        ffmpeg_inputs: list[str] = []
-        filter_lines: list[str] = []
-        input_index_by_layer_id: dict[str, int] = {}
-
-        # Build inputs for video/image layers
-        for layer in layers:
-            if not isinstance(layer, dict):
-                continue
-            ltype = layer.get("type")
-            if ltype not in ("video", "image"):
-                continue
-            source = resolve_token(layer.get("source"))
-            if not isinstance(source, str) or not source:
-                continue
-            # source is placeholder value (likely URL) OR already resolved to string
-            # We expect customizations to contain URLs for assets; prepare_assets downloads them.
-            placeholder_key = None
-            raw_source = layer.get("source")
-            if isinstance(raw_source, str) and raw_source.startswith("$placeholder."):
-                placeholder_key = raw_source.split("$placeholder.", 1)[1]
-            local_path = asset_paths.get(placeholder_key or "")
-            if not local_path and isinstance(source, str) and source.startswith(tmp_dir):
-                local_path = source
-            if not local_path:
-                # If the user provided a URL but it wasn't downloaded for some reason, skip.
-                continue
-
-            if ltype == "video":
-                # Loop video to cover duration
-                ffmpeg_inputs.extend(["-stream_loop", "-1", "-i", local_path])
+        # The compiled plan is cached per template version; only binding is per render.
+        # Binding draws text sprites that are not cached yet, so it runs off the event loop.
+        with metrics.stage("plan"):
+            bound = await asyncio.to_thread(
+                get_render_plan(template).bind, user_template.customizations, asset_paths, tmp_dir
+            )
+        metrics.record(**_bind_stats(bound))
+        duration_seconds = bound.duration_seconds
+        fps = bound.fps
+        poster_times = candidate_times(duration_seconds, fps, settings.TEMPLATE_POSTER_CANDIDATES)
+        
+        encode_args = ["-r", str(fps), *profile.encode_args(), "-pix_fmt", "yuv420p"]
+        
+        started = time.monotonic()
+        segment_count = segment_parallelism(duration_seconds)
+        with metrics.stage("encode"):
+            if segment_count > 1:
+                await self._render_segmented(
+                    bound, encode_args, poster_times, segment_count, tmp_dir, output_path, on_progress
+                )
             else:
-                # Loop image
-                ffmpeg_inputs.extend(["-loop", "1", "-i", local_path])
-
-            input_index_by_layer_id[layer.get("id") or f"layer_{len(input_index_by_layer_id)+1}"] = 1 + len(input_index_by_layer_id)
-
-        # Base background
-        cmd: list[str] = [
-            settings.FFMPEG_PATH,
-            "-y",
-            "-f",
-            "lavfi",
-            "-i",
-            f"color=c={bg_color}:s={width}x{height}:r={fps}:d={duration_seconds}",
-            *ffmpeg_inputs,
-        ]
-
-        current_label = "[base]"
-        filter_lines.append(f"[0:v]format=rgba{current_label}")
-
-        # Apply overlays in z order (low to high)
-        sorted_layers = sorted(
-            [l for l in layers if isinstance(l, dict)],
-            key=lambda l: int(l.get("z") or 0),
-        )
-
-        draw_index = 0
-        overlay_index = 0
-
-        def between_expr(start: Any, end: Any) -> str:
-            s = float(resolve_token(start) or 0)
-            e = float(resolve_token(end) or duration_seconds)
-            if e == duration_seconds and (end == "$duration"):
-                e = float(duration_seconds)
-            return f"between(t\,{s}\,{e})"
-
-        def write_textfile(text: str) -> str:
-            nonlocal draw_index
-            draw_index += 1
-            path = os.path.join(tmp_dir, f"text_{draw_index}.txt")
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(text)
-            return path
-
-        for layer in sorted_layers:
-            ltype = layer.get("type")
-            if ltype in ("video", "image"):
-                layer_id = layer.get("id")
-                input_idx = input_index_by_layer_id.get(layer_id)
-                if not input_idx:
-                    continue
-                transform = resolve_obj(layer.get("transform") or {})
-                fit = transform.get("fit") or "cover"
-                opacity = float(transform.get("opacity") or 1.0)
-
-                if ltype == "video":
-                    # scale/crop to cover
-                    if fit == "contain":
-                        scale_expr = f"scale=w={width}:h={height}:force_original_aspect_ratio=decrease"
-                        pad_expr = f"pad=w={width}:h={height}:x=(ow-iw)/2:y=(oh-ih)/2:color=0x00000000"
-                        filter_lines.append(f"[{input_idx}:v]{scale_expr},{pad_expr},setsar=1,format=rgba[ov{overlay_index}]")
-                    else:
-                        scale_expr = f"scale=w={width}:h={height}:force_original_aspect_ratio=increase"
-                        crop_expr = f"crop=w={width}:h={height}"
-                        filter_lines.append(f"[{input_idx}:v]{scale_expr},{crop_expr},setsar=1,format=rgba[ov{overlay_index}]")
-                else:
-                    w = int(transform.get("w") or 0)
-                    h = int(transform.get("h") or 0)
-                    if w > 0 and h > 0:
-                        filter_lines.append(f"[{input_idx}:v]scale={w}:{h}:force_original_aspect_ratio=decrease,format=rgba[ov{overlay_index}]")
-                    else:
-                        filter_lines.append(f"[{input_idx}:v]format=rgba[ov{overlay_index}]")
-
-                x = int(transform.get("x") or 0)
-                y = int(transform.get("y") or 0)
-                enable = between_expr(layer.get("start"), layer.get("end"))
-
-                out_label = f"[v{overlay_index}]"
-                # opacity via alpha merge
-                if opacity < 1.0:
-                    filter_lines.append(f"[ov{overlay_index}]colorchannelmixer=aa={opacity}[ova{overlay_index}]")
-                    ov_in = f"[ova{overlay_index}]"
-                else:
-                    ov_in = f"[ov{overlay_index}]"
-
-                filter_lines.append(
-                    f"{current_label}{ov_in}overlay=x={x}:y={y}:enable='{enable}'{out_label}"
+                filter_complex, map_label, poster_args = attach_poster_output(
+                    bound.filter_complex, bound.map_label, poster_times, fps, os.path.join(tmp_dir, "poster_%02d.jpg")
                 )
-                current_label = out_label
-                overlay_index += 1
-
-            elif ltype == "text":
-                text_val = resolve_token(layer.get("text"))
-                if not isinstance(text_val, str) or not text_val.strip():
-                    continue
-                style = resolve_obj(layer.get("style") or {})
-                transform = resolve_obj(layer.get("transform") or {})
-
-                font_size = int(style.get("fontSize") or 48)
-                color = style.get("color") or "white"
-                font_family = style.get("fontFamily") or "Inter"
-
-                bg = style.get("background") or None
-                box = 1 if isinstance(bg, dict) and bg.get("color") else 0
-                boxcolor = (bg.get("color") if isinstance(bg, dict) else None) or "black@0.0"
-                boxborderw = int(((bg.get("paddingX") or 0) if isinstance(bg, dict) else 0) / 2)
-
-                x = int(transform.get("x") or 0)
-                y = int(transform.get("y") or 0)
-                enable = between_expr(layer.get("start"), layer.get("end"))
-
-                textfile = write_textfile(text_val)
-                # Use fontconfig font if available; otherwise rely on ffmpeg default.
-                draw = (
-                    f"drawtext=textfile='{textfile}':font='{font_family}':"
-                    f"fontsize={font_size}:fontcolor={color}:x={x}:y={y}:"
-                    f"box={box}:boxcolor={boxcolor}:boxborderw={boxborderw}:"
-                    f"enable='{enable}'"
+                
+                # Run FFmpeg
+                await ffmpeg_runner.run(
+                    [
+                        *bound.input_args, "-filter_complex", filter_complex, "-map", map_label,
+                        "-t", str(duration_seconds), *encode_args, output_path,
+                        *poster_args,
+                    ],
+                    duration=duration_seconds,
+                    on_progress=on_progress,
                 )
-
-                out_label = f"[t{draw_index}]"
-                filter_lines.append(f"{current_label}{draw}{out_label}")
-                current_label = out_label
-
-        # Finalize filter graph
-        filter_complex = ";".join(filter_lines)
-
-        cmd.extend(
-            [
-                "-filter_complex",
-                filter_complex,
-                "-map",
-                current_label,
-                "-t",
-                str(duration_seconds),
-                "-r",
-                str(fps),
-                "-c:v",
-                "libx264",
-                "-crf",
-                str(quality_opts["crf"]),
-                "-preset",
-                quality_opts["preset"],
-                "-pix_fmt",
-                "yuv420p",
-                output_path,
+        
+        user_template.encoder_profile = profile.label
+        user_template.encode_fps = round(duration_seconds * fps / max(time.monotonic() - started, 1e-6), 2)
+        metrics.record(encoder=profile.label, encode_fps=user_template.encode_fps, segments=segment_count)
+    
+    async def _render_segmented(
+        self,
+        bound: BoundRender,
+        encode_args: list[str],
+        poster_times: list[float],
+        segment_count: int,
+        tmp_dir: str,
+        output_path: str,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        """
+        Encode frame-aligned time ranges in parallel and concat them losslessly.
+        
+        Each segment seeks on the input side (see ``BoundRender.window``):
+        the background, images and looped clips are generated or seeked for
+        its range only, with timestamps shifted back onto the original
+        timeline so ``enable=between(t,...)`` expressions still hold. Each
+        segment writes the poster candidates that fall inside its range.
+        """
+        duration_seconds = bound.duration_seconds
+        segments = plan_segments(duration_seconds, segment_count, frame_rate=bound.fps)
+        threads = max(1, (os.cpu_count() or 1) // len(segments))
+        pieces = [os.path.join(tmp_dir, f"segment_{segment.index:03d}.mp4") for segment in segments]
+        
+        # Looped clips are seeked to the segment start modulo their length
+        clip_durations: dict[str, float] = {}
+        for kind, path in bound.inputs:
+            if kind == "video" and path not in clip_durations:
+                info = await ffmpeg_runner.probe(path)
+                if info and info.get("duration"):
+                    clip_durations[path] = info["duration"]
+        
+        def build_args(segment: EncodeSegment) -> list[str]:
+            end = segment.start + segment.duration
+            input_args, window_graph = bound.window(segment.start, segment.duration, clip_durations)
+            filter_complex, map_label, poster_args = attach_poster_output(
+                window_graph,
+                bound.map_label,
+                [t for t in poster_times if segment.start <= t < end],
+                bound.fps,
+                os.path.join(tmp_dir, f"poster_{segment.index:03d}_%02d.jpg"),
+            )
+            # Pieces start at zero for the concat demuxer
+            filter_complex += f";{map_label}setpts=PTS-STARTPTS[vsegment]"
+            return [
+                *input_args,
+                "-filter_complex", filter_complex,
+                "-map", "[vsegment]",
+                "-t", f"{segment.duration:.6f}",
+                *encode_args,
+                "-threads", str(threads),
+                pieces[segment.index],
+                *poster_args,
             ]
-        )
         
-        # Run FFmpeg
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-        )
+        await encode_segments(segments, build_args, total_duration=duration_seconds, on_progress=on_progress)
         
-        if process.returncode != 0:
-            raise Exception(f"FFmpeg error: {process.stderr}")
+        list_path = write_concat_list(pieces, os.path.join(tmp_dir, "segments.txt"))
+        await ffmpeg_runner.run(["-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path])
     
     async def _generate_thumbnail(self, video_path: str, output_path: str):
-        """Generate thumbnail from video."""
-        cmd = [
-            settings.FFMPEG_PATH,
-            "-y",
-            "-i", video_path,
-            "-ss", "00:00:01",
-            "-vframes", "1",
-            "-q:v", "2",
-            output_path,
-        ]
-        
-        subprocess.run(cmd, capture_output=True)
+        """Grab a thumbnail from the finished video (fallback when the render wrote no poster)."""
+        await ffmpeg_runner.run(
+            [
+                "-y",
+                "-i", video_path,
+                "-ss", "00:00:01",
+                "-vframes", "1",
+                "-q:v", "2",
+                output_path,
+            ],
+            timeout=60,
+        )
@@ -36,6 +36,7 @@ from app.core.config import settings
 from app.models.thumbnail import Thumbnail, ThumbnailStatus, ThumbnailStyle
 from app.schemas.thumbnail import ThumbnailGenerateRequest
 from app.services.storage_service import StorageService
+from app.services.job_events import job_events, channel_name
 from app.services.font_service import (
     get_font_path,
     get_font_by_id,
@@ -218,9 +219,12 @@ class ThumbnailService:
         if not thumbnail:
             return
 
+        channel = channel_name("thumbnail", thumbnail.id)
+
         try:
             thumbnail.status = ThumbnailStatus.GENERATING
             await self.db.commit()
+            job_events.publish(channel, thumbnail.status.value, {"status": thumbnail.status.value})
 
             # Make sure we have fonts
             await ensure_core_fonts()
@@ -291,6 +295,10 @@ class ThumbnailService:
                     "sizes": size_outputs,
                     "url": size_outputs.get("youtube") or list(size_outputs.values())[0],
                 })
+                job_events.publish(channel, "variant", {
+                    **all_variants[-1],
+                    "progress": int((vi + 1) * 100 / generate_variants),
+                })
 
             thumbnail.output_url = all_variants[0]["url"]
             thumbnail.output_variants = all_variants
@@ -301,6 +309,12 @@ class ThumbnailService:
             thumbnail.error_message = str(e)
 
         await self.db.commit()
+        job_events.publish(channel, thumbnail.status.value, {
+            "status": thumbnail.status.value,
+            "output_url": thumbnail.output_url,
+            "output_variants": thumbnail.output_variants,
+            "error_message": thumbnail.error_message,
+        })
 
     # ── Base image creation ─────────────────────────────────────────────────
 
@@ -0,0 +1,160 @@
+"""
+Caption Translation Service
+Batched Hindi → English segment translation for captions.
+
+Segments are packed into JSON batches with stable ids, sent concurrently
+under a token budget, and cached by normalised text so repeated phrases
+("subscribe karo", "dosto") are only ever translated once per process.
+"""
+
+import asyncio
+import json
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+import openai
+
+from app.core.config import settings
+from app.core.lru import LRUCache
+
+
+TRANSLATION_SYSTEM_PROMPT = (
+    "You translate Hindi and Hinglish video caption lines into natural, concise English. "
+    'The user sends JSON {"segments": [{"id": <int>, "text": <string>}]}. '
+    'Reply with JSON {"translations": [{"id": <int>, "text": <string>}]} '
+    "containing every input id exactly once. Keep brand names and proper nouns as-is. "
+    "Do not merge, split or reorder lines."
+)
+
+# Trailing punctuation that does not change a caption's meaning (incl. Devanagari danda).
+# "?", "!" and "…" stay in the key: in Hinglish they often are the only difference
+# between a question and a statement ("tum aa rahe ho?" / "tum aa rahe ho.").
+_TRAILING_PUNCT = "।॥.,"
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_segment_text(text: str) -> str:
+    """Normalise segment text into a translation cache key."""
+    text = unicodedata.normalize("NFC", text or "")
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text.rstrip(_TRAILING_PUNCT + " ").casefold()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate for budget packing.
+
+    Devanagari costs roughly one token per character with the OpenAI
+    tokenizers, Latin text roughly one token per four characters.
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 0x7F)
+    ascii_chars = len(text) - non_ascii
+    return non_ascii + ascii_chars // 4 + 8  # + per-item JSON overhead
+
+
+# Process-wide cache shared by every CaptionService instance.
+translation_cache: LRUCache[str, str] = LRUCache(settings.TRANSLATION_CACHE_SIZE)
+
+
+class CaptionTranslator:
+    """Translate many caption lines with few, concurrent chat completions."""
+
+    def __init__(
+        self,
+        client: openai.AsyncOpenAI,
+        cache: Optional[LRUCache[str, str]] = None,
+    ):
+        self.client = client
+        self.cache = cache if cache is not None else translation_cache
+        self.max_batch_tokens = settings.TRANSLATION_BATCH_MAX_TOKENS
+        self.max_batch_segments = settings.TRANSLATION_BATCH_MAX_SEGMENTS
+        self._semaphore = asyncio.Semaphore(settings.TRANSLATION_MAX_CONCURRENCY)
+
+    async def translate(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Translate a list of caption lines.
+
+        Returns a list aligned with ``texts``; entries are None for empty
+        input or lines the model failed to return.
+        """
+        keys = [normalize_segment_text(t) for t in texts]
+
+        # Unique cache misses, keyed by normalised text → original text
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key and key not in pending and self.cache.get(key) is None:
+                pending[key] = text.strip()
+
+        if pending:
+            batches = self._pack_batches(list(pending.items()))
+            results = await asyncio.gather(
+                *(self._translate_batch(batch) for batch in batches)
+            )
+            for translated in results:
+                for key, english in translated.items():
+                    self.cache.set(key, english)
+
+        return [self.cache.get(key) if key else None for key in keys]
+
+    def _pack_batches(self, items: List[tuple]) -> List[List[tuple]]:
+        """Greedily pack (key, text) pairs into batches under the token budget."""
+        batches: List[List[tuple]] = []
+        current: List[tuple] = []
+        current_tokens = 0
+
+        for item in items:
+            tokens = estimate_tokens(item[1])
+            if current and (
+                current_tokens + tokens > self.max_batch_tokens
+                or len(current) >= self.max_batch_segments
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _translate_batch(self, batch: List[tuple], retry: bool = True) -> Dict[str, str]:
+        """Translate one batch; ids the model drops are retried once as a smaller batch."""
+        payload = {
+            "segments": [{"id": i, "text": text} for i, (_, text) in enumerate(batch)]
+        }
+        input_tokens = sum(estimate_tokens(text) for _, text in batch)
+
+        async with self._semaphore:
+            response = await self.client.chat.completions.create(
+                model=settings.TRANSLATION_MODEL,
+                messages=[
+                    {"role": "system", "content": TRANSLATION_SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+                ],
+                response_format={"type": "json_object"},
+                temperature=0,
+                # English output is much shorter in tokens than Devanagari input
+                max_tokens=min(4096, input_tokens + 64),
+            )
+
+        translated: Dict[str, str] = {}
+        try:
+            data = json.loads(response.choices[0].message.content or "{}")
+            rows = data.get("translations") or []
+        except (json.JSONDecodeError, AttributeError):
+            rows = []
+
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            idx = row.get("id")
+            text = row.get("text")
+            if isinstance(idx, int) and 0 <= idx < len(batch) and isinstance(text, str) and text.strip():
+                translated[batch[idx][0]] = text.strip()
+
+        missing = [item for item in batch if item[0] not in translated]
+        if missing and retry:
+            translated.update(await self._translate_batch(missing, retry=False))
+
+        return translated
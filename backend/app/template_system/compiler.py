@@ -0,0 +1,652 @@
+"""
+Template Compiler
+Turns a template definition (template_data) into a reusable render plan.
+
+Compiling walks the definition once: it checks it against
+template_schema.json, resolves which values are ``$duration`` /
+``$theme.*`` / ``$placeholder.*`` references, sorts layers by z and keeps
+only the fields the renderer reads. A render then only *binds* a plan to
+its customisations (theme, duration, placeholder values, downloaded
+assets) to get FFmpeg inputs and the filter graph.
+
+Plans are cached per process by (template id, version); the seeder
+compiles every builtin template so broken definitions fail there, not
+mid-render.
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.lru import LRUCache
+from app.template_system.text_sprites import TextStyle, entrance_animation, text_sprite
+
+
+SCHEMA_PATH = Path(__file__).parent / "template_schema.json"
+
+TOKEN_PATTERN = re.compile(r"\$(duration|theme\.(?:colors|fonts)\.[A-Za-z0-9_]+|placeholder\.[A-Za-z0-9_]+)")
+
+LAYER_TYPES = ("solid", "video", "image", "text")
+
+
+class TemplateCompileError(ValueError):
+    """A template definition is invalid; ``errors`` lists every problem found."""
+
+    def __init__(self, errors: List[str], template_key: Optional[str] = None):
+        self.errors = errors
+        self.template_key = template_key
+        prefix = f"Template {template_key}: " if template_key else ""
+        super().__init__(prefix + "; ".join(errors))
+
+
+# --- schema validation ---
+
+_schema_cache: Optional[dict] = None
+
+
+def _load_schema() -> dict:
+    global _schema_cache
+    if _schema_cache is None:
+        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+            _schema_cache = json.load(f)
+    return _schema_cache
+
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _type_matches(value: Any, expected: str) -> bool:
+    if expected == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, _JSON_TYPES[expected])
+
+
+def _schema_errors(value: Any, schema: dict, root: dict, path: str) -> List[str]:
+    """Validate ``value`` against the JSON Schema subset template_schema.json uses."""
+    if "$ref" in schema:
+        target: Any = root
+        for part in schema["$ref"].lstrip("#/").split("/"):
+            target = target[part]
+        return _schema_errors(value, target, root, path)
+
+    if "oneOf" in schema:
+        matches = sum(1 for option in schema["oneOf"] if not _schema_errors(value, option, root, path))
+        return [] if matches == 1 else [f"{path}: does not match exactly one allowed form"]
+
+    expected = schema.get("type")
+    if expected and not _type_matches(value, expected):
+        return [f"{path}: expected {expected}"]
+    if "const" in schema and value != schema["const"]:
+        return [f"{path}: must be {schema['const']!r}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: must be one of {schema['enum']}"]
+
+    errors: List[str] = []
+    if isinstance(value, str) and len(value) < schema.get("minLength", 0):
+        errors.append(f"{path}: too short")
+    if _type_matches(value, "number") and "minimum" in schema and value < schema["minimum"]:
+        errors.append(f"{path}: must be >= {schema['minimum']}")
+
+    if isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            errors.append(f"{path}: needs at least {schema['minItems']} item(s)")
+        if "items" in schema:
+            for i, item in enumerate(value):
+                errors += _schema_errors(item, schema["items"], root, f"{path}[{i}]")
+
+    if isinstance(value, dict):
+        if len(value) < schema.get("minProperties", 0):
+            errors.append(f"{path}: needs at least {schema['minProperties']} entr(y/ies)")
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(f"{path}.{key}: required")
+        properties = schema.get("properties", {})
+        extra = schema.get("additionalProperties", True)
+        for key, item in value.items():
+            if key in properties:
+                errors += _schema_errors(item, properties[key], root, f"{path}.{key}")
+            elif extra is False:
+                errors.append(f"{path}.{key}: not allowed")
+            elif isinstance(extra, dict):
+                errors += _schema_errors(item, extra, root, f"{path}.{key}")
+
+    return errors
+
+
+def validate_definition(definition: dict) -> List[str]:
+    """Return schema violations of a template definition (empty if valid)."""
+    schema = _load_schema()
+    return _schema_errors(definition, schema, schema, "$")
+
+
+# --- compiled values ---
+
+@dataclass(frozen=True)
+class Ref:
+    """A whole-value reference such as ``$duration`` or ``$placeholder.logo``."""
+
+    token: str
+
+
+@dataclass(frozen=True)
+class Interpolated:
+    """A string with embedded references, e.g. ``"☕  $placeholder.text_item1"``."""
+
+    parts: Tuple[Any, ...]  # literal str or Ref
+
+
+def _compile_value(value: Any) -> Any:
+    if not isinstance(value, str) or "$" not in value:
+        return value
+    match = TOKEN_PATTERN.fullmatch(value)
+    if match:
+        return Ref(match.group(1))
+    parts: List[Any] = []
+    last = 0
+    for match in TOKEN_PATTERN.finditer(value):
+        if match.start() > last:
+            parts.append(value[last:match.start()])
+        parts.append(Ref(match.group(1)))
+        last = match.end()
+    if not parts:
+        return value
+    if last < len(value):
+        parts.append(value[last:])
+    return Interpolated(tuple(parts))
+
+
+def _refs(value: Any) -> List[Ref]:
+    if isinstance(value, Ref):
+        return [value]
+    if isinstance(value, Interpolated):
+        return [part for part in value.parts if isinstance(part, Ref)]
+    return []
+
+
+@dataclass(frozen=True)
+class PlanLayer:
+    """One layer with only the fields the renderer reads, references unresolved."""
+
+    id: Optional[str]
+    type: str
+    start: Any
+    end: Any
+    source: Any = None  # video/image
+    placeholder: Optional[str] = None  # placeholder key behind ``source``
+    text: Any = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BoundRender:
+    """A plan bound to one render's customisations."""
+
+    input_args: List[str]  # "-y", the lavfi background and asset inputs
+    filter_complex: str
+    map_label: str
+    duration_seconds: int
+    fps: int
+    width: int
+    height: int
+    layer_counts: Dict[str, int] = field(default_factory=dict)  # layers drawn, by type (+ "animated_text")
+    sprites_drawn: int = 0  # text sprites that were not cached yet
+    sprite_seconds: float = 0.0
+    background: str = ""  # lavfi colour source without its duration
+    inputs: List[Tuple[str, str]] = field(default_factory=list)  # (video / image / sprite, path) from input 1
+
+    def window(self, start: float, duration: float, clip_durations: Dict[str, float]) -> Tuple[List[str], str]:
+        """
+        Inputs and filter graph that produce only ``[start, start + duration)``.
+
+        Every input is seeked or generated for the window alone and its
+        timestamps shifted to the original timeline, so ``enable`` and
+        sprite timings are unchanged and nothing before ``start`` is
+        decoded or composited. Looped videos seek to ``start`` modulo their
+        length (``clip_durations`` by path); a clip of unknown length is
+        decoded from its start and trimmed instead. The output keeps the
+        original timestamps (a segment encode resets them).
+        """
+        shift = f"setpts=PTS-STARTPTS+{start:.6f}/TB"
+        input_args = ["-y", "-f", "lavfi", "-i", f"{self.background}:d={duration:.6f}"]
+        prefixes = {0: shift}
+        for index, (kind, path) in enumerate(self.inputs, start=1):
+            if kind == "video":
+                clip = clip_durations.get(path)
+                if clip:
+                    input_args.extend(["-stream_loop", "-1", "-ss", f"{start % clip:.6f}", "-t", f"{duration:.6f}", "-i", path])
+                    prefixes[index] = shift
+                else:
+                    input_args.extend(["-stream_loop", "-1", "-t", f"{start + duration:.6f}", "-i", path])
+                    prefixes[index] = f"trim=start={start:.6f}"
+            elif kind == "image":
+                input_args.extend(["-loop", "1", "-t", f"{duration:.6f}", "-i", path])
+                prefixes[index] = shift
+            else:
+                # Sprites are already placed on the absolute timeline
+                input_args.extend(["-i", path])
+
+        def prefix(match: "re.Match[str]") -> str:
+            chain = prefixes.get(int(match.group(1)))
+            return f"{match.group(0)}{chain}," if chain else match.group(0)
+
+        return input_args, re.sub(r"\[(\d+):v\]", prefix, self.filter_complex)
+
+
+class _Bindings:
+    """Values a render substitutes for references."""
+
+    def __init__(self, plan: "RenderPlan", customizations: Dict[str, Any], duration_seconds: int):
+        theme_id = plan.resolve_theme_id(customizations)
+        theme = (plan.themes.get(theme_id) or {}) if theme_id else {}
+        self.duration = duration_seconds
+        self.colors = theme.get("colors") or {}
+        self.fonts = theme.get("fonts") or {}
+        self.customizations = customizations
+        self.defaults = plan.placeholder_defaults
+
+    def resolve(self, value: Any) -> Any:
+        if isinstance(value, Ref):
+            token = value.token
+            if token == "duration":
+                return self.duration
+            if token.startswith("theme.colors."):
+                return self.colors.get(token[len("theme.colors."):], "#000000")
+            if token.startswith("theme.fonts."):
+                return self.fonts.get(token[len("theme.fonts."):])
+            key = token[len("placeholder."):]
+            return self.customizations.get(key) or self.defaults.get(key)
+        if isinstance(value, Interpolated):
+            return "".join(
+                str(self.resolve(part) or "") if isinstance(part, Ref) else part
+                for part in value.parts
+            )
+        return value
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """Compiled, customisation-independent form of a template definition."""
+
+    key: Tuple[str, int]
+    width: int
+    height: int
+    fps: int
+    default_duration: int
+    themes: Dict[str, dict]
+    default_theme: Optional[str]
+    placeholder_defaults: Dict[str, Any]
+    placeholder_types: Dict[str, str]  # placeholder key → video / image / logo / text / ...
+    background: Any  # first solid layer's colour (may be a reference)
+    layers: Tuple[PlanLayer, ...]  # drawable layers, sorted by z
+    asset_layers: Tuple[PlanLayer, ...]  # video/image layers in definition order (FFmpeg input order)
+
+    def resolve_duration(self, customizations: Dict[str, Any]) -> int:
+        duration = customizations.get("duration_seconds")
+        if isinstance(duration, int) and duration > 0:
+            return duration
+        return self.default_duration
+
+    def resolve_theme_id(self, customizations: Dict[str, Any]) -> Optional[str]:
+        theme_id = customizations.get("theme_id")
+        if isinstance(theme_id, str) and theme_id in self.themes:
+            return theme_id
+        return self.default_theme
+
+    def resolve_customizations(self, customizations: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Everything a render reads from its customisations: placeholder
+        values with defaults applied, the theme and the duration. Keys the
+        template does not use are dropped.
+        """
+        customizations = customizations or {}
+        resolved = {
+            key: customizations.get(key) or default
+            for key, default in self.placeholder_defaults.items()
+        }
+        resolved["theme_id"] = self.resolve_theme_id(customizations)
+        resolved["duration_seconds"] = self.resolve_duration(customizations)
+        return resolved
+
+    def bind(
+        self,
+        customizations: Optional[Dict[str, Any]],
+        asset_paths: Dict[str, str],
+        tmp_dir: str,
+        scale: int = 1,
+        fps: Optional[int] = None,
+    ) -> BoundRender:
+        """
+        Produce FFmpeg inputs and the filter graph for one render.
+
+        Text layers become cached PNG sprites (see text_sprites) overlaid
+        as extra inputs after the assets.
+        ``scale`` divides the canvas and every pixel value (2 = half,
+        4 = quarter resolution, for preview proxies); ``fps`` overrides
+        the template frame rate.
+        """
+        customizations = customizations or {}
+        duration_seconds = self.resolve_duration(customizations)
+        values = _Bindings(self, customizations, duration_seconds)
+        scale = max(1, int(scale))
+        fps = fps or self.fps
+        # Keep even dimensions for yuv420p
+        width = self.width // scale // 2 * 2
+        height = self.height // scale // 2 * 2
+
+        def px(value: Any) -> int:
+            return int(float(value or 0) / scale)
+
+        def between_expr(start: Any, end: Any) -> str:
+            s = float(values.resolve(start) or 0)
+            e = float(values.resolve(end) or duration_seconds)
+            return f"between(t\\,{s}\\,{e})"
+
+        bg_color = values.resolve(self.background) or "black"
+
+        ffmpeg_inputs: List[str] = []
+        inputs: List[Tuple[str, str]] = []
+        input_index_by_layer_id: Dict[str, int] = {}
+        for layer in self.asset_layers:
+            source = values.resolve(layer.source)
+            if not isinstance(source, str) or not source:
+                continue
+            local_path = asset_paths.get(layer.placeholder or "")
+            if not local_path and source.startswith(tmp_dir):
+                local_path = source
+            if not local_path:
+                # The user provided a URL that was not downloaded; skip the layer
+                continue
+            # Looped inputs are bounded to the timeline so every branch of the
+            # graph reaches EOF (an unbounded loop can stall the poster output)
+            if layer.type == "video":
+                ffmpeg_inputs.extend(["-stream_loop", "-1", "-t", str(duration_seconds), "-i", local_path])
+            else:
+                ffmpeg_inputs.extend(["-loop", "1", "-t", str(duration_seconds), "-i", local_path])
+            inputs.append((layer.type, local_path))
+            input_index_by_layer_id[layer.id] = 1 + len(input_index_by_layer_id)
+
+        input_count = 1 + len(input_index_by_layer_id)  # next input index (text sprites follow the assets)
+        layer_counts: Dict[str, int] = {}
+        sprites_drawn = 0
+        sprite_seconds = 0.0
+        current_label = "[base]"
+        filter_lines = [f"[0:v]format=rgba{current_label}"]
+        overlay_index = 0
+        draw_index = 0
+
+        for layer in self.layers:
+            f = layer.fields
+            if layer.type in ("video", "image"):
+                input_idx = input_index_by_layer_id.get(layer.id)
+                if not input_idx:
+                    continue
+                opacity = float(values.resolve(f.get("opacity")) or 1.0)
+
+                if layer.type == "video":
+                    if (values.resolve(f.get("fit")) or "cover") == "contain":
+                        scale_expr = f"scale=w={width}:h={height}:force_original_aspect_ratio=decrease"
+                        pad_expr = f"pad=w={width}:h={height}:x=(ow-iw)/2:y=(oh-ih)/2:color=0x00000000"
+                        filter_lines.append(f"[{input_idx}:v]{scale_expr},{pad_expr},setsar=1,format=rgba[ov{overlay_index}]")
+                    else:
+                        scale_expr = f"scale=w={width}:h={height}:force_original_aspect_ratio=increase"
+                        crop_expr = f"crop=w={width}:h={height}"
+                        filter_lines.append(f"[{input_idx}:v]{scale_expr},{crop_expr},setsar=1,format=rgba[ov{overlay_index}]")
+                else:
+                    w = px(values.resolve(f.get("w")))
+                    h = px(values.resolve(f.get("h")))
+                    if w > 0 and h > 0:
+                        filter_lines.append(f"[{input_idx}:v]scale={w}:{h}:force_original_aspect_ratio=decrease,format=rgba[ov{overlay_index}]")
+                    else:
+                        filter_lines.append(f"[{input_idx}:v]format=rgba[ov{overlay_index}]")
+
+                x = px(values.resolve(f.get("x")))
+                y = px(values.resolve(f.get("y")))
+                enable = between_expr(layer.start, layer.end)
+
+                if opacity < 1.0:
+                    filter_lines.append(f"[ov{overlay_index}]colorchannelmixer=aa={opacity}[ova{overlay_index}]")
+                    ov_in = f"[ova{overlay_index}]"
+                else:
+                    ov_in = f"[ov{overlay_index}]"
+
+                out_label = f"[v{overlay_index}]"
+                filter_lines.append(f"{current_label}{ov_in}overlay=x={x}:y={y}:enable='{enable}'{out_label}")
+                current_label = out_label
+                overlay_index += 1
+                layer_counts[layer.type] = layer_counts.get(layer.type, 0) + 1
+
+            elif layer.type == "text":
+                text_val = values.resolve(layer.text)
+                if not isinstance(text_val, str) or not text_val.strip():
+                    continue
+
+                style = TextStyle(
+                    text=text_val,
+                    font_family=values.resolve(f.get("fontFamily")) or "Inter",
+                    font_weight=int(values.resolve(f.get("fontWeight")) or 400),
+                    font_size=px(values.resolve(f.get("fontSize")) or 48),
+                    color=values.resolve(f.get("color")) or "white",
+                    stroke_color=values.resolve(f.get("strokeColor")),
+                    stroke_width=px(values.resolve(f.get("strokeWidth"))),
+                    shadow_color=values.resolve(f.get("shadowColor")),
+                    shadow_x=px(values.resolve(f.get("shadowX"))),
+                    shadow_y=px(values.resolve(f.get("shadowY"))),
+                    shadow_blur=px(values.resolve(f.get("shadowBlur"))),
+                    box_color=values.resolve(f.get("boxColor")),
+                    box_radius=px(values.resolve(f.get("boxRadius"))),
+                    box_padding_x=px(values.resolve(f.get("boxPaddingX"))),
+                    box_padding_y=px(values.resolve(f.get("boxPaddingY"))),
+                )
+                animation = f.get("animation")
+                sprite = text_sprite(style, animation, fps)
+                if sprite.draw_seconds:
+                    sprites_drawn += 1
+                    sprite_seconds += sprite.draw_seconds
+                layer_counts["text"] = layer_counts.get("text", 0) + 1
+                if sprite.frames > 1:
+                    layer_counts["animated_text"] = layer_counts.get("animated_text", 0) + 1
+
+                start = float(values.resolve(layer.start) or 0) + (animation.delay if animation else 0)
+                enable = between_expr(start, layer.end)
+                x = px(values.resolve(f.get("x"))) + sprite.offset_x
+                y = px(values.resolve(f.get("y"))) + sprite.offset_y
+
+                # Not looped: overlay holds the last frame, so each PNG is decoded once
+                ffmpeg_inputs.extend(["-i", sprite.path])
+                inputs.append(("sprite", sprite.path))
+                input_idx = input_count
+                input_count += 1
+                draw_index += 1
+                if sprite.frames > 1:
+                    # Shift the sprite's own frame timestamps to the animation start (stored
+                    # frames can be merged, so frame counts are not times); the last is held
+                    filter_lines.append(f"[{input_idx}:v]setpts=PTS-STARTPTS+{start}/TB,format=rgba[ts{draw_index}]")
+                else:
+                    filter_lines.append(f"[{input_idx}:v]format=rgba[ts{draw_index}]")
+                out_label = f"[t{draw_index}]"
+                filter_lines.append(f"{current_label}[ts{draw_index}]overlay=x={x}:y={y}:enable='{enable}'{out_label}")
+                current_label = out_label
+
+        background = f"color=c={bg_color}:s={width}x{height}:r={fps}"
+        input_args = [
+            "-y",
+            "-f", "lavfi",
+            "-i", f"{background}:d={duration_seconds}",
+            *ffmpeg_inputs,
+        ]
+
+        return BoundRender(
+            input_args=input_args,
+            filter_complex=";".join(filter_lines),
+            map_label=current_label,
+            duration_seconds=duration_seconds,
+            fps=fps,
+            width=width,
+            height=height,
+            layer_counts=layer_counts,
+            sprites_drawn=sprites_drawn,
+            sprite_seconds=round(sprite_seconds, 3),
+            background=background,
+            inputs=inputs,
+        )
+
+
+def _compile_time(value: Any, path: str, errors: List[str]) -> Any:
+    if value is None or value == "$duration":
+        return _compile_value(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    errors.append(f"{path}: time must be a number or \"$duration\"")
+    return None
+
+
+def _compile_layer(layer: dict, index: int, placeholders: dict, errors: List[str]) -> Optional[PlanLayer]:
+    path = f"$.layers[{index}]"
+    ltype = layer.get("type")
+    if ltype not in LAYER_TYPES:
+        errors.append(f"{path}.type: unknown layer type {ltype!r}")
+        return None
+
+    style = layer.get("style") if isinstance(layer.get("style"), dict) else {}
+    transform = layer.get("transform") if isinstance(layer.get("transform"), dict) else {}
+    fields: Dict[str, Any] = {}
+    source = placeholder = text = None
+
+    if ltype in ("video", "image"):
+        fields = {key: _compile_value(transform.get(key)) for key in ("fit", "opacity", "x", "y", "w", "h")}
+        source = _compile_value(layer.get("source"))
+        if isinstance(source, Ref) and source.token.startswith("placeholder."):
+            placeholder = source.token[len("placeholder."):]
+    elif ltype == "text":
+        background = style.get("background")
+        background = background if isinstance(background, dict) else {}
+        stroke = style.get("stroke") if isinstance(style.get("stroke"), dict) else {}
+        shadow = style.get("shadow") if isinstance(style.get("shadow"), dict) else {}
+        fields = {
+            "fontSize": _compile_value(style.get("fontSize")),
+            "fontWeight": _compile_value(style.get("fontWeight")),
+            "color": _compile_value(style.get("color")),
+            "fontFamily": _compile_value(style.get("fontFamily")),
+            "strokeColor": _compile_value(stroke.get("color")),
+            "strokeWidth": _compile_value(stroke.get("width")),
+            "shadowColor": _compile_value(shadow.get("color")),
+            "shadowX": _compile_value(shadow.get("x")),
+            "shadowY": _compile_value(shadow.get("y")),
+            "shadowBlur": _compile_value(shadow.get("blur")),
+            "boxColor": _compile_value(background.get("color")),
+            "boxRadius": _compile_value(background.get("radius")),
+            "boxPaddingX": _compile_value(background.get("paddingX")),
+            "boxPaddingY": _compile_value(background.get("paddingY")),
+            "x": _compile_value(transform.get("x")),
+            "y": _compile_value(transform.get("y")),
+            "animation": entrance_animation(layer.get("animations")),
+        }
+        text = _compile_value(layer.get("text"))
+    else:  # solid
+        fields = {"color": _compile_value(style.get("color"))}
+
+    for value in [source, text, *fields.values()]:
+        for ref in _refs(value):
+            if ref.token.startswith("placeholder.") and ref.token[len("placeholder."):] not in placeholders:
+                errors.append(f"{path}: unknown placeholder ${ref.token}")
+
+    return PlanLayer(
+        id=layer.get("id"),
+        type=ltype,
+        start=_compile_time(layer.get("start"), f"{path}.start", errors),
+        end=_compile_time(layer.get("end"), f"{path}.end", errors),
+        source=source,
+        placeholder=placeholder,
+        text=text,
+        fields=fields,
+    )
+
+
+def compile_definition(
+    definition: Optional[dict],
+    key: Tuple[str, int] = ("", 0),
+    width: int = 1080,
+    height: int = 1920,
+    fps: int = 30,
+    duration_seconds: int = 15,
+    strict: bool = False,
+) -> RenderPlan:
+    """
+    Compile a template definition into a RenderPlan.
+
+    ``width``/``height``/``fps``/``duration_seconds`` are the Template row's
+    values, used where the definition does not set them. With ``strict``
+    the definition must also satisfy template_schema.json (used for
+    builtin templates at seed time).
+
+    Raises:
+        TemplateCompileError: The definition cannot be rendered.
+    """
+    definition = definition or {}
+    errors: List[str] = validate_definition(definition) if strict else []
+
+    themes = definition.get("themes") if isinstance(definition.get("themes"), dict) else {}
+    placeholders = definition.get("placeholders") if isinstance(definition.get("placeholders"), dict) else {}
+    raw_layers = definition.get("layers") if isinstance(definition.get("layers"), list) else []
+
+    compiled: List[PlanLayer] = []
+    for index, layer in enumerate(raw_layers):
+        if not isinstance(layer, dict):
+            continue
+        plan_layer = _compile_layer(layer, index, placeholders, errors)
+        if plan_layer is not None:
+            compiled.append((int(layer.get("z") or 0), plan_layer))
+
+    if errors:
+        raise TemplateCompileError(errors, key[0] or definition.get("id"))
+
+    background = next((layer.fields.get("color") for _, layer in compiled if layer.type == "solid"), None)
+    return RenderPlan(
+        key=key,
+        width=int(definition.get("width") or width or 1080),
+        height=int(definition.get("height") or height or 1920),
+        fps=int(definition.get("fps") or fps or 30),
+        default_duration=int(duration_seconds),
+        themes=themes,
+        default_theme=next(iter(themes), None),
+        placeholder_defaults={k: (v or {}).get("default") for k, v in placeholders.items() if isinstance(v, dict)},
+        placeholder_types={k: str(v.get("type") or "") for k, v in placeholders.items() if isinstance(v, dict)},
+        background=background,
+        layers=tuple(layer for _, layer in sorted(compiled, key=lambda item: item[0])),
+        asset_layers=tuple(
+            layer for _, layer in compiled
+            if layer.type in ("video", "image") and layer.id
+        ),
+    )
+
+
+# Process-wide cache shared by every TemplateService instance.
+render_plan_cache: LRUCache[tuple, RenderPlan] = LRUCache(settings.TEMPLATE_PLAN_CACHE_SIZE)
+
+
+def get_render_plan(template) -> RenderPlan:
+    """Compiled plan for a Template row, from the cache when its version is unchanged."""
+    key = (str(template.id), template.version or 0)
+    plan = render_plan_cache.get(key)
+    if plan is None:
+        plan = compile_definition(
+            template.template_data,
+            key=key,
+            width=template.width,
+            height=template.height,
+            fps=template.fps,
+            duration_seconds=template.duration_seconds,
+        )
+        render_plan_cache.set(key, plan)
+    return plan
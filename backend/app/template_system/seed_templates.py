@@ -13,6 +13,7 @@ from sqlalchemy import select
 
 from app.core.database import AsyncSessionLocal
 from app.models.template import Template, TemplateCategory, TemplateType, AspectRatio
+from app.template_system.compiler import TemplateCompileError, compile_definition
 
 
 TEMPLATES_DIR = Path(__file__).parent / "builtin_templates"
@@ -41,11 +42,28 @@ async def seed_templates():
         print("⚠️  No template JSON files found in", TEMPLATES_DIR)
         return
 
-    async with AsyncSessionLocal() as db:
-        for path in json_files:
-            with open(path, "r", encoding="utf-8") as f:
-                data: dict = json.load(f)
+    # Load and compile everything first: a broken definition fails the
+    # seed instead of a user's render, and nothing is half-written.
+    definitions: list[tuple[Path, dict]] = []
+    errors: list[str] = []
+    for path in json_files:
+        with open(path, "r", encoding="utf-8") as f:
+            data: dict = json.load(f)
+        duration_presets = data.get("durationPresets") or [15]
+        try:
+            compile_definition(data, key=(data.get("id", path.stem), 0), duration_seconds=duration_presets[0], strict=True)
+        except TemplateCompileError as e:
+            errors.append(f"{path.name}: {e}")
+            continue
+        definitions.append((path, data))
+
+    if errors:
+        for error in errors:
+            print("❌", error)
+        raise TemplateCompileError(errors)
 
+    async with AsyncSessionLocal() as db:
+        for path, data in definitions:
             template_id = data.get("id", path.stem)
             name_obj = data.get("name") or {}
             name_en = name_obj.get("en", template_id) if isinstance(name_obj, dict) else str(name_obj)
@@ -70,7 +88,9 @@ async def seed_templates():
             ).scalar_one_or_none()
 
             if existing:
-                # Update in place
+                # Update in place; a new version invalidates cached render plans
+                if existing.template_data != data or existing.duration_seconds != default_duration:
+                    existing.version = (existing.version or 1) + 1
                 existing.template_data = data
                 existing.name_hindi = name_hi
                 existing.tags = tags
@@ -0,0 +1,407 @@
+"""
+Text Sprites
+Rasterise template text layers once with Pillow instead of on every frame.
+
+FFmpeg's drawtext draws a text layer again for every output frame, does
+no complex-script shaping and cannot draw the rounded translucent boxes,
+strokes and shadows templates ask for. Instead each text layer is drawn
+once into a transparent PNG with the font_service fonts and composited
+with ``overlay``. Devanagari text switches to a Devanagari-capable font
+of the nearest weight and is shaped by Raqm when Pillow has it (install
+libfribidi next to the Pillow wheel).
+
+Entrance animations (fade, pop, slide*, wipe) become animated PNG sprite
+sequences with one frame per output frame; the last frame is the settled
+text, which the overlay holds for the rest of the layer.
+
+Sprites are content-addressed in the asset cache's ``sprites/`` directory
+(pruned with it), so the same text is drawn once per node.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont, PngImagePlugin, features
+
+from app.core.config import settings
+
+
+SPRITE_DIR = os.path.join(settings.TEMPLATE_ASSET_CACHE_DIR, "sprites")
+
+# Bump when drawing changes so cached sprites are redrawn
+SPRITE_VERSION = 2
+
+HAS_RAQM = features.check("raqm")
+LAYOUT_ENGINE = ImageFont.Layout.RAQM if HAS_RAQM else ImageFont.Layout.BASIC
+
+SYSTEM_FONTS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+ANIMATION_TYPES = ("fade", "pop", "slideUp", "slideDown", "slideLeft", "slideRight", "wipe")
+
+# Slides travel this fraction of the sprite height
+SLIDE_DISTANCE = 0.6
+# Pop grows from this scale, overshooting slightly before settling at 1
+POP_FROM = 0.6
+POP_MARGIN = 0.05
+
+# Extra space between lines of multi-line text, as a fraction of the font size
+LINE_GAP = 0.15
+
+OFFSET_KEY = "contentkaro-offset"
+
+RGBA = Tuple[int, int, int, int]
+
+_FUNCTIONAL_COLOR = re.compile(r"rgba?\(([^)]*)\)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TextStyle:
+    """Everything that decides how a text layer looks, in output pixels."""
+
+    text: str
+    font_family: str = "Inter"
+    font_weight: int = 400
+    font_size: int = 48
+    color: str = "white"
+    stroke_color: Optional[str] = None
+    stroke_width: int = 0
+    shadow_color: Optional[str] = None
+    shadow_x: int = 0
+    shadow_y: int = 0
+    shadow_blur: int = 0
+    box_color: Optional[str] = None
+    box_radius: int = 0
+    box_padding_x: int = 0
+    box_padding_y: int = 0
+
+
+@dataclass(frozen=True)
+class TextAnimation:
+    """An entrance animation; ``delay`` counts from the layer start."""
+
+    type: str
+    duration: float
+    delay: float = 0.0
+
+
+@dataclass(frozen=True)
+class TextSprite:
+    """A rasterised text layer ready to overlay."""
+
+    path: str  # PNG, or animated PNG when frames > 1
+    offset_x: int  # sprite top-left relative to the layer's x/y
+    offset_y: int
+    frames: int = 1
+    draw_seconds: float = 0.0  # 0 when it came from the cache
+
+
+def parse_color(value: object, default: RGBA = (255, 255, 255, 255)) -> RGBA:
+    """CSS colours (names, #hex, rgb()/rgba() with 0–1 alpha) and FFmpeg's ``color@alpha``."""
+    if not isinstance(value, str) or not value.strip():
+        return default
+    value = value.strip()
+    alpha = 1.0
+    if "@" in value:
+        value, _, suffix = value.partition("@")
+        try:
+            alpha = float(suffix)
+        except ValueError:
+            pass
+    try:
+        match = _FUNCTIONAL_COLOR.fullmatch(value)
+        if match:
+            parts = [part.strip() for part in match.group(1).split(",")]
+            r, g, b = (int(float(part)) for part in parts[:3])
+            if len(parts) > 3:
+                alpha *= float(parts[3])
+            rgba = (r, g, b, 255)
+        else:
+            rgba = ImageColor.getcolor(value, "RGBA")
+    except ValueError:
+        return default
+    r, g, b, a = (max(0, min(255, int(c))) for c in (*rgba[:3], round(rgba[3] * alpha)))
+    return r, g, b, a
+
+
+def has_devanagari(text: str) -> bool:
+    return any("\u0900" <= c <= "\u097F" for c in text)
+
+
+def font_path(family: str, weight: int, devanagari: bool) -> Optional[str]:
+    """
+    Local font file for a template font: the family at the nearest weight.
+
+    Text with Devanagari needs a font that covers it; when the family is
+    Latin-only the nearest-weight Devanagari font is used instead.
+    """
+    # Imported here: importing app.services loads template_service, which imports the compiler
+    from app.services.font_service import FONT_REGISTRY, get_devanagari_font_path, get_font_path
+
+    fonts = [font for font in FONT_REGISTRY if font.family.lower() == (family or "").lower()]
+    if devanagari:
+        fonts = (
+            [font for font in fonts if font.script != "latin"]
+            or [font for font in FONT_REGISTRY if font.script != "latin"]
+        )
+    for font in sorted(fonts, key=lambda font: abs(font.weight - weight)):
+        path = get_font_path(font.id)
+        if path and path.exists():
+            return str(path)
+    if devanagari:
+        path = get_devanagari_font_path()
+        if path.exists():
+            return str(path)
+    return next((path for path in SYSTEM_FONTS if os.path.exists(path)), None)
+
+
+def _load_font(path: Optional[str], size: int, weight: int) -> ImageFont.FreeTypeFont:
+    if path is None:
+        return ImageFont.load_default(size)
+    font = ImageFont.truetype(path, size, layout_engine=LAYOUT_ENGINE)
+    # Variable fonts (several Google Fonts downloads are) open at their default weight
+    try:
+        axes = font.get_variation_axes()
+        values = []
+        for axis in axes:
+            name = axis.get("name")
+            name = name.decode("latin-1") if isinstance(name, bytes) else str(name)
+            if name.lower() == "weight":
+                values.append(max(axis["minimum"], min(axis["maximum"], weight)))
+            else:
+                values.append(axis["default"])
+        font.set_variation_by_axes(values)
+    except (OSError, KeyError):
+        pass  # not a variable font
+    return font
+
+
+def render_text(style: TextStyle) -> Tuple[Image.Image, int, int]:
+    """
+    Draw a text layer: box, shadow, stroke and fill.
+
+    Returns the RGBA image and where its top-left sits relative to the
+    layer's x/y (negative when the shadow reaches past the box).
+    """
+    text = unicodedata.normalize("NFC", style.text)
+    font = _load_font(
+        font_path(style.font_family, style.font_weight, has_devanagari(text)),
+        max(1, style.font_size),
+        style.font_weight,
+    )
+    # CSS strokes are centred on the outline, so only half shows outside the glyph
+    stroke = max(0, round(style.stroke_width / 2))
+    stroke_fill = parse_color(style.stroke_color, (0, 0, 0, 255)) if stroke else None
+
+    lines = text.split("\n")
+    ascent, descent = font.getmetrics()
+    line_step = ascent + descent + round(style.font_size * LINE_GAP)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    boxes = [measure.textbbox((0, 0), line, font=font, anchor="la", stroke_width=stroke) for line in lines]
+    left = min(box[0] for box in boxes)
+    text_w = max(1, max(box[2] for box in boxes) - left)
+    text_h = (ascent + descent) + line_step * (len(lines) - 1) + 2 * stroke
+
+    box_w = text_w + 2 * max(0, style.box_padding_x)
+    box_h = text_h + 2 * max(0, style.box_padding_y)
+    margin = 0
+    if style.shadow_color:
+        margin = 2 * max(0, style.shadow_blur) + max(abs(style.shadow_x), abs(style.shadow_y))
+    size = (box_w + 2 * margin, box_h + 2 * margin)
+    origin_x = margin + max(0, style.box_padding_x) - left
+    origin_y = margin + max(0, style.box_padding_y) + stroke
+
+    def draw_lines(fill: RGBA, outline: Optional[RGBA], dx: int = 0, dy: int = 0) -> Image.Image:
+        layer = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        for i, line in enumerate(lines):
+            draw.text(
+                (origin_x + dx, origin_y + dy + i * line_step),
+                line,
+                font=font,
+                fill=fill,
+                anchor="la",
+                stroke_width=stroke,
+                stroke_fill=outline,
+            )
+        return layer
+
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    if style.box_color:
+        box = Image.new("RGBA", size, (0, 0, 0, 0))
+        ImageDraw.Draw(box).rounded_rectangle(
+            (margin, margin, margin + box_w - 1, margin + box_h - 1),
+            radius=max(0, min(style.box_radius, box_h // 2, box_w // 2)),
+            fill=parse_color(style.box_color, (0, 0, 0, 0)),
+        )
+        image.alpha_composite(box)
+    if style.shadow_color:
+        shadow_fill = parse_color(style.shadow_color, (0, 0, 0, 128))
+        shadow = draw_lines(shadow_fill, shadow_fill if stroke else None, style.shadow_x, style.shadow_y)
+        if style.shadow_blur > 0:
+            # CSS blur radius is about two standard deviations
+            shadow = shadow.filter(ImageFilter.GaussianBlur(style.shadow_blur / 2))
+        image.alpha_composite(shadow)
+    image.alpha_composite(draw_lines(parse_color(style.color), stroke_fill))
+    return image, -margin, -margin
+
+
+def _ease_out(p: float) -> float:
+    return 1 - (1 - p) ** 3
+
+
+def _ease_out_back(p: float) -> float:
+    c1 = 1.70158
+    return 1 + (c1 + 1) * (p - 1) ** 3 + c1 * (p - 1) ** 2
+
+
+def _with_opacity(image: Image.Image, opacity: float) -> Image.Image:
+    if opacity >= 1:
+        return image
+    faded = image.copy()
+    faded.putalpha(image.getchannel("A").point(lambda a: round(a * max(0.0, opacity))))
+    return faded
+
+
+def animation_frames(image: Image.Image, animation_type: str, count: int) -> Tuple[List[Image.Image], int, int]:
+    """
+    ``count`` + 1 frames of an entrance animation, ending on ``image`` as is.
+
+    All frames share one canvas; returns them with the canvas offset
+    relative to where ``image`` itself sits.
+    """
+    w, h = image.size
+    travel = max(4, round(h * SLIDE_DISTANCE))
+    if animation_type in ("slideUp", "slideDown"):
+        canvas = (w, h + travel)
+    elif animation_type in ("slideLeft", "slideRight"):
+        canvas = (w + travel, h)
+    elif animation_type == "pop":
+        canvas = (w + 2 * math.ceil(w * POP_MARGIN), h + 2 * math.ceil(h * POP_MARGIN))
+    else:
+        canvas = (w, h)
+    # Where the settled image sits on the canvas
+    rest_x = travel if animation_type == "slideRight" else (canvas[0] - w) // 2 if animation_type == "pop" else 0
+    rest_y = travel if animation_type == "slideDown" else (canvas[1] - h) // 2 if animation_type == "pop" else 0
+
+    frames = []
+    for i in range(count + 1):
+        p = i / count
+        eased = _ease_out(p)
+        frame = Image.new("RGBA", canvas, (0, 0, 0, 0))
+        x, y, sprite = rest_x, rest_y, image
+        if animation_type == "fade":
+            sprite = _with_opacity(image, eased)
+        elif animation_type == "pop":
+            factor = POP_FROM + (1 - POP_FROM) * _ease_out_back(p)
+            size = (max(1, round(w * factor)), max(1, round(h * factor)))
+            sprite = _with_opacity(image.resize(size, Image.Resampling.LANCZOS), min(1.0, p * 2))
+            x, y = rest_x + (w - size[0]) // 2, rest_y + (h - size[1]) // 2
+        elif animation_type == "wipe":
+            sprite = image.crop((0, 0, max(1, round(w * eased)), h))
+        else:
+            shift = round(travel * (1 - eased))
+            sprite = _with_opacity(image, eased)
+            if animation_type == "slideUp":
+                y += shift
+            elif animation_type == "slideDown":
+                y -= shift
+            elif animation_type == "slideLeft":
+                x += shift
+            else:
+                x -= shift
+        frame.alpha_composite(sprite, (x, y))
+        frames.append(frame)
+    return frames, -rest_x, -rest_y
+
+
+def _save(path: str, frames: List[Image.Image], offset: Tuple[int, int], fps: int):
+    info = PngImagePlugin.PngInfo()
+    info.add_text(OFFSET_KEY, f"{offset[0]},{offset[1]}")
+    partial = f"{path}.{os.getpid()}.part.png"
+    if len(frames) > 1:
+        # Pillow merges identical consecutive frames (adding their durations), so
+        # frame counts are not stable: each frame carries its own millisecond
+        # duration, rounded so the running total stays exact, and the render
+        # retimes from the stored timestamps
+        durations = [round((i + 1) * 1000 / fps) - round(i * 1000 / fps) for i in range(len(frames))]
+        frames[0].save(
+            partial,
+            format="PNG",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=1,
+            pnginfo=info,
+        )
+    else:
+        frames[0].save(partial, format="PNG", pnginfo=info)
+    os.replace(partial, path)
+
+
+def text_sprite(style: TextStyle, animation: Optional[TextAnimation] = None, fps: int = 30) -> TextSprite:
+    """The cached sprite for a text layer, drawing it on a miss."""
+    text = unicodedata.normalize("NFC", style.text)
+    frames = 1
+    key = {
+        "version": SPRITE_VERSION,
+        "style": asdict(style),
+        "font": font_path(style.font_family, style.font_weight, has_devanagari(text)),
+        "raqm": HAS_RAQM,
+    }
+    if animation is not None and animation.type in ANIMATION_TYPES and animation.duration > 0:
+        frames = max(1, round(animation.duration * fps)) + 1
+        key["animation"] = [animation.type, frames, fps]
+    digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+    os.makedirs(SPRITE_DIR, exist_ok=True)
+    path = os.path.join(SPRITE_DIR, f"{digest}.png")
+
+    try:
+        with Image.open(path) as cached:
+            offset_x, offset_y = (int(v) for v in cached.text[OFFSET_KEY].split(","))
+        os.utime(path)  # mark as recently used
+        return TextSprite(path=path, offset_x=offset_x, offset_y=offset_y, frames=frames)
+    except (OSError, KeyError, ValueError):
+        pass
+
+    started = time.monotonic()
+    image, offset_x, offset_y = render_text(style)
+    if frames > 1:
+        sequence, canvas_x, canvas_y = animation_frames(image, animation.type, frames - 1)
+        offset_x, offset_y = offset_x + canvas_x, offset_y + canvas_y
+    else:
+        sequence = [image]
+    _save(path, sequence, (offset_x, offset_y), fps)
+    return TextSprite(
+        path=path,
+        offset_x=offset_x,
+        offset_y=offset_y,
+        frames=frames,
+        draw_seconds=time.monotonic() - started,
+    )
+
+
+def entrance_animation(animations: object) -> Optional[TextAnimation]:
+    """The first supported animation of a layer definition's ``animations`` list."""
+    if not isinstance(animations, list):
+        return None
+    for animation in animations:
+        if isinstance(animation, dict) and animation.get("type") in ANIMATION_TYPES:
+            try:
+                return TextAnimation(
+                    type=animation["type"],
+                    duration=float(animation.get("duration") or 0.4),
+                    delay=float(animation.get("delay") or 0),
+                )
+            except (TypeError, ValueError):
+                return None
+    return None
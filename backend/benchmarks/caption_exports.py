@@ -0,0 +1,99 @@
+"""
+Benchmark: every registered caption export format.
+
+Builds a synthetic transcript (Hinglish text, word timings, English
+translation) in memory and streams it through each exporter the same way
+CaptionService.export_captions does, reporting wall time, output size,
+chunk count and peak Python memory. No database or storage is needed.
+
+Usage (from backend/):
+    python -m benchmarks.caption_exports --segments 10000 --repeat 3
+"""
+
+import argparse
+import time
+import tracemalloc
+import uuid
+
+from app.models.caption import Caption, CaptionFormat
+from app.services.caption_service import CaptionService
+from app.services.caption_exporters import EXPORTERS, read_columnar
+
+
+WORDS = ["namaste", "dosto", "aaj", "hum", "baat", "karenge", "video", "ke", "baare", "mein", "bahut", "achha"]
+
+
+def make_caption(segment_count: int) -> Caption:
+    segments = []
+    for i in range(segment_count):
+        start = i * 2.5
+        words = [WORDS[(i + j) % len(WORDS)] for j in range(6)]
+        segments.append({
+            "start_time": start,
+            "end_time": start + 2.2,
+            "text": " ".join(words),
+            "text_english": f"Translated line {i}",
+            "confidence": 0.9,
+            "words": [
+                {"word": w, "start": start + j * 0.35, "end": start + j * 0.35 + 0.3}
+                for j, w in enumerate(words)
+            ],
+        })
+    caption = Caption(
+        id=uuid.uuid4(),
+        title="benchmark",
+        detected_language="hi",
+        transcription_text="\n".join(s["text"] for s in segments),
+        style_settings={},
+    )
+    caption.legacy_segments = segments
+    return caption
+
+
+def drain(service: CaptionService, caption: Caption, format: CaptionFormat, keep: bool = False):
+    """Stream one export; returns (bytes, chunks, output if ``keep``)."""
+    chunks, _, _ = service.iter_export(caption, format, include_translation=True)
+    size = count = 0
+    parts = []
+    for chunk in chunks:
+        size += len(chunk)
+        count += 1
+        if keep:
+            parts.append(chunk)
+    return size, count, b"".join(parts)
+
+
+def main(segment_count: int, repeat: int):
+    service = CaptionService.__new__(CaptionService)
+    caption = make_caption(segment_count)
+    print(f"{segment_count} segments, best of {repeat}\n")
+    print(f"{'format':10} {'time':>9} {'seg/s':>10} {'size':>10} {'chunks':>7} {'peak mem':>10}")
+
+    for format in EXPORTERS:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            size, count, _ = drain(service, caption, format)
+            best = min(best, time.perf_counter() - started)
+
+        # Separate pass for memory: tracemalloc slows allocation-heavy writers
+        tracemalloc.start()
+        drain(service, caption, format)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{format.value:10} {best * 1000:7.1f}ms {segment_count / best:10.0f} "
+            f"{size / 1024:8.0f}KB {count:7d} {peak / 1024:8.0f}KB"
+        )
+
+    _, _, output = drain(service, caption, CaptionFormat.COLUMNAR, keep=True)
+    assert len(read_columnar(output)["text"]) == segment_count, "columnar round trip lost rows"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=10000, help="transcript length (default: 10k segments)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per format; the fastest is reported")
+    args = parser.parse_args()
+    main(args.segments, args.repeat)
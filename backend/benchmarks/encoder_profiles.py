@@ -0,0 +1,35 @@
+"""
+Benchmark: x264 presets per render quality tier on this machine.
+
+Encodes a synthetic 1080×1920 clip with each tier's reference preset and
+faster ones, picks the fastest preset within the tier's SSIM and bitrate
+tolerance (see app.services.encoder_profiles) and stores the result in
+ENCODER_PROFILE_PATH, where API and render workers pick it up on start.
+
+Usage (from backend/):
+    python -m benchmarks.encoder_profiles --force --seconds 2
+"""
+
+import argparse
+import asyncio
+
+from app.services.encoder_profiles import encoder_profiles
+
+
+def main(force: bool, seconds: float):
+    if not force and encoder_profiles.load():
+        print(f"Profiles already stored in {encoder_profiles.path} (use --force to re-run):")
+    else:
+        asyncio.run(encoder_profiles.refresh(seconds or None))
+        print(f"Stored in {encoder_profiles.path}:")
+    for tier in ("low", "medium", "high", "ultra"):
+        profile = encoder_profiles.get(tier)
+        print(f"  {tier:7} {profile.label:28} {profile.encode_fps or 0:7.1f} fps  ssim {profile.ssim}  {profile.kbps} kbps")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="re-run even if profiles are stored for this machine")
+    parser.add_argument("--seconds", type=float, default=0, help="benchmark clip length (default: ENCODER_BENCHMARK_SECONDS)")
+    args = parser.parse_args()
+    main(args.force, args.seconds)
@@ -0,0 +1,190 @@
+"""
+Benchmark: single-process vs segmented caption burn-in and template render.
+
+Burn-in: generates a synthetic source (moving test pattern + tone) and an
+ASS file with one caption per second, then times the burn both ways using
+the same filter graph and encoder settings as CaptionService.
+
+Template: binds a builtin template to a short looped clip and a logo and
+times one FFmpeg pass against TemplateService._render_segmented (input-side
+seeking per segment), with the same encoder profile.
+
+Usage (from backend/):
+    python -m benchmarks.segmented_encode --duration 1200 --workers 4
+    python -m benchmarks.segmented_encode --case template --duration 120 --workers 4
+
+Run it on the target box (e.g. 8 cores); results depend heavily on core
+count and preset. Output PSNR between the two results is printed as a
+sanity check (segment joins should be visually identical).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.caption_service import CaptionService, BURN_RENDITIONS
+from app.services.encoder_profiles import encoder_profiles
+from app.services.ffmpeg_runner import ffmpeg_runner
+from app.services.karaoke_compiler import format_ass_time
+from app.services.template_service import TemplateService
+from app.template_system.compiler import compile_definition
+from app.template_system.seed_templates import TEMPLATES_DIR
+
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1080
+PlayResY: 1920
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,72,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,1,0,0,0,100,100,0,0,1,4,0,2,40,40,200,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+async def make_source(path: str, duration: float):
+    await ffmpeg_runner.run([
+        "-y",
+        "-f", "lavfi", "-i", f"testsrc2=d={duration}:s=1080x1920:r=30",
+        "-f", "lavfi", "-i", f"sine=d={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "60",
+        "-c:a", "aac", "-shortest",
+        path,
+    ], timeout=None)
+
+
+def make_ass(path: str, duration: float):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(ASS_HEADER)
+        for i in range(int(duration)):
+            f.write(f"Dialogue: 0,{format_ass_time(i)},{format_ass_time(i + 0.95)},Default,,0,0,0,,Caption line {i}\n")
+
+
+async def single_pass(service: CaptionService, source: str, ass: str, output: str, names):
+    args = ["-y", "-i", source, "-filter_complex", service._burn_filter_graph(ass, names)]
+    args += ["-map", "[v0]", "-map", "0:a?", *service._burn_video_codec_args(names[0], None), "-c:a", "copy", output]
+    await ffmpeg_runner.run(args, timeout=None)
+
+
+async def psnr(first: str, second: str) -> str:
+    result = await ffmpeg_runner.run(
+        ["-i", first, "-i", second, "-lavfi", "[0:v][1:v]psnr", "-f", "null", "-"],
+        timeout=None,
+    )
+    match = re.search(r"average:(\S+)", result.stderr)
+    return match.group(1) if match else "n/a"
+
+
+async def burn_case(duration: float, workers: int):
+    settings.BURN_TIMEOUT_SECONDS = 24 * 3600
+    names = ["1080p"]
+    service = CaptionService.__new__(CaptionService)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.mp4")
+        ass = os.path.join(tmp, "captions.ass")
+        print(f"Generating {duration:.0f}s source...")
+        await make_source(source, duration)
+        make_ass(ass, duration)
+
+        single_out = os.path.join(tmp, "single.mp4")
+        started = time.monotonic()
+        await single_pass(service, source, ass, single_out, names)
+        single_seconds = time.monotonic() - started
+
+        segmented_out = os.path.join(tmp, "segmented.mp4")
+        extra: list = []
+        started = time.monotonic()
+        await service._burn_segmented(
+            source, ass, names, {"1080p": segmented_out}, ["-c:a", "copy"],
+            duration, workers, None, None, extra,
+        )
+        segmented_seconds = time.monotonic() - started
+
+        quality = await psnr(segmented_out, single_out)
+
+    print("== caption burn-in ==")
+    print(f"cores:            {os.cpu_count()}")
+    print(f"preset:           {BURN_RENDITIONS['1080p']['preset']}")
+    report(duration, workers, single_seconds, segmented_seconds, quality)
+
+
+async def template_case(duration: float, workers: int, template_file: str):
+    with open(TEMPLATES_DIR / template_file, "r", encoding="utf-8") as f:
+        definition = json.load(f)
+    plan = compile_definition(definition, duration_seconds=int(duration))
+    profile = encoder_profiles.get("high")
+    service = TemplateService.__new__(TemplateService)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # A 6 s clip, so segments start at different points of its loop
+        clip = os.path.join(tmp, "clip.mp4")
+        logo = os.path.join(tmp, "logo.png")
+        await ffmpeg_runner.run([
+            "-y", "-f", "lavfi", "-i", "testsrc2=d=6:s=1080x1920:r=30",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", "30", clip,
+        ], timeout=None)
+        await ffmpeg_runner.run(["-y", "-f", "lavfi", "-i", "testsrc=s=256x256", "-frames:v", "1", logo])
+
+        customizations = {"duration_seconds": int(duration)}
+        asset_paths = {}
+        for key, placeholder in (definition.get("placeholders") or {}).items():
+            if placeholder.get("type") == "video":
+                customizations[key], asset_paths[key] = clip, clip
+            elif placeholder.get("type") in ("image", "logo"):
+                customizations[key], asset_paths[key] = logo, logo
+        bound = plan.bind(customizations, asset_paths, tmp)
+        encode_args = ["-r", str(bound.fps), *profile.encode_args(), "-pix_fmt", "yuv420p"]
+
+        single_out = os.path.join(tmp, "single.mp4")
+        started = time.monotonic()
+        await ffmpeg_runner.run(
+            [*bound.input_args, "-filter_complex", bound.filter_complex, "-map", bound.map_label,
+             "-t", str(bound.duration_seconds), *encode_args, single_out],
+            timeout=None,
+        )
+        single_seconds = time.monotonic() - started
+
+        segmented_out = os.path.join(tmp, "segmented.mp4")
+        started = time.monotonic()
+        await service._render_segmented(bound, encode_args, [], workers, tmp, segmented_out)
+        segmented_seconds = time.monotonic() - started
+
+        quality = await psnr(segmented_out, single_out)
+
+    print(f"== template render ({template_file}) ==")
+    print(f"cores:            {os.cpu_count()}")
+    print(f"encoder:          {profile.label}")
+    report(bound.duration_seconds, workers, single_seconds, segmented_seconds, quality)
+
+
+def report(duration: float, workers: int, single_seconds: float, segmented_seconds: float, quality: str):
+    print(f"single process:   {single_seconds:8.1f}s ({duration / single_seconds:.2f}x realtime)")
+    print(f"segmented ({workers}):    {segmented_seconds:8.1f}s ({duration / segmented_seconds:.2f}x realtime)")
+    print(f"speedup:          {single_seconds / segmented_seconds:8.2f}x")
+    print(f"PSNR vs single:   {quality} dB")
+
+
+async def main(case: str, duration: float, workers: int, template_file: str):
+    if case in ("burn", "all"):
+        await burn_case(duration, workers)
+    if case in ("template", "all"):
+        await template_case(duration, workers, template_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--case", choices=("burn", "template", "all"), default="burn", help="what to encode (default: burn)")
+    parser.add_argument("--duration", type=float, default=1200.0, help="source length in seconds (default: 20 min)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2), help="parallel segments")
+    parser.add_argument("--template", default="diwali_flash_sale.json", help="builtin template file for --case template")
+    args = parser.parse_args()
+    asyncio.run(main(args.case, args.duration, args.workers, args.template))
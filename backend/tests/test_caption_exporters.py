@@ -0,0 +1,190 @@
+"""Tests for the caption exporter registry (app.services.caption_exporters)."""
+
+import json
+import uuid
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from app.models.caption import Caption, CaptionFormat
+from app.services import caption_exporters
+from app.services.caption_exporters import ExportOptions, get_exporter, read_columnar
+
+
+SEGMENTS = [
+    {
+        "start_time": 0.0,
+        "end_time": 1.999,
+        "text": "नमस्ते दोस्तों",
+        "text_english": "Hello friends",
+        "confidence": 0.91,
+        "words": [{"word": "नमस्ते", "start": 0.0, "end": 0.9}, {"word": "दोस्तों", "start": 0.9, "end": 1.999}],
+    },
+    {"start_time": 2.5, "end_time": 4.125, "text": "aaj hum <baat> karenge & \"seekhenge\"", "text_english": None},
+    {"start_time": 59.9999, "end_time": 61.02, "text": "subscribe karo", "text_english": "Subscribe", "confidence": None},
+    {"start_time": 3601.5, "end_time": 3605.0, "text": "ek ghante baad", "text_english": "an hour later", "confidence": 0.5},
+]
+
+
+def make_caption(segments):
+    caption = Caption(id=uuid.uuid4(), title="test", detected_language="hi", transcription_text="full text")
+    caption.segments = segments
+    return caption
+
+
+def export(caption, format, include_translation=False):
+    exporter = get_exporter(format)
+    return b"".join(exporter.iter_bytes(caption, ExportOptions(include_translation=include_translation)))
+
+
+# Reference: the exporter as it was before the registry (whole document built in memory)
+
+def old_time(seconds, separator):
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int((seconds % 1) * 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def old_cues(segments, include_translation, separator):
+    lines = []
+    for i, segment in enumerate(segments, 1):
+        text = segment["text"]
+        if include_translation and segment.get("text_english"):
+            text = f"{text}\n{segment['text_english']}"
+        lines.append(f"{i}")
+        lines.append(f"{old_time(segment['start_time'], separator)} --> {old_time(segment['end_time'], separator)}")
+        lines.append(text)
+        lines.append("")
+    return lines
+
+
+def old_srt(segments, include_translation):
+    return "\n".join(old_cues(segments, include_translation, ","))
+
+
+def old_vtt(segments, include_translation):
+    return "\n".join(["WEBVTT", ""] + old_cues(segments, include_translation, "."))
+
+
+# --- SRT / VTT match the old exporter byte for byte ---
+
+@pytest.mark.parametrize("include_translation", [False, True])
+@pytest.mark.parametrize("segments", [SEGMENTS, SEGMENTS[:1], []], ids=["many", "one", "empty"])
+def test_srt_matches_old_exporter(segments, include_translation):
+    caption = make_caption(segments)
+    assert export(caption, CaptionFormat.SRT, include_translation) == old_srt(segments, include_translation).encode("utf-8")
+
+
+@pytest.mark.parametrize("include_translation", [False, True])
+@pytest.mark.parametrize("segments", [SEGMENTS, SEGMENTS[:1], []], ids=["many", "one", "empty"])
+def test_vtt_matches_old_exporter(segments, include_translation):
+    caption = make_caption(segments)
+    assert export(caption, CaptionFormat.VTT, include_translation) == old_vtt(segments, include_translation).encode("utf-8")
+
+
+def test_legacy_json_segments_export_like_rows():
+    rows = make_caption(SEGMENTS)
+    legacy = Caption(id=rows.id, title="test", detected_language="hi", legacy_segments=SEGMENTS)
+    legacy.segment_rows = []
+    assert export(legacy, CaptionFormat.SRT) == export(rows, CaptionFormat.SRT)
+
+
+# --- round trips ---
+
+@pytest.mark.parametrize("format, namespace", [
+    (CaptionFormat.TTML, "http://www.w3.org/ns/ttml"),
+    (CaptionFormat.DFXP, "http://www.w3.org/2006/10/ttaf1"),
+])
+@pytest.mark.parametrize("include_translation", [False, True])
+def test_ttml_round_trip(format, namespace, include_translation):
+    caption = make_caption(SEGMENTS)
+    root = ET.fromstring(export(caption, format, include_translation))
+    assert root.tag == f"{{{namespace}}}tt"
+    assert root.get("{http://www.w3.org/XML/1998/namespace}lang") == "hi"
+
+    paragraphs = root.findall(f".//{{{namespace}}}p")
+    assert len(paragraphs) == len(SEGMENTS)
+    for p, segment in zip(paragraphs, SEGMENTS):
+        assert clock_seconds(p.get("begin")) == pytest.approx(segment["start_time"], abs=0.0005)
+        assert clock_seconds(p.get("end")) == pytest.approx(segment["end_time"], abs=0.0005)
+        lines = [p.text or ""] + [br.tail or "" for br in p.findall(f"{{{namespace}}}br")]
+        expected = [segment["text"]]
+        if include_translation and segment.get("text_english"):
+            expected.append(segment["text_english"])
+        assert lines == expected
+
+
+def clock_seconds(value):
+    hours, minutes, seconds = value.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def test_ttml_empty_caption_is_valid_xml():
+    root = ET.fromstring(export(make_caption([]), CaptionFormat.TTML))
+    assert root.findall(".//{http://www.w3.org/ns/ttml}p") == []
+
+
+@pytest.mark.parametrize("include_translation", [False, True])
+def test_jsonl_round_trip(include_translation):
+    caption = make_caption(SEGMENTS)
+    data = export(caption, CaptionFormat.JSONL, include_translation).decode("utf-8")
+    assert data.endswith("\n")
+    rows = [json.loads(line) for line in data.splitlines()]
+
+    expected = list(caption.iter_segments())
+    assert len(rows) == len(expected)
+    for row, segment in zip(rows, expected):
+        assert row.pop("caption_id") == str(caption.id)
+        assert row.pop("language") == "hi"
+        if not include_translation:
+            segment.pop("text_english")
+        assert row == segment
+
+
+def test_jsonl_empty_caption():
+    assert export(make_caption([]), CaptionFormat.JSONL) == b""
+
+
+def test_json_round_trip():
+    caption = make_caption(SEGMENTS)
+    assert json.loads(export(caption, CaptionFormat.JSON)) == list(caption.iter_segments())
+    assert json.loads(export(make_caption([]), CaptionFormat.JSON)) == []
+
+
+def test_columnar_round_trip():
+    caption = make_caption(SEGMENTS)
+    columns = read_columnar(export(caption, CaptionFormat.COLUMNAR))
+    assert columns["segment_index"] == [0, 1, 2, 3]
+    assert columns["start_time"] == [s["start_time"] for s in SEGMENTS]
+    assert columns["end_time"] == [s["end_time"] for s in SEGMENTS]
+    assert columns["text"] == [s["text"] for s in SEGMENTS]
+    assert columns["text_english"] == [s.get("text_english") for s in SEGMENTS]
+    assert columns["word_count"] == [2, 0, 0, 0]
+    # float32 column, NaN stands for null
+    assert columns["confidence"][0] == pytest.approx(0.91, rel=1e-6)
+    assert columns["confidence"][1:3] == [None, None]
+    assert columns["confidence"][3] == 0.5
+
+
+def test_columnar_spans_row_groups(monkeypatch):
+    monkeypatch.setattr(caption_exporters, "COLUMNAR_ROW_GROUP_SIZE", 3)
+    segments = [
+        {"start_time": i, "end_time": i + 0.5, "text": f"line {i}", "text_english": None if i % 2 else f"en {i}"}
+        for i in range(10)
+    ]
+    columns = read_columnar(export(make_caption(segments), CaptionFormat.COLUMNAR))
+    assert columns["segment_index"] == list(range(10))
+    assert columns["text"] == [s["text"] for s in segments]
+    assert columns["text_english"] == [s["text_english"] for s in segments]
+
+
+def test_columnar_empty_caption():
+    columns = read_columnar(export(make_caption([]), CaptionFormat.COLUMNAR))
+    assert all(values == [] for values in columns.values())
+
+
+def test_read_columnar_rejects_other_data():
+    with pytest.raises(ValueError):
+        read_columnar(b"WEBVTT\n")
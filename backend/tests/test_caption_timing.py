@@ -0,0 +1,236 @@
+"""Tests for the caption timing engine (app.services.caption_timing)."""
+
+import random
+
+import pytest
+
+from app.services.caption_timing import CaptionRetimer, RetimeOptions, SegmentIndex, snap_to_cuts
+
+
+def naive_at(intervals, t):
+    """Reference lookup: the latest-starting interval covering t."""
+    covering = [i for i, (s, e) in enumerate(intervals) if s <= t < e]
+    return max(covering, key=lambda i: (intervals[i][0], i)) if covering else None
+
+
+def naive_overlapping(intervals, start, end):
+    return [i for i, (s, e) in enumerate(intervals) if s < end and e > start]
+
+
+# --- SegmentIndex ---
+
+def test_at_sequential_segments():
+    index = SegmentIndex([(0.0, 1.0), (1.0, 2.5), (3.0, 4.0)])
+    assert index.at(0.0) == 0
+    assert index.at(0.999) == 0
+    assert index.at(1.0) == 1  # end is exclusive, the next segment starts here
+    assert index.at(2.7) is None  # in a gap
+    assert index.at(3.5) == 2
+    assert index.at(4.0) is None
+    assert index.at(-1.0) is None
+
+
+def test_at_overlap_prefers_latest_start():
+    index = SegmentIndex([(0.0, 5.0), (1.0, 2.0)])
+    assert index.at(1.5) == 1
+    assert index.at(3.0) == 0
+
+
+def test_at_long_segment_covers_later_short_ones():
+    # The running max end keeps segment 0 reachable behind segments that ended before t
+    index = SegmentIndex([(0.0, 10.0), (1.0, 2.0), (3.0, 4.0), (5.0, 6.0)])
+    assert index.at(7.0) == 0
+    assert index.at(5.5) == 3
+    assert index.at(4.5) == 0
+
+
+def test_zero_length_segments_are_never_on_screen():
+    index = SegmentIndex([(1.0, 1.0), (1.0, 2.0), (2.0, 2.0)])
+    assert index.at(1.0) == 1
+    assert index.at(2.0) is None
+    assert SegmentIndex([(1.0, 1.0)]).at(1.0) is None
+
+
+def test_empty_index():
+    index = SegmentIndex([])
+    assert len(index) == 0
+    assert index.at(0.0) is None
+    assert index.overlapping(0.0, 10.0) == []
+    assert index.next_after(0.0) is None
+
+
+def test_key_at_maps_to_caller_keys():
+    index = SegmentIndex([(0.0, 1.0), (2.0, 3.0)], keys=[7, 9])
+    assert index.key_at(2.5) == 9
+    assert index.key_at(1.5) is None
+
+
+def test_from_segments_reads_segment_dicts():
+    index = SegmentIndex.from_segments([
+        {"start_time": 0, "end_time": 1.5},
+        {"start_time": 2, "end_time": 3},
+    ])
+    assert index.starts == [0.0, 2.0]
+    assert index.at(2.2) == 1
+
+
+def test_overlapping_includes_long_earlier_segment():
+    index = SegmentIndex([(0.0, 10.0), (1.0, 2.0), (3.0, 4.0), (11.0, 12.0)])
+    assert index.overlapping(5.0, 6.0) == [0]
+    assert index.overlapping(1.5, 3.5) == [0, 1, 2]
+    assert index.overlapping(10.0, 11.0) == []  # both ends exclusive
+
+
+def test_next_after():
+    index = SegmentIndex([(0.0, 1.0), (2.0, 3.0)])
+    assert index.next_after(0.0) == 0
+    assert index.next_after(1.0) == 1
+    assert index.next_after(2.5) is None
+
+
+def test_lookups_match_brute_force():
+    rng = random.Random(1234)
+    for _ in range(200):
+        intervals = []
+        for _ in range(rng.randint(0, 12)):
+            start = round(rng.uniform(0, 20), 1)
+            # Zero-length and long, overlapping segments included
+            intervals.append((start, round(start + rng.choice([0.0, 0.5, 1.0, 3.0, 8.0]), 1)))
+        intervals.sort()
+        index = SegmentIndex(intervals)
+        for step in range(0, 300):
+            t = step / 10
+            expected = naive_at(intervals, t)
+            found = index.at(t)
+            if expected is None:
+                assert found is None
+            else:
+                # Equal starts: any covering segment with the latest start is correct
+                assert found is not None and intervals[found][0] == intervals[expected][0]
+                assert intervals[found][0] <= t < intervals[found][1]
+        for _ in range(20):
+            a = round(rng.uniform(0, 25), 1)
+            b = round(a + rng.uniform(0, 5), 1)
+            assert index.overlapping(a, b) == naive_overlapping(intervals, a, b)
+
+
+# --- snap_to_cuts ---
+
+@pytest.mark.parametrize(
+    "t, expected",
+    [
+        (4.9, 5.0),  # within tolerance
+        (5.25, 5.0),  # exactly at tolerance
+        (5.3, 5.3),  # beyond tolerance
+        (5.0, 5.0),  # on a cut
+        (0.1, 0.0),  # first cut at the start of the video
+        (9.8, 10.0),  # last cut
+        (12.0, 12.0),  # after every cut
+    ],
+)
+def test_snap_to_cuts(t, expected):
+    assert snap_to_cuts(t, [0.0, 5.0, 10.0], 0.25) == pytest.approx(expected)
+
+
+def test_snap_to_cuts_picks_nearest_of_two():
+    assert snap_to_cuts(5.4, [5.0, 5.5], 1.0) == 5.5
+    assert snap_to_cuts(5.2, [5.0, 5.5], 1.0) == 5.0
+
+
+def test_snap_to_cuts_without_cuts():
+    assert snap_to_cuts(3.3, [], 1.0) == 3.3
+
+
+# --- CaptionRetimer ---
+
+def seg(start, end, text, **extra):
+    return {"start_time": start, "end_time": end, "text": text, **extra}
+
+
+def test_retime_reindexes_and_drops_empty_lines():
+    out = CaptionRetimer().retime([
+        seg(3.0, 4.5, "second line"),
+        seg(0.0, 1.5, "first line"),
+        seg(2.0, 2.5, "   "),
+    ])
+    assert [s["text"] for s in out] == ["first line", "second line"]
+    assert [s["segment_index"] for s in out] == [0, 1]
+
+
+def test_retime_fixes_overlaps():
+    options = RetimeOptions()
+    out = CaptionRetimer(options).retime([
+        seg(0.0, 3.0, "a caption that runs long"),
+        seg(2.0, 4.0, "the next caption"),
+    ])
+    assert out[0]["end_time"] <= out[1]["start_time"] - options.min_gap + 1e-9
+    assert out[1]["start_time"] == 2.0
+
+
+def test_retime_shares_overlap_of_captions_starting_together():
+    out = CaptionRetimer().retime([
+        seg(1.0, 3.0, "first of two captions"),
+        seg(1.1, 3.0, "second of two captions"),
+    ])
+    assert out[0]["start_time"] == 1.0
+    assert out[0]["end_time"] < out[1]["start_time"]
+    assert out[1]["start_time"] == pytest.approx(2.0)
+
+
+def test_retime_closes_small_gaps():
+    options = RetimeOptions()
+    out = CaptionRetimer(options).retime([
+        seg(0.0, 1.5, "first caption here"),
+        seg(1.8, 3.0, "second caption here"),
+    ])
+    assert out[0]["end_time"] == pytest.approx(1.8 - options.min_gap)
+
+
+def test_retime_zero_length_segment_gets_min_duration():
+    options = RetimeOptions()
+    out = CaptionRetimer(options).retime([seg(2.0, 2.0, "blink"), seg(6.0, 7.0, "later caption line")])
+    assert out[0]["end_time"] - out[0]["start_time"] == pytest.approx(options.min_duration)
+
+
+def test_retime_merges_short_fragments():
+    out = CaptionRetimer().retime([seg(0.0, 0.3, "haan"), seg(0.4, 1.4, "bilkul sahi")])
+    assert len(out) == 1
+    assert out[0]["text"] == "haan bilkul sahi"
+    assert (out[0]["start_time"], out[0]["end_time"]) == (0.0, 1.4)
+
+
+def test_retime_does_not_merge_across_a_cut():
+    out = CaptionRetimer(RetimeOptions(shot_changes=[0.35])).retime([
+        seg(0.0, 0.3, "haan"), seg(0.4, 1.4, "bilkul sahi"),
+    ])
+    assert len(out) == 2
+
+
+def test_retime_splits_long_lines_on_word_times():
+    words = [{"word": f"word{i}", "start": i * 0.5, "end": i * 0.5 + 0.4} for i in range(12)]
+    text = " ".join(w["word"] for w in words)
+    out = CaptionRetimer(RetimeOptions(max_chars_per_line=20)).retime([seg(0.0, 6.0, text, words=words)])
+    assert len(out) > 1
+    assert all(len(s["text"]) <= 20 for s in out)
+    assert out[0]["start_time"] == 0.0 and out[-1]["end_time"] == 6.0
+    assert " ".join(s["text"] for s in out) == text
+
+
+def test_retime_snaps_boundaries_to_cuts():
+    options = RetimeOptions(shot_changes=[2.1, 5.0])
+    out = CaptionRetimer(options).retime([
+        seg(0.0, 1.9, "before the cut"),
+        seg(2.0, 4.9, "after the cut"),
+    ])
+    assert out[1]["start_time"] == 2.1
+    assert out[0]["end_time"] <= 2.1
+    assert out[1]["end_time"] == 5.0
+
+
+def test_retime_cut_exactly_on_a_boundary_keeps_it():
+    out = CaptionRetimer(RetimeOptions(shot_changes=[2.0])).retime([
+        seg(0.0, 2.0, "before the cut"),
+        seg(2.0, 4.0, "after the cut"),
+    ])
+    assert out[1]["start_time"] == 2.0
+    assert out[0]["end_time"] <= 2.0
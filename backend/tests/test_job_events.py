@@ -0,0 +1,104 @@
+"""Tests for job event streaming (app.services.job_events)."""
+
+import asyncio
+import json
+
+import pytest
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.services.job_events import JobEventBus, channel_name, job_events, sse_stream
+
+
+def parse_frame(frame):
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+async def redis_available():
+    client = redis.from_url(settings.REDIS_URL)
+    try:
+        await asyncio.wait_for(client.ping(), timeout=1)
+        return True
+    except Exception:
+        return False
+    finally:
+        await client.aclose()
+
+
+async def until_subscribed(client, count=1):
+    """Wait until ``count`` processes listen on the job events channel."""
+    for _ in range(100):
+        subscribers = dict(await client.pubsub_numsub(settings.JOB_EVENTS_REDIS_CHANNEL))
+        if subscribers.get(settings.JOB_EVENTS_REDIS_CHANNEL.encode(), 0) >= count:
+            return
+        await asyncio.sleep(0.05)
+    raise AssertionError("job event listener never subscribed")
+
+
+# --- in-process delivery ---
+
+@pytest.mark.asyncio
+async def test_publish_reaches_local_subscribers():
+    bus = JobEventBus(max_queue=2)
+    bus.publish("template:1", "progress", {"progress": 5})  # nobody listening yet
+    with bus.subscribe("template:1") as queue:
+        assert bus.subscriber_count("template:1") == 1
+        for progress in (10, 20, 30):
+            bus.publish("template:1", "progress", {"progress": progress})
+        bus.publish("template:2", "progress", {"progress": 99})
+        # Full queue drops the oldest event
+        assert [queue.get_nowait().data["progress"] for _ in range(queue.qsize())] == [20, 30]
+    assert bus.subscriber_count("template:1") == 0
+
+
+# --- across processes ---
+
+@pytest.mark.asyncio
+async def test_worker_publish_reaches_api_stream():
+    if not await redis_available():
+        pytest.skip(f"no Redis at {settings.REDIS_URL}")
+
+    # The module bus plays the API process; a second bus plays a render worker
+    worker = JobEventBus()
+    job_events.start()
+    worker.start(listen=False)
+    client = redis.from_url(settings.REDIS_URL)
+    channel = channel_name("template", "render-1")
+    try:
+        await until_subscribed(client)
+        stream = sse_stream(channel, [("processing", {"status": "processing"})])
+        assert parse_frame(await anext(stream)) == ("processing", {"status": "processing"})
+
+        worker.publish(channel, "progress", {"progress": 40})
+        assert parse_frame(await asyncio.wait_for(anext(stream), timeout=5)) == ("progress", {"progress": 40})
+
+        worker.publish(channel, "completed", {"output_url": "https://cdn.example/render-1.mp4"})
+        assert parse_frame(await asyncio.wait_for(anext(stream), timeout=5)) == (
+            "completed", {"output_url": "https://cdn.example/render-1.mp4"},
+        )
+        with pytest.raises(StopAsyncIteration):
+            await anext(stream)
+    finally:
+        await worker.shutdown()
+        await job_events.shutdown()
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_own_events_are_not_delivered_twice():
+    if not await redis_available():
+        pytest.skip(f"no Redis at {settings.REDIS_URL}")
+
+    bus = JobEventBus()
+    bus.start()
+    client = redis.from_url(settings.REDIS_URL)
+    try:
+        await until_subscribed(client)
+        with bus.subscribe("burn:1") as queue:
+            bus.publish("burn:1", "progress", {"progress": 1})
+            await asyncio.sleep(0.3)
+            assert queue.qsize() == 1
+    finally:
+        await bus.shutdown()
+        await client.aclose()
@@ -0,0 +1,201 @@
+"""Tests for the in-memory template catalogue (app.services.template_catalogue)."""
+
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from app.api.v1.endpoints.templates import _check_etag
+from app.models.template import AspectRatio, Template, TemplateCategory, TemplateType
+from app.services.template_catalogue import TemplateCatalogue, _build, phonetic_key, tokenize
+
+
+def make_template(name, **fields):
+    values = dict(
+        id=uuid.uuid4(),
+        name=name,
+        category=TemplateCategory.LIFESTYLE,
+        template_type=TemplateType.REEL,
+        aspect_ratio=AspectRatio.PORTRAIT_9_16,
+        width=1080,
+        height=1920,
+        duration_seconds=15,
+        fps=30,
+        is_premium=False,
+        is_featured=False,
+        usage_count=0,
+    )
+    values.update(fields)
+    return Template(**values)
+
+
+TEMPLATES = [
+    make_template(
+        "Diwali Flash Sale",
+        name_hindi="दिवाली सेल",
+        category=TemplateCategory.FESTIVAL,
+        tags=["diwali", "sale", "offer"],
+        festival_name="Diwali",
+        festival_date=datetime(2026, 11, 8),
+        usage_count=50,
+    ),
+    make_template(
+        "Navratri Garba Night",
+        category=TemplateCategory.FESTIVAL,
+        tags=["navratri", "garba"],
+        festival_name="Navaratri",
+        festival_date=datetime(2026, 10, 11, tzinfo=timezone.utc),
+        usage_count=10,
+        is_premium=True,
+    ),
+    make_template(
+        "Cafe Menu Reveal",
+        description="Show off today's specials",
+        category=TemplateCategory.FOOD,
+        template_type=TemplateType.STORY,
+        tags=["food", "menu"],
+        usage_count=500,
+    ),
+    make_template(
+        "Gym Progress Challenge",
+        category=TemplateCategory.FITNESS,
+        aspect_ratio=AspectRatio.SQUARE_1_1,
+        tags=["fitness", "workout"],
+        is_featured=True,
+        usage_count=5,
+    ),
+]
+
+SIGNATURE = (len(TEMPLATES), datetime(2026, 10, 1, tzinfo=timezone.utc))
+
+
+@pytest.fixture
+def catalogue():
+    catalogue = TemplateCatalogue()
+    catalogue._snapshot = _build(TEMPLATES, SIGNATURE)
+    return catalogue
+
+
+async def names(catalogue, **filters):
+    return [t.name for t in await catalogue.search(**filters)]
+
+
+# --- tokens and phonetic keys ---
+
+def test_tokenize_splits_latin_and_devanagari():
+    assert tokenize("Diwali_Sale 2026! दिवाली। Offer") == ["diwali", "sale", "2026", "दिवाली", "offer"]
+    assert tokenize("") == []
+    assert tokenize(None) == []
+    assert tokenize("!!! ...") == []
+
+
+@pytest.mark.parametrize("variants", [
+    ("diwali", "divali", "deewali", "दिवाली"),
+    ("navratri", "navaratri", "नवरात्रि"),
+    ("holi", "होली"),
+    ("ganesh", "गणेश"),
+    ("hindi", "himdi"),
+])
+def test_phonetic_key_folds_spellings(variants):
+    keys = {phonetic_key(token) for token in variants}
+    assert len(keys) == 1, keys
+
+
+def test_phonetic_key_keeps_different_words_apart():
+    assert phonetic_key("diwali") != phonetic_key("holi")
+    assert phonetic_key("garba") != phonetic_key("gym")
+
+
+# --- search and filters ---
+
+def test_snapshot_browse_order(catalogue):
+    # Featured first, then by usage
+    assert [t.name for t in catalogue._snapshot.templates] == [
+        "Gym Progress Challenge", "Cafe Menu Reveal", "Diwali Flash Sale", "Navratri Garba Night",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query", ["diwali", "Divali", "दिवाली", "दिवा", "deewali", "DIWALI!"])
+async def test_search_matches_spelling_variants(catalogue, query):
+    assert await names(catalogue, search=query) == ["Diwali Flash Sale"]
+
+
+@pytest.mark.asyncio
+async def test_search_matches_prefixes_and_all_tokens(catalogue):
+    assert await names(catalogue, search="navaratri garba") == ["Navratri Garba Night"]
+    assert await names(catalogue, search="gar") == ["Navratri Garba Night"]
+    assert await names(catalogue, search="diwali garba") == []
+    assert await names(catalogue, search="specials") == ["Cafe Menu Reveal"]
+
+
+@pytest.mark.asyncio
+async def test_search_without_words_matches_nothing(catalogue):
+    assert await names(catalogue, search="!!!") == []
+    assert len(await names(catalogue)) == len(TEMPLATES)
+
+
+@pytest.mark.asyncio
+async def test_filters(catalogue):
+    assert await names(catalogue, category=TemplateCategory.FESTIVAL) == ["Diwali Flash Sale", "Navratri Garba Night"]
+    assert await names(catalogue, template_type=TemplateType.STORY) == ["Cafe Menu Reveal"]
+    assert await names(catalogue, aspect_ratio=AspectRatio.SQUARE_1_1) == ["Gym Progress Challenge"]
+    assert await names(catalogue, is_premium=True) == ["Navratri Garba Night"]
+    assert await names(catalogue, is_featured=True) == ["Gym Progress Challenge"]
+    assert await names(catalogue, festival_name="NAVA") == ["Navratri Garba Night"]
+
+
+@pytest.mark.asyncio
+async def test_search_combines_with_filters(catalogue):
+    assert await names(catalogue, search="sale", is_premium=False) == ["Diwali Flash Sale"]
+    assert await names(catalogue, search="sale", is_premium=True) == []
+
+
+@pytest.mark.asyncio
+async def test_categories_featured_and_festivals(catalogue):
+    assert dict(await catalogue.categories()) == {
+        TemplateCategory.FESTIVAL: 2, TemplateCategory.FOOD: 1, TemplateCategory.FITNESS: 1,
+    }
+    assert [t.name for t in await catalogue.featured(10)] == ["Gym Progress Challenge"]
+    # Naive and aware dates are compared alike, ordered by date
+    festivals = await catalogue.festivals(datetime(2026, 10, 1), datetime(2026, 12, 31, tzinfo=timezone.utc))
+    assert [t.name for t in festivals] == ["Navratri Garba Night", "Diwali Flash Sale"]
+    festivals = await catalogue.festivals(datetime(2026, 11, 1), datetime(2026, 11, 30))
+    assert [t.name for t in festivals] == ["Diwali Flash Sale"]
+
+
+# --- ETags ---
+
+def test_etag_follows_table_signature():
+    etag = _build(TEMPLATES, SIGNATURE).etag
+    assert etag.startswith('"catalogue-') and etag.endswith('"')
+    assert _build(TEMPLATES, SIGNATURE).etag == etag
+    assert _build(TEMPLATES, (SIGNATURE[0] + 1, SIGNATURE[1])).etag != etag
+    assert _build(TEMPLATES, (SIGNATURE[0], datetime(2026, 10, 2, tzinfo=timezone.utc))).etag != etag
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+ETAG = '"catalogue-0123456789abcdef"'
+
+
+@pytest.mark.parametrize("sent", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*"])
+def test_check_etag_not_modified(sent):
+    response = Response()
+    not_modified = _check_etag(make_request(sent), response, ETAG)
+    assert not_modified is not None
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == ETAG
+
+
+@pytest.mark.parametrize("sent", [None, '"other"', '"catalogue-0123456789abcdef-20261019"'])
+def test_check_etag_tags_fresh_response(sent):
+    response = Response()
+    assert _check_etag(make_request(sent), response, ETAG) is None
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == "no-cache"
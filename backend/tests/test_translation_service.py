@@ -0,0 +1,56 @@
+"""Tests for caption translation cache keys (app.services.translation_service)."""
+
+import pytest
+
+from app.core.lru import LRUCache
+from app.services.translation_service import CaptionTranslator, normalize_segment_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Subscribe Karo", "subscribe karo"),
+    ("  subscribe   karo \n", "subscribe karo"),
+    ("subscribe karo.", "subscribe karo"),
+    ("subscribe karo,", "subscribe karo"),
+    ("नमस्ते दोस्तों।", "नमस्ते दोस्तों"),
+    ("नमस्ते दोस्तों ॥", "नमस्ते दोस्तों"),
+    ("नमस्ते दोस्तों . ।", "नमस्ते दोस्तों"),
+    ("", ""),
+    (None, ""),
+    ("।", ""),
+])
+def test_normalize_folds_case_whitespace_and_full_stops(text, expected):
+    assert normalize_segment_text(text) == expected
+
+
+def test_normalize_uses_nfc():
+    # Precomposed "क़" (U+0958) and "क" + nukta are the same text
+    assert normalize_segment_text("\u0958\u093f\u0932\u093e") == normalize_segment_text("\u0915\u093c\u093f\u0932\u093e")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tum aa rahe ho?", "tum aa rahe ho?"),
+    ("tum aa rahe ho!", "tum aa rahe ho!"),
+    ("tum aa rahe ho…", "tum aa rahe ho…"),
+    ("kya baat hai?!", "kya baat hai?!"),
+    ("kya tum aa rahe ho?.", "kya tum aa rahe ho?"),
+])
+def test_normalize_keeps_questions_and_exclamations(text, expected):
+    assert normalize_segment_text(text) == expected
+
+
+def test_question_and_statement_have_different_keys():
+    statement = normalize_segment_text("tum aa rahe ho.")
+    assert statement == normalize_segment_text("Tum aa rahe ho")
+    assert statement != normalize_segment_text("tum aa rahe ho?")
+    assert statement != normalize_segment_text("tum aa rahe ho!")
+
+
+@pytest.mark.asyncio
+async def test_translate_serves_cached_keys():
+    cache = LRUCache(8)
+    cache.set("tum aa rahe ho", "You are coming.")
+    cache.set("tum aa rahe ho?", "Are you coming?")
+    translator = CaptionTranslator(client=None, cache=cache)
+    assert await translator.translate(["Tum aa rahe ho.", "tum aa rahe ho?", "  "]) == [
+        "You are coming.", "Are you coming?", None,
+    ]